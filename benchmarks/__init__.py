@@ -0,0 +1 @@
+"""Performance benchmarks for the serving stack (run with `python -m benchmarks.<name>`)."""
@@ -0,0 +1,76 @@
+"""Child process for `benchmarks.numpy_backend`: time imports, model load and a first prediction.
+
+    python -m benchmarks._cold_start {numpy,torch} CHECKPOINT IMAGE
+
+Kept free of `benchmarks._common` so the NumPy run never imports torch.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from time import perf_counter
+
+
+def _peak_rss_mb() -> float:
+    # VmHWM rather than ru_maxrss: the latter survives exec and reports the parent's peak.
+    with open("/proc/self/status", encoding="utf-8") as handle:
+        for line in handle:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def main() -> None:
+    backend, checkpoint_path, image_path = sys.argv[1], Path(sys.argv[2]), Path(sys.argv[3])
+    image_bytes = image_path.read_bytes()
+
+    start = perf_counter()
+    if backend == "numpy":
+        import webapp.lite  # noqa: F401
+        from webapp.core.config import settings
+        from webapp.services.image_decode import decode_image_array
+        from webapp.services.numpy_backend import NumpyBaselineCNN, softmax
+
+        imported_at = perf_counter()
+        model = NumpyBaselineCNN.from_npz(checkpoint_path)
+        loaded_at = perf_counter()
+        image = decode_image_array(
+            image_bytes, settings.normalization_mean, settings.normalization_std
+        )
+        softmax(model(image))
+    else:
+        import torch
+
+        import webapp.main  # noqa: F401
+        from webapp.core.config import settings
+        from webapp.schemas.prediction import ModelId
+        from webapp.services.batching import forward_probabilities
+        from webapp.services.model_registry import ModelRegistry
+        from webapp.services.preprocess import decode_image_fast
+
+        imported_at = perf_counter()
+        model = ModelRegistry(settings).load_checkpoint(ModelId.baseline, checkpoint_path)
+        loaded_at = perf_counter()
+        image = decode_image_fast(
+            image_bytes, settings.normalization_mean, settings.normalization_std
+        )
+        forward_probabilities(model, image, torch.device("cpu"))
+    predicted_at = perf_counter()
+
+    print(
+        json.dumps(
+            {
+                "import_ms": (imported_at - start) * 1000,
+                "load_ms": (loaded_at - imported_at) * 1000,
+                "first_predict_ms": (predicted_at - loaded_at) * 1000,
+                "peak_rss_mb": _peak_rss_mb(),
+                "torch_imported": "torch" in sys.modules,
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Shared helpers for benchmark scripts."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+from collections.abc import Callable
+from datetime import UTC, datetime
+from io import BytesIO
+from pathlib import Path
+from uuid import uuid4
+
+import numpy as np
+import PIL
+import torch
+from PIL import Image
+
+from tools.train_data import write_store
+from webapp.core.config import Settings
+from webapp.models.cnn import create_model
+from webapp.schemas.prediction import ModelId
+from webapp.services.model_registry import ModelRegistry
+
+BENCHMARK_MODEL_IDS = (ModelId.baseline, ModelId.cnnv2)
+
+
+def build_registry(settings: Settings) -> ModelRegistry:
+    """Load checkpoints when present; fall back to random weights for timing-only runs."""
+    registry = ModelRegistry(settings)
+    try:
+        registry.load_all()
+    except RuntimeError as exc:
+        print(f"warning: {exc}; using randomly initialized weights instead.", file=sys.stderr)
+    for model_id in BENCHMARK_MODEL_IDS:
+        if not registry.is_available(model_id):
+            registry.register(model_id, create_model(model_id))
+    return registry
+
+
+def synthetic_image_bytes(image_format: str, width: int, height: int, seed: int = 0) -> bytes:
+    """Photo-like test image: smooth gradients plus mild noise, encoded as PNG or JPEG."""
+    rng = np.random.default_rng(seed)
+    ys, xs = np.mgrid[0:height, 0:width]
+    base = np.stack(
+        [xs / max(1, width - 1), ys / max(1, height - 1), (xs + ys) / max(1, width + height - 2)],
+        axis=-1,
+    )
+    pixels = np.clip(base * 255 + rng.normal(0, 12, size=base.shape), 0, 255).astype(np.uint8)
+    buffer = BytesIO()
+    Image.fromarray(pixels).save(buffer, format=image_format, quality=90)
+    return buffer.getvalue()
+
+
+def multipart_body(
+    image_bytes: bytes,
+    model_id: ModelId,
+    filename: str = "bench.jpg",
+    content_type: str = "image/jpeg",
+) -> tuple[bytes, str]:
+    """`/api/v1/predict` form body with one `file` part; returns `(body, content_type)`."""
+    boundary = uuid4().hex
+    parts = [
+        (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="model_id"\r\n\r\n'
+            f"{model_id.value}\r\n"
+        ).encode(),
+        (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"'
+            f"\r\nContent-Type: {content_type}\r\n\r\n"
+        ).encode(),
+        image_bytes,
+        f"\r\n--{boundary}--\r\n".encode(),
+    ]
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+_Headers = dict[str, str]
+
+
+async def asgi_request(
+    app: Callable, method: str, path: str, headers: _Headers, body: bytes = b""
+) -> tuple[int, _Headers, bytes]:
+    """One HTTP request straight into an ASGI app; returns `(status, headers, body)`."""
+    raw_path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": raw_path,
+        "raw_path": raw_path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [
+            (b"host", b"benchmark"),
+            *((name.lower().encode(), value.encode()) for name, value in headers.items()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+    }
+    sent = False
+    status = 0
+    response_headers: _Headers = {}
+    chunks: list[bytes] = []
+
+    async def receive() -> dict[str, object]:
+        nonlocal sent
+        if sent:
+            await asyncio.Event().wait()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: dict[str, object]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = int(message["status"])
+            response_headers.update(
+                (name.decode().lower(), value.decode()) for name, value in message["headers"]
+            )
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, response_headers, b"".join(chunks)
+
+
+def write_synthetic_store(
+    store_dir: Path, train_samples: int, test_samples: int = 1_000, seed: int = 0
+) -> None:
+    """Random uint8 images in the `tools.train_data` store layout, for timing without CIFAR-10."""
+    rng = np.random.default_rng(seed)
+    write_store(
+        store_dir,
+        *(
+            (
+                rng.integers(0, 256, (samples, 32, 32, 3), dtype=np.uint8),
+                rng.integers(0, 10, samples),
+            )
+            for samples in (train_samples, test_samples)
+        ),
+    )
+
+
+def print_table(headers: list[str], rows: list[list[object]]) -> None:
+    cells = [[str(value) for value in row] for row in rows]
+    widths = [
+        max(len(header), *(len(row[index]) for row in cells)) if cells else len(header)
+        for index, header in enumerate(headers)
+    ]
+    print("  ".join(header.ljust(width) for header, width in zip(headers, widths, strict=True)))
+    for row in cells:
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths, strict=True)))
+
+
+def write_json(path: Path | None, payload: object) -> None:
+    if path is None:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as handle:
+        json.dump(payload, handle, indent=2)
+    print(f"Wrote {path}")
+
+
+def percentile(sorted_samples: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_samples) - 1, max(0, round(fraction * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as handle:
+            for line in handle:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def _git_commit() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parents[1],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def host_metadata() -> dict[str, object]:
+    """Enough context to tell whether two result files are comparable."""
+    return {
+        "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_model": _cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "numpy": np.__version__,
+        "pillow": PIL.__version__,
+    }
@@ -0,0 +1,123 @@
+"""Per-image input and output cost: PNG decoding vs. raw/`.npy` frames, JSON vs. binary results.
+
+    python -m benchmarks.array_inputs --batch-size 64 --repeats 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+from io import BytesIO
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import torch
+from PIL import Image
+
+from benchmarks._common import host_metadata, print_table, synthetic_image_bytes, write_json
+from webapp.core.constants import CIFAR10_CLASSES, INPUT_IMAGE_SIZE
+from webapp.schemas.prediction import BatchPredictionItem, ModelId, TopKPrediction
+from webapp.services.preprocess import decode_frames, decode_image_fast
+
+MEAN = STD = (0.5, 0.5, 0.5)
+
+
+def _median_us(function, repeats: int) -> float:
+    for _ in range(5):
+        function()
+    samples = []
+    for _ in range(repeats):
+        start = perf_counter()
+        function()
+        samples.append((perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def _json_lines(probabilities: torch.Tensor, top_k: int) -> str:
+    lines = []
+    for index, row in enumerate(probabilities):
+        values, indices = torch.topk(row, top_k)
+        predictions = [
+            TopKPrediction(class_name=CIFAR10_CLASSES[i], probability=round(float(p), 6))
+            for p, i in zip(values.tolist(), indices.tolist(), strict=True)
+        ]
+        item = BatchPredictionItem(
+            index=index,
+            model_id=ModelId.baseline,
+            predicted_class=predictions[0].class_name,
+            confidence=predictions[0].probability,
+            top_k=predictions,
+            inference_ms=1.0,
+        )
+        lines.append(item.model_dump_json())
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--json", type=Path, default=None, help="Optional results file.")
+    args = parser.parse_args()
+
+    height, width = INPUT_IMAGE_SIZE
+    pngs = [
+        synthetic_image_bytes("PNG", width, height, seed=seed) for seed in range(args.batch_size)
+    ]
+    frames = np.stack([np.asarray(Image.open(BytesIO(png)).convert("RGB")) for png in pngs])
+    buffer = BytesIO()
+    np.save(buffer, frames)
+    npy_bytes = buffer.getvalue()
+    raw_frame = frames[0].tobytes()
+    out = torch.empty(args.batch_size, 3, height, width)
+
+    def png_batch() -> None:
+        for row, png in enumerate(pngs):
+            decode_image_fast(png, MEAN, STD, out=out[row : row + 1])
+
+    inputs = {
+        "png_single": (lambda: decode_image_fast(pngs[0], MEAN, STD), 1),
+        "raw_single": (lambda: decode_frames(raw_frame, MEAN, STD), 1),
+        "png_batch": (png_batch, args.batch_size),
+        "npy_batch": (lambda: decode_frames(npy_bytes, MEAN, STD), args.batch_size),
+    }
+    probabilities = torch.softmax(torch.randn(args.batch_size, len(CIFAR10_CLASSES)), dim=1)
+    outputs = {
+        "json_batch": (
+            _median_us(lambda: _json_lines(probabilities, args.top_k), args.repeats),
+            len(_json_lines(probabilities, args.top_k)),
+        ),
+        "binary_batch": (
+            _median_us(lambda: probabilities.numpy().astype("<f4").tobytes(), args.repeats),
+            probabilities.numel() * 4,
+        ),
+    }
+
+    rows: list[dict[str, object]] = []
+    for name, (function, images) in inputs.items():
+        total_us = _median_us(function, args.repeats)
+        rows.append(
+            {
+                "case": name,
+                "total_us": round(total_us, 1),
+                "per_image_us": round(total_us / images, 2),
+                "bytes": len(npy_bytes) if name == "npy_batch" else "",
+            }
+        )
+    for name, (total_us, size) in outputs.items():
+        rows.append(
+            {
+                "case": name,
+                "total_us": round(total_us, 1),
+                "per_image_us": round(total_us / args.batch_size, 2),
+                "bytes": size,
+            }
+        )
+    print_table(list(rows[0]), [list(row.values()) for row in rows])
+    write_json(args.json, {"metadata": host_metadata(), "results": rows})
+
+
+if __name__ == "__main__":
+    main()
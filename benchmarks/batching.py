@@ -0,0 +1,117 @@
+"""Throughput vs. concurrency for the micro-batching scheduler.
+
+Compares unbatched dispatch (`max_batch_size=1`) against the configured batch
+window for `BaselineCNN` and `CNNV2`:
+
+    python -m benchmarks.batching --requests 512 --concurrency 1 4 16 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+from time import perf_counter
+
+import torch
+
+from benchmarks._common import BENCHMARK_MODEL_IDS, build_registry, print_table, write_json
+from webapp.core.config import settings
+from webapp.schemas.prediction import ModelId
+from webapp.services.batching import BatchScheduler
+from webapp.services.model_registry import ModelRegistry
+
+
+async def _drive(
+    scheduler: BatchScheduler,
+    model_id: ModelId,
+    concurrency: int,
+    total_requests: int,
+) -> tuple[float, list[float]]:
+    image = torch.randn(1, 3, 32, 32)
+    remaining = total_requests
+    latencies_ms: list[float] = []
+
+    async def client() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = perf_counter()
+            await scheduler.predict(model_id, image)
+            latencies_ms.append((perf_counter() - start) * 1000)
+
+    start = perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return perf_counter() - start, latencies_ms
+
+
+async def _run_case(
+    registry: ModelRegistry,
+    model_id: ModelId,
+    concurrency: int,
+    total_requests: int,
+    max_batch_size: int,
+    max_wait_ms: float,
+) -> dict[str, object]:
+    scheduler = BatchScheduler(registry, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    try:
+        # Warm-up so allocator and kernel selection do not skew the first case.
+        await _drive(scheduler, model_id, concurrency, min(total_requests, 32))
+        elapsed_s, latencies_ms = await _drive(scheduler, model_id, concurrency, total_requests)
+        stats = scheduler.stats()[model_id]
+    finally:
+        await scheduler.close()
+
+    latencies_ms.sort()
+    return {
+        "model_id": model_id.value,
+        "concurrency": concurrency,
+        "max_batch_size": max_batch_size,
+        "max_wait_ms": max_wait_ms,
+        "throughput_rps": round(total_requests / elapsed_s, 1),
+        "p50_ms": round(latencies_ms[len(latencies_ms) // 2], 3),
+        "p99_ms": round(latencies_ms[min(len(latencies_ms) - 1, int(len(latencies_ms) * 0.99))], 3),
+        "mean_batch_size": stats.mean_batch_size,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--max-batch-size", type=int, default=settings.batch_max_size)
+    parser.add_argument("--max-wait-ms", type=float, default=settings.batch_max_wait_ms)
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        type=ModelId,
+        default=list(BENCHMARK_MODEL_IDS),
+    )
+    parser.add_argument("--json", type=Path, default=None, help="Optional results file.")
+    args = parser.parse_args()
+
+    registry = build_registry(settings)
+    rows: list[dict[str, object]] = []
+    for model_id in args.models:
+        for concurrency in args.concurrency:
+            for max_batch_size, max_wait_ms in ((1, 0.0), (args.max_batch_size, args.max_wait_ms)):
+                rows.append(
+                    asyncio.run(
+                        _run_case(
+                            registry,
+                            model_id,
+                            concurrency,
+                            args.requests,
+                            max_batch_size,
+                            max_wait_ms,
+                        )
+                    )
+                )
+
+    headers = list(rows[0].keys())
+    print_table(headers, [[row[key] for key in headers] for row in rows])
+    write_json(args.json, {"torch_threads": torch.get_num_threads(), "results": rows})
+
+
+if __name__ == "__main__":
+    main()
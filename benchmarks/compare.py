@@ -0,0 +1,108 @@
+"""Flag regressions between two `benchmarks.suite` result files.
+
+    python -m benchmarks.compare bench/base.json bench/head.json --threshold 0.10
+
+Metrics ending in `_ms` are better when lower, metrics ending in `_rps` or
+`_per_s` are better when higher, and anything else is reported but never
+flagged. Exits with status 1 when any case regresses by more than the threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from benchmarks._common import print_table
+
+# Host fields that make timings incomparable when they differ.
+_COMPARABILITY_KEYS = ("cpu_model", "cpu_count", "torch", "torch_threads", "python")
+
+
+def _load(path: Path) -> dict[str, object]:
+    with path.open("r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def _direction(metric: str) -> int:
+    """+1 when higher is better, -1 when lower is better, 0 when not a timing metric."""
+    if metric.endswith("_ms"):
+        return -1
+    if metric.endswith(("_rps", "_per_s")):
+        return 1
+    return 0
+
+
+def compare(
+    base: dict[str, object],
+    head: dict[str, object],
+    threshold: float,
+) -> tuple[list[list[object]], int]:
+    """Return table rows for every shared case/metric and the number of regressions."""
+    base_cases = {result["name"]: result for result in base["results"]}
+    rows: list[list[object]] = []
+    regressions = 0
+    for result in head["results"]:
+        reference = base_cases.get(result["name"])
+        if reference is None:
+            continue
+        for metric, value in result["metrics"].items():
+            direction = _direction(metric)
+            baseline_value = reference["metrics"].get(metric)
+            if direction == 0 or not baseline_value:
+                continue
+            change = (value - baseline_value) / baseline_value
+            regressed = direction * change < -threshold
+            improved = direction * change > threshold
+            regressions += regressed
+            rows.append(
+                [
+                    result["name"],
+                    metric,
+                    baseline_value,
+                    value,
+                    f"{change:+.1%}",
+                    "REGRESSION" if regressed else "improved" if improved else "",
+                ]
+            )
+    return rows, regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base", type=Path)
+    parser.add_argument("head", type=Path)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Relative change treated as a regression (0.10 = 10%%).",
+    )
+    parser.add_argument("--only-flagged", action="store_true", help="Hide unchanged metrics.")
+    args = parser.parse_args()
+
+    base, head = _load(args.base), _load(args.head)
+    for key in _COMPARABILITY_KEYS:
+        base_value, head_value = base["metadata"].get(key), head["metadata"].get(key)
+        if base_value != head_value:
+            print(
+                f"warning: {key} differs ({base_value!r} vs {head_value!r}); "
+                "timings may not be comparable.",
+                file=sys.stderr,
+            )
+
+    rows, regressions = compare(base, head, args.threshold)
+    if args.only_flagged:
+        rows = [row for row in rows if row[-1]]
+    print_table(["case", "metric", "base", "head", "change", "flag"], rows)
+    print(
+        f"\n{regressions} regression(s) beyond {args.threshold:.0%} "
+        f"({base['metadata'].get('git_commit')} -> {head['metadata'].get('git_commit')})."
+    )
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""Total memory and throughput for 1..N worker processes: independent loads vs. pre-fork.
+
+    CHECKPOINTS_DIR=src/checkpoints python -m benchmarks.multiprocess --max-workers 4
+
+`independent` is `uvicorn --workers N`. Each worker imports torch, loads its own
+copy of every checkpoint and sizes its thread pool to all cores. `prefork` is
+`python -m webapp.serve --workers N`, where the parent loads once, forks, and
+partitions threads. Memory is measured after the load phase, over the whole
+process tree (Linux only):
+- `rss_mb` sums each process's RSS, so shared pages are counted once per process.
+- `pss_mb` splits shared pages between the processes that map them, so it gives
+  the real total.
+The servers need loadable checkpoints for `--model` (see `CHECKPOINTS_DIR`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from time import perf_counter
+
+from benchmarks._common import (
+    host_metadata,
+    multipart_body,
+    percentile,
+    print_table,
+    synthetic_image_bytes,
+    write_json,
+)
+from webapp.schemas.prediction import ModelId
+from webapp.serve import threads_per_worker
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _launch(mode: str, workers: int, port: int) -> subprocess.Popen:
+    if mode == "prefork":
+        command = ["-m", "webapp.serve", "--workers", str(workers), "--log-level", "warning"]
+        command += ["--host", "127.0.0.1", "--port", str(port)]
+    else:
+        command = ["-m", "uvicorn", "webapp.main:app", "--workers", str(workers)]
+        command += ["--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    return subprocess.Popen(
+        [sys.executable, *command],
+        cwd=REPO_ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def _wait_ready(process: subprocess.Popen, port: int, timeout_s: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode} during startup.")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError("Server did not become healthy in time.")
+
+
+def _process_tree(root_pid: int) -> list[int]:
+    children: dict[int, list[int]] = {}
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # The command name may contain spaces; fields after the closing paren are fixed.
+        parent_pid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(parent_pid, []).append(int(entry.name))
+    tree, frontier = [], [root_pid]
+    while frontier:
+        pid = frontier.pop()
+        tree.append(pid)
+        frontier.extend(children.get(pid, []))
+    return tree
+
+
+def _memory_mb(pids: list[int]) -> tuple[float, float]:
+    rss_kb = pss_kb = 0
+    for pid in pids:
+        try:
+            rollup = Path(f"/proc/{pid}/smaps_rollup").read_text()
+        except OSError:
+            continue
+        for line in rollup.splitlines():
+            if line.startswith("Rss:"):
+                rss_kb += int(line.split()[1])
+            elif line.startswith("Pss:"):
+                pss_kb += int(line.split()[1])
+    return rss_kb / 1024, pss_kb / 1024
+
+
+def _drive(
+    port: int,
+    bodies: list[tuple[bytes, str]],
+    concurrency: int,
+) -> tuple[float, list[float], int]:
+    pending = iter(bodies)
+    lock = threading.Lock()
+    latencies_ms: list[float] = []
+    failures = 0
+
+    def client() -> None:
+        nonlocal failures
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        while True:
+            with lock:
+                item = next(pending, None)
+            if item is None:
+                break
+            body, content_type = item
+            start = perf_counter()
+            connection.request(
+                "POST", "/api/v1/predict", body=body, headers={"Content-Type": content_type}
+            )
+            response = connection.getresponse()
+            response.read()
+            with lock:
+                latencies_ms.append((perf_counter() - start) * 1000)
+                failures += response.status != 200
+        connection.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return perf_counter() - start, latencies_ms, failures
+
+
+def _run_case(
+    mode: str,
+    workers: int,
+    bodies: list[tuple[bytes, str]],
+    warmup: int,
+    concurrency: int,
+) -> dict[str, object]:
+    port = _free_port()
+    process = _launch(mode, workers, port)
+    try:
+        _wait_ready(process, port)
+        _drive(port, bodies[:warmup], concurrency)
+        elapsed_s, latencies_ms, failures = _drive(port, bodies[warmup:], concurrency)
+        rss_mb, pss_mb = _memory_mb(_process_tree(process.pid))
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+
+    latencies_ms.sort()
+    return {
+        "mode": mode,
+        "workers": workers,
+        "threads_per_worker": threads_per_worker(workers) if mode == "prefork" else "all",
+        "throughput_rps": round(len(latencies_ms) / elapsed_s, 1),
+        "p50_ms": round(percentile(latencies_ms, 0.50), 3),
+        "p99_ms": round(percentile(latencies_ms, 0.99), 3),
+        "failures": failures,
+        "rss_mb": round(rss_mb, 1),
+        "pss_mb": round(pss_mb, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=("independent", "prefork"),
+        default=["independent", "prefork"],
+    )
+    parser.add_argument("--model", type=ModelId, default=ModelId.cnnv2)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--warmup", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--image-size", type=int, default=256)
+    parser.add_argument("--json", type=Path, default=None, help="Optional results file.")
+    args = parser.parse_args()
+    if not Path("/proc/self/smaps_rollup").exists():
+        sys.exit("This benchmark reads /proc/<pid>/smaps_rollup and needs Linux.")
+
+    # Distinct images per request so the per-worker prediction cache never answers.
+    bodies = [
+        multipart_body(
+            synthetic_image_bytes("JPEG", args.image_size, args.image_size, seed), args.model
+        )
+        for seed in range(args.warmup + args.requests)
+    ]
+    rows = [
+        _run_case(mode, workers, bodies, args.warmup, args.concurrency)
+        for workers in range(1, args.max_workers + 1)
+        for mode in args.modes
+    ]
+
+    headers = list(rows[0].keys())
+    print_table(headers, [[row[key] for key in headers] for row in rows])
+    write_json(args.json, {"metadata": host_metadata(), "results": rows})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Torch vs. NumPy backend for `baseline`: per-request latency and process cold start.
+
+    python -m benchmarks.numpy_backend --repeats 200 --cold-starts 3
+
+Per-request latency covers decode + forward + softmax for one upload. Cold
+start runs `benchmarks._cold_start` in fresh interpreters and reports import,
+load and first-prediction time plus peak RSS (Linux only).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from benchmarks._common import host_metadata, print_table, synthetic_image_bytes, write_json
+from tools.export_numpy import export_numpy_weights
+from webapp.core.config import settings
+from webapp.core.constants import MODEL_CHECKPOINT_FILENAMES
+from webapp.models.cnn import create_model
+from webapp.schemas.prediction import ModelId
+from webapp.services.batching import forward_probabilities
+from webapp.services.image_decode import decode_image_array
+from webapp.services.model_registry import ModelRegistry
+from webapp.services.numpy_backend import NumpyBaselineCNN, softmax
+from webapp.services.optimize import example_batch
+from webapp.services.preprocess import decode_image_fast
+
+_REPO_ROOT = Path(__file__).resolve().parents[1]
+_COLD_START_KEYS = ("process_ms", "import_ms", "load_ms", "first_predict_ms", "peak_rss_mb")
+
+
+def _baseline_model() -> nn.Module:
+    checkpoint_path = settings.checkpoints_dir / MODEL_CHECKPOINT_FILENAMES["baseline"]
+    if checkpoint_path.exists():
+        return ModelRegistry(settings).load_checkpoint(ModelId.baseline, checkpoint_path)
+    print(f"warning: {checkpoint_path} not found; using random weights.", file=sys.stderr)
+    return create_model(ModelId.baseline).eval()
+
+
+def _median_ms(function, repeats: int) -> float:
+    for _ in range(3):
+        function()
+    samples = []
+    for _ in range(repeats):
+        start = perf_counter()
+        function()
+        samples.append((perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def _request_rows(
+    torch_model: nn.Module, numpy_model: NumpyBaselineCNN, sizes: list[int], repeats: int
+) -> list[dict[str, object]]:
+    mean, std = settings.normalization_mean, settings.normalization_std
+    cpu = torch.device("cpu")
+    rows = []
+    for size in sizes:
+        image_bytes = synthetic_image_bytes("JPEG", size, size)
+        torch_ms = _median_ms(
+            lambda: forward_probabilities(
+                torch_model, decode_image_fast(image_bytes, mean, std), cpu
+            ),
+            repeats,
+        )
+        numpy_ms = _median_ms(
+            lambda: softmax(numpy_model(decode_image_array(image_bytes, mean, std))), repeats
+        )
+        rows.append(
+            {
+                "case": f"request_jpeg_{size}px",
+                "torch_ms": round(torch_ms, 3),
+                "numpy_ms": round(numpy_ms, 3),
+                "speedup": round(torch_ms / numpy_ms, 2),
+            }
+        )
+    return rows
+
+
+@torch.inference_mode()
+def _batch_rows(
+    torch_model: nn.Module, numpy_model: NumpyBaselineCNN, batch_sizes: list[int], repeats: int
+) -> list[dict[str, object]]:
+    rows = []
+    for batch_size in batch_sizes:
+        batch = example_batch(batch_size)
+        array = batch.numpy()
+        torch_ms = _median_ms(lambda: torch_model(batch), repeats)
+        numpy_ms = _median_ms(lambda: numpy_model(array), repeats)
+        rows.append(
+            {
+                "case": f"forward_batch_{batch_size}",
+                "torch_ms": round(torch_ms, 3),
+                "numpy_ms": round(numpy_ms, 3),
+                "speedup": round(torch_ms / numpy_ms, 2),
+            }
+        )
+    return rows
+
+
+def _cold_start(backend: str, checkpoint_path: Path, image_path: Path) -> dict[str, float]:
+    start = perf_counter()
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks._cold_start",
+            backend,
+            str(checkpoint_path),
+            str(image_path),
+        ],
+        cwd=_REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process_ms"] = (perf_counter() - start) * 1000
+    return result
+
+
+def _cold_start_rows(
+    torch_model: nn.Module, workdir: Path, npz_path: Path, runs: int
+) -> list[dict[str, object]]:
+    torch_path = workdir / "baseline.pth"
+    torch.save(torch_model.state_dict(), torch_path)
+    image_path = workdir / "request.jpg"
+    image_path.write_bytes(synthetic_image_bytes("JPEG", 256, 256))
+
+    rows = []
+    for backend, checkpoint_path in (("torch", torch_path), ("numpy", npz_path)):
+        samples = [_cold_start(backend, checkpoint_path, image_path) for _ in range(runs)]
+        rows.append(
+            {
+                "backend": backend,
+                **{
+                    key: round(statistics.median(sample[key] for sample in samples), 1)
+                    for key in _COLD_START_KEYS
+                },
+                "torch_imported": samples[0]["torch_imported"],
+            }
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--image-sizes", type=int, nargs="+", default=[32, 256])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--repeats", type=int, default=100)
+    parser.add_argument("--cold-starts", type=int, default=3)
+    parser.add_argument("--json", type=Path, default=None, help="Optional results file.")
+    args = parser.parse_args()
+
+    torch_model = _baseline_model()
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        npz_path = workdir / "baseline.npz"
+        max_difference = export_numpy_weights(torch_model, npz_path)
+        numpy_model = NumpyBaselineCNN.from_npz(npz_path)
+        print(f"max |logit difference| on a random batch of 64: {max_difference:.2e}\n")
+
+        latency_rows = _request_rows(torch_model, numpy_model, args.image_sizes, args.repeats)
+        latency_rows += _batch_rows(torch_model, numpy_model, args.batch_sizes, args.repeats)
+        print_table(list(latency_rows[0]), [list(row.values()) for row in latency_rows])
+        print()
+        cold_rows = _cold_start_rows(torch_model, workdir, npz_path, args.cold_starts)
+        print_table(list(cold_rows[0]), [list(row.values()) for row in cold_rows])
+
+    write_json(
+        args.json,
+        {
+            "metadata": host_metadata(),
+            "max_logit_difference": max_difference,
+            "latency": latency_rows,
+            "cold_start": cold_rows,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""CPU latency of eager vs. load-time optimized models across batch sizes.
+
+    python -m benchmarks.optimize --batch-sizes 1 8 64 --modes none fuse torchscript
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+from pathlib import Path
+from time import perf_counter
+
+import torch
+import torch.nn as nn
+
+from benchmarks._common import BENCHMARK_MODEL_IDS, build_registry, print_table, write_json
+from webapp.core.config import settings
+from webapp.schemas.prediction import ModelId
+from webapp.services.optimize import OptimizationMode, example_batch, optimize_model
+
+
+@torch.inference_mode()
+def _median_latency_ms(model: nn.Module, batch: torch.Tensor, repeats: int) -> float:
+    for _ in range(3):
+        model(batch)
+    samples = []
+    for _ in range(repeats):
+        start = perf_counter()
+        model(batch)
+        samples.append((perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument(
+        "--modes",
+        type=OptimizationMode,
+        nargs="+",
+        default=[OptimizationMode.none, OptimizationMode.fuse, OptimizationMode.torchscript],
+        help="`compile` is supported but takes tens of seconds to warm up.",
+    )
+    parser.add_argument("--channels-last", action="store_true", help="Also try channels_last.")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--models", nargs="+", type=ModelId, default=list(BENCHMARK_MODEL_IDS))
+    parser.add_argument("--json", type=Path, default=None, help="Optional results file.")
+    args = parser.parse_args()
+
+    registry = build_registry(settings)
+    layouts = (False, True) if args.channels_last else (False,)
+    rows: list[dict[str, object]] = []
+    for model_id in args.models:
+        eager = registry.get_model(model_id)
+        eager_ms: dict[int, float] = {}
+        for mode in args.modes:
+            for channels_last in layouts:
+                model = optimize_model(eager, mode, channels_last=channels_last)
+                for batch_size in args.batch_sizes:
+                    latency_ms = _median_latency_ms(model, example_batch(batch_size), args.repeats)
+                    if mode == OptimizationMode.none and not channels_last:
+                        eager_ms[batch_size] = latency_ms
+                    rows.append(
+                        {
+                            "model_id": model_id.value,
+                            "mode": mode.value,
+                            "channels_last": channels_last,
+                            "batch_size": batch_size,
+                            "latency_ms": round(latency_ms, 3),
+                            "per_image_ms": round(latency_ms / batch_size, 4),
+                            "speedup": round(eager_ms.get(batch_size, latency_ms) / latency_ms, 2),
+                        }
+                    )
+
+    headers = list(rows[0].keys())
+    print_table(headers, [[row[key] for key in headers] for row in rows])
+    write_json(args.json, {"torch_threads": torch.get_num_threads(), "results": rows})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Request-path cost of the prediction log: `/api/v1/predict` with the sink off and on.
+
+    python -m benchmarks.prediction_log
+    python -m benchmarks.prediction_log --requests 1000 --rounds 5 --submits 200000
+
+Both modes run in one app lifespan and send the same distinct 32x32 PNGs
+sequentially, so the prediction cache never answers. "on" swaps a started
+`PredictionLog` writing to a temporary directory into `app.state`. The modes
+alternate for `--rounds` rounds and the rows report every round's requests together,
+so drift in the host's speed affects both equally. A separate row times `submit`
+alone, which is all the log adds to a request.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+from collections.abc import Callable
+from pathlib import Path
+from time import perf_counter
+
+import torch
+
+# Each image is distinct anyway; keep the cache out of the timings regardless.
+os.environ.setdefault("PREDICTION_CACHE_SIZE", "0")
+os.environ.setdefault("HOT_RELOAD_INTERVAL_SECONDS", "0")
+
+from benchmarks._common import (  # noqa: E402
+    asgi_request,
+    build_registry,
+    host_metadata,
+    multipart_body,
+    percentile,
+    print_table,
+    synthetic_image_bytes,
+    write_json,
+)
+from webapp.core.config import settings  # noqa: E402
+from webapp.schemas.prediction import ModelId  # noqa: E402
+from webapp.services.prediction_log import PredictionLog, PredictionSource  # noqa: E402
+
+
+def _prediction_log(directory: Path) -> PredictionLog:
+    return PredictionLog(
+        directory,
+        buffer_records=settings.prediction_log_buffer_records,
+        flush_seconds=settings.prediction_log_flush_seconds,
+        segment_bytes=int(settings.prediction_log_segment_mb * 1024 * 1024),
+    )
+
+
+async def _requests(app: Callable, bodies: list[tuple[bytes, str]]) -> tuple[list[float], float]:
+    latencies_ms = []
+    start = perf_counter()
+    for body, content_type in bodies:
+        request_start = perf_counter()
+        status, _, _ = await asgi_request(
+            app, "POST", "/api/v1/predict", {"content-type": content_type}, body
+        )
+        if status != 200:
+            raise RuntimeError(f"/api/v1/predict answered {status}")
+        latencies_ms.append((perf_counter() - request_start) * 1000)
+    return latencies_ms, perf_counter() - start
+
+
+def _submit_us(directory: Path, submits: int) -> float:
+    """Mean microseconds per `submit`, with the writer thread draining as in the app."""
+    prediction_log = _prediction_log(directory)
+    probabilities = torch.softmax(torch.randn(10), dim=0)
+    prediction_log.start()
+    try:
+        start = perf_counter()
+        for item in range(submits):
+            prediction_log.submit(
+                request_id="00000000-0000-0000-0000-000000000000",
+                model_id=ModelId.cnnv2,
+                source=PredictionSource.predict,
+                probabilities=probabilities,
+                input_digest="00" * 20,
+                item=item,
+                decode_ms=1.0,
+                queue_ms=1.0,
+                forward_ms=1.0,
+                latency_ms=1.0,
+            )
+        elapsed = perf_counter() - start
+    finally:
+        prediction_log.stop()
+    return elapsed / submits * 1e6
+
+
+async def _run(args: argparse.Namespace, directory: Path) -> list[dict[str, object]]:
+    from webapp.main import app
+
+    bodies = [
+        multipart_body(
+            synthetic_image_bytes("PNG", 32, 32, seed),
+            args.model,
+            filename="bench.png",
+            content_type="image/png",
+        )
+        for seed in range(args.requests)
+    ]
+    app.state.preloaded_registry = build_registry(settings)
+    latencies_ms: dict[str, list[float]] = {"off": [], "on": []}
+    elapsed: dict[str, float] = {"off": 0.0, "on": 0.0}
+    async with app.router.lifespan_context(app):
+        served_log = app.state.prediction_log
+        prediction_log = _prediction_log(directory)
+        prediction_log.start()
+        try:
+            # Warm-up: first forwards and allocator growth stay out of both modes.
+            await _requests(app, bodies[:16])
+            for _ in range(args.rounds):
+                for mode in ("off", "on"):
+                    app.state.prediction_log = prediction_log if mode == "on" else None
+                    mode_latencies, mode_elapsed = await _requests(app, bodies)
+                    latencies_ms[mode] += mode_latencies
+                    elapsed[mode] += mode_elapsed
+        finally:
+            app.state.prediction_log = served_log
+            prediction_log.stop()
+        stats = prediction_log.stats()
+
+    rows = []
+    for mode, values in latencies_ms.items():
+        values = sorted(values)
+        rows.append(
+            {
+                "mode": mode,
+                "requests": len(values),
+                "req_per_s": round(len(values) / elapsed[mode], 1),
+                "p50_ms": round(statistics.median(values), 3),
+                "p95_ms": round(percentile(values, 0.95), 3),
+                "records": stats.records_written if mode == "on" else 0,
+                "dropped": stats.records_dropped if mode == "on" else 0,
+            }
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", type=ModelId, default=ModelId.cnnv2)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--submits", type=int, default=100_000)
+    parser.add_argument("--json", type=Path, default=None, help="Optional results file.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        rows = asyncio.run(_run(args, Path(temp_dir) / "requests"))
+        submit_us = _submit_us(Path(temp_dir) / "submit", args.submits)
+    print(f"{args.requests} requests x {args.rounds} rounds per mode, model {args.model.value}")
+    print_table(list(rows[0]), [list(row.values()) for row in rows])
+    print(f"submit: {submit_us:.2f} us per record over {args.submits:,} records")
+    write_json(
+        args.json,
+        {
+            "metadata": host_metadata(),
+            "requests": args.requests,
+            "rounds": args.rounds,
+            "model": args.model.value,
+            "results": rows,
+            "submit_us": submit_us,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
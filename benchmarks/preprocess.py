@@ -0,0 +1,112 @@
+"""Per-image latency and peak memory: `image_bytes_to_tensor` vs. `decode_image_fast`.
+
+    python -m benchmarks.preprocess --repeats 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import resource
+import statistics
+from collections.abc import Callable
+from pathlib import Path
+from time import perf_counter
+
+import torch
+
+from benchmarks._common import print_table, synthetic_image_bytes, write_json
+from webapp.core.constants import NORMALIZATION_MEAN, NORMALIZATION_STD
+from webapp.services.preprocess import (
+    FAST_PATH_TOLERANCE,
+    decode_image_fast,
+    image_bytes_to_tensor,
+)
+
+CASES = (
+    ("PNG", 32, 32),
+    ("PNG", 640, 480),
+    ("JPEG", 640, 480),
+    ("JPEG", 1920, 1080),
+    ("JPEG", 4000, 3000),
+)
+
+VARIANTS: dict[str, Callable[..., torch.Tensor]] = {
+    "legacy": image_bytes_to_tensor,
+    "fast": decode_image_fast,
+}
+
+
+def _median_latency_ms(fn: Callable[..., torch.Tensor], image_bytes: bytes, repeats: int) -> float:
+    fn(image_bytes, NORMALIZATION_MEAN, NORMALIZATION_STD)
+    samples = []
+    for _ in range(repeats):
+        start = perf_counter()
+        fn(image_bytes, NORMALIZATION_MEAN, NORMALIZATION_STD)
+        samples.append((perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def _current_and_peak_rss_kib() -> tuple[int, int]:
+    status = Path("/proc/self/status")
+    if not status.exists():
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak, peak
+    fields = dict(
+        line.split(":", 1) for line in status.read_text().splitlines() if ":" in line
+    )
+    return int(fields["VmRSS"].split()[0]), int(fields["VmHWM"].split()[0])
+
+
+def _peak_rss_growth_kib(variant: str, image_bytes: bytes) -> int:
+    # Runs in a fresh process. On Linux, writing "5" to clear_refs resets the
+    # VmHWM high-water mark so import-time spikes are not counted; elsewhere
+    # this falls back to ru_maxrss and only reports growth past that mark.
+    clear_refs = Path("/proc/self/clear_refs")
+    if clear_refs.exists():
+        clear_refs.write_text("5")
+    baseline, _ = _current_and_peak_rss_kib()
+    VARIANTS[variant](image_bytes, NORMALIZATION_MEAN, NORMALIZATION_STD)
+    _, peak = _current_and_peak_rss_kib()
+    return max(0, peak - baseline)
+
+
+def _measure_peak(variant: str, image_bytes: bytes) -> int:
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(_peak_rss_growth_kib, (variant, image_bytes))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--skip-memory", action="store_true", help="Skip per-process peak RSS.")
+    parser.add_argument("--json", type=Path, default=None, help="Optional results file.")
+    args = parser.parse_args()
+
+    rows: list[dict[str, object]] = []
+    for image_format, width, height in CASES:
+        image_bytes = synthetic_image_bytes(image_format, width, height)
+        reference = image_bytes_to_tensor(image_bytes, NORMALIZATION_MEAN, NORMALIZATION_STD)
+        fast = decode_image_fast(image_bytes, NORMALIZATION_MEAN, NORMALIZATION_STD)
+        max_abs_error = float((reference - fast).abs().max())
+        row: dict[str, object] = {
+            "case": f"{image_format} {width}x{height}",
+            "bytes": len(image_bytes),
+            "max_abs_error": f"{max_abs_error:.2e}",
+        }
+        for variant, fn in VARIANTS.items():
+            row[f"{variant}_ms"] = round(_median_latency_ms(fn, image_bytes, args.repeats), 3)
+            if not args.skip_memory:
+                row[f"{variant}_peak_kib"] = _measure_peak(variant, image_bytes)
+        row["speedup"] = round(float(row["legacy_ms"]) / max(float(row["fast_ms"]), 1e-9), 2)
+        rows.append(row)
+
+    headers = list(rows[0].keys())
+    print_table(headers, [[row[key] for key in headers] for row in rows])
+    print(f"Documented tolerance: max_abs_error <= {FAST_PATH_TOLERANCE}")
+    write_json(args.json, {"tolerance": FAST_PATH_TOLERANCE, "results": rows})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Query latency and memory of the `/api/v1/similar` index at CIFAR-10 training-set scale.
+
+    python -m benchmarks.similarity
+    python -m benchmarks.similarity --vectors 50000 --queries 1 8 64 --block-rows 4096 8192 50000
+
+Writes a synthetic index of `--vectors` L2-normalized 256-d rows (the size
+`tools.embeddings` produces for the 50,000 training images) with
+`write_index`, then for each storage dtype reports:
+
+- `file_mb`: the embedding matrix on disk, which is what the server maps.
+- `anon_mb`: growth of the process's anonymous (heap) RSS after mapping and
+  searching. Mapped pages are file-backed, shared between workers and
+  reclaimable, so they do not show up here; a copied matrix would.
+- search latency (`top_k_cosine`, embedding excluded) for each query batch size and
+  block size, against an in-heap float32 copy searched with one `[Q, D] @ [D, N]`
+  product as the reference.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import torch
+
+from benchmarks._common import host_metadata, percentile, print_table, write_json
+from webapp.services.similarity import (
+    EMBEDDINGS_FILENAME,
+    INDEX_DTYPES,
+    top_k_cosine,
+    write_index,
+)
+
+DIMENSIONS = 256
+
+
+def _anon_rss_mb() -> float | None:
+    try:
+        with open("/proc/self/status", encoding="utf-8") as handle:
+            for line in handle:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _latency_ms(search, repeats: int) -> tuple[float, float]:
+    search()  # fault the pages in and warm the allocator
+    samples = []
+    for _ in range(repeats):
+        start = perf_counter()
+        search()
+        samples.append((perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), percentile(samples, 0.95)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--block-rows", type=int, nargs="+", default=[2048, 8192, 50_000])
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=30)
+    parser.add_argument("--json", type=Path, default=None, help="Optional results file.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((args.vectors, DIMENSIONS), dtype=np.float32)
+    labels = rng.integers(0, 10, size=args.vectors, dtype=np.uint8)
+    queries = {
+        count: torch.nn.functional.normalize(torch.randn(count, DIMENSIONS), dim=1)
+        for count in args.queries
+    }
+
+    memory_rows = []
+    latency_rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for dtype in INDEX_DTYPES:
+            index_dir = Path(tmp) / dtype
+            write_index(
+                index_dir,
+                embeddings,
+                labels,
+                checkpoint_sha256="0" * 64,
+                mean=(0.5, 0.5, 0.5),
+                std=(0.5, 0.5, 0.5),
+                dtype=dtype,
+            )
+            anon_before = _anon_rss_mb()
+            mapped = np.load(index_dir / EMBEDDINGS_FILENAME, mmap_mode="r")
+            top_k_cosine(queries[args.queries[-1]], mapped, args.top_k)
+            anon_after = _anon_rss_mb()
+            memory_rows.append(
+                {
+                    "dtype": dtype,
+                    "vectors": args.vectors,
+                    "file_mb": round((index_dir / EMBEDDINGS_FILENAME).stat().st_size / 2**20, 2),
+                    "anon_mb": (
+                        round(anon_after - anon_before, 2)
+                        if anon_before is not None and anon_after is not None
+                        else None
+                    ),
+                }
+            )
+
+            for count, query in queries.items():
+                for block_rows in args.block_rows:
+                    p50, p95 = _latency_ms(
+                        lambda: top_k_cosine(query, mapped, args.top_k, block_rows),  # noqa: B023
+                        args.repeats,
+                    )
+                    latency_rows.append(
+                        {
+                            "dtype": dtype,
+                            "storage": "mmap",
+                            "queries": count,
+                            "block_rows": block_rows,
+                            "p50_ms": round(p50, 3),
+                            "p95_ms": round(p95, 3),
+                        }
+                    )
+            del mapped
+
+    heap = torch.nn.functional.normalize(torch.from_numpy(embeddings), dim=1)
+    for count, query in queries.items():
+
+        def full_product() -> None:
+            torch.topk(query @ heap.T, args.top_k, dim=1)  # noqa: B023
+
+        with torch.inference_mode():
+            p50, p95 = _latency_ms(full_product, args.repeats)
+        latency_rows.append(
+            {
+                "dtype": "float32",
+                "storage": "heap",
+                "queries": count,
+                "block_rows": args.vectors,
+                "p50_ms": round(p50, 3),
+                "p95_ms": round(p95, 3),
+            }
+        )
+
+    for section, rows in (("memory", memory_rows), ("latency", latency_rows)):
+        print(f"\n[{section}]")
+        print_table(list(rows[0]), [list(row.values()) for row in rows])
+    write_json(
+        args.json,
+        {"metadata": host_metadata(), "memory": memory_rows, "latency": latency_rows},
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Sustained frames per second and per-frame latency: `/api/v1/stream` vs. `/api/v1/predict`.
+
+    python -m benchmarks.streaming
+    python -m benchmarks.streaming --frames 600 --window 1 8 --camera-fps 30 --frame-size 320 240
+
+Every mode classifies the same synthetic frames (distinct images, so the
+prediction cache never answers) with `--model`:
+
+- http: one `/api/v1/predict` multipart request per frame, with `--http-concurrency`
+  requests in flight.
+- ws window N: one WebSocket session that keeps at most N frames unanswered.
+- ws flood: sends every frame without waiting. The session's pending limit drops
+  the oldest frames, so `fps` counts only answered frames.
+- ws camera: sends at `--camera-fps` without waiting, like a live feed.
+
+Latency runs from handing a frame to the app until its reply arrives. `fps` is
+answered frames per second of wall time. The app runs in process, so client and
+server share the CPU and no network time is included.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+from collections.abc import Callable
+from pathlib import Path
+from time import perf_counter
+
+# Each frame is distinct anyway; keep the cache out of the timings regardless.
+os.environ.setdefault("PREDICTION_CACHE_SIZE", "0")
+os.environ.setdefault("HOT_RELOAD_INTERVAL_SECONDS", "0")
+
+from benchmarks._common import (  # noqa: E402
+    asgi_request,
+    build_registry,
+    host_metadata,
+    multipart_body,
+    percentile,
+    print_table,
+    synthetic_image_bytes,
+    write_json,
+)
+from webapp.core.config import settings  # noqa: E402
+from webapp.schemas.prediction import ModelId  # noqa: E402
+
+
+def _row(
+    transport: str,
+    mode: str,
+    sent: int,
+    latencies_ms: list[float],
+    dropped: int,
+    elapsed: float,
+    mean_batch: float,
+) -> dict[str, object]:
+    latencies_ms = sorted(latencies_ms)
+    return {
+        "transport": transport,
+        "mode": mode,
+        "sent": sent,
+        "answered": len(latencies_ms),
+        "dropped": dropped,
+        "fps": round(len(latencies_ms) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies_ms), 2),
+        "p95_ms": round(percentile(latencies_ms, 0.95), 2),
+        "mean_batch": round(mean_batch, 2),
+    }
+
+
+async def _http(
+    app: Callable, frames: list[bytes], model_id: ModelId, concurrency: int
+) -> dict[str, object]:
+    bodies = [
+        multipart_body(frame, model_id, filename="frame.png", content_type="image/png")
+        for frame in frames
+    ]
+    pending = iter(bodies)
+    latencies_ms: list[float] = []
+
+    def batcher_totals() -> tuple[int, int]:
+        stats = app.state.batch_scheduler.stats().get(model_id)
+        return (stats.items, stats.batches) if stats is not None else (0, 0)
+
+    async def client() -> None:
+        for body, content_type in pending:
+            start = perf_counter()
+            status, _, _ = await asgi_request(
+                app, "POST", "/api/v1/predict", {"content-type": content_type}, body
+            )
+            if status != 200:
+                raise RuntimeError(f"/api/v1/predict answered {status}")
+            latencies_ms.append((perf_counter() - start) * 1000)
+
+    items_before, batches_before = batcher_totals()
+    start = perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = perf_counter() - start
+    items_after, batches_after = batcher_totals()
+    mean_batch = (items_after - items_before) / max(1, batches_after - batches_before)
+    mode = f"concurrency {concurrency}"
+    return _row("http", mode, len(frames), latencies_ms, 0, elapsed, mean_batch)
+
+
+async def _websocket(
+    app: Callable,
+    frames: list[bytes],
+    model_id: ModelId,
+    mode: str,
+    window: int | None = None,
+    fps: float | None = None,
+) -> dict[str, object]:
+    """One session; at most `window` frames unanswered, paced at `fps` when given."""
+    scope = {
+        "type": "websocket",
+        "asgi": {"version": "3.0"},
+        "scheme": "ws",
+        "path": "/api/v1/stream",
+        "raw_path": b"/api/v1/stream",
+        "root_path": "",
+        "query_string": f"model_id={model_id.value}".encode(),
+        "headers": [(b"host", b"benchmark")],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+        "subprotocols": [],
+    }
+    inbox: asyncio.Queue[dict[str, object]] = asyncio.Queue()
+    replies: asyncio.Queue[tuple[float, dict[str, object] | None]] = asyncio.Queue()
+    inbox.put_nowait({"type": "websocket.connect"})
+
+    async def send(message: dict[str, object]) -> None:
+        if message["type"] == "websocket.send":
+            replies.put_nowait((perf_counter(), json.loads(message["text"])))
+        elif message["type"] == "websocket.close":
+            replies.put_nowait((perf_counter(), None))
+
+    server = asyncio.create_task(app(scope, inbox.get, send))
+    _, ready = await replies.get()
+    if ready is None or ready["type"] != "ready":
+        raise RuntimeError(f"/api/v1/stream refused the session: {ready}")
+
+    sent_at: list[float] = []
+    latencies_ms: list[float] = []
+    batch_sizes: list[int] = []
+    dropped = 0
+
+    async def collect(count: int) -> None:
+        nonlocal dropped
+        for _ in range(count):
+            received_at, reply = await replies.get()
+            if reply is None:
+                raise RuntimeError("/api/v1/stream closed the session early.")
+            if reply["type"] == "prediction":
+                latencies_ms.append((received_at - sent_at[reply["seq"]]) * 1000)
+                batch_sizes.append(reply["batch_size"])
+            elif reply["type"] == "dropped":
+                dropped += 1
+            else:
+                raise RuntimeError(f"/api/v1/stream answered {reply}")
+
+    start = perf_counter()
+    for index, frame in enumerate(frames):
+        if fps is not None:
+            await asyncio.sleep(max(0.0, start + index / fps - perf_counter()))
+        if window is not None and index >= window:
+            await collect(1)
+        sent_at.append(perf_counter())
+        inbox.put_nowait({"type": "websocket.receive", "bytes": frame})
+        # Let the session read the frame before the next one, as a socket would.
+        await asyncio.sleep(0)
+    await collect(len(frames) - len(latencies_ms) - dropped)
+    elapsed = perf_counter() - start
+    inbox.put_nowait({"type": "websocket.disconnect", "code": 1000})
+    await server
+    mean_batch = float(statistics.mean(batch_sizes)) if batch_sizes else 0.0
+    return _row("ws", mode, len(frames), latencies_ms, dropped, elapsed, mean_batch)
+
+
+async def _run(args: argparse.Namespace) -> list[dict[str, object]]:
+    from webapp.main import app
+
+    width, height = args.frame_size
+    frames = [synthetic_image_bytes("PNG", width, height, seed) for seed in range(args.frames)]
+    app.state.preloaded_registry = build_registry(settings)
+    rows = []
+    async with app.router.lifespan_context(app):
+        # Warm-up: first forwards and allocator growth stay out of every mode.
+        await _http(app, frames[:8], args.model, 1)
+        for concurrency in args.http_concurrency:
+            rows.append(await _http(app, frames, args.model, concurrency))
+        for window in args.window:
+            rows.append(
+                await _websocket(app, frames, args.model, f"window {window}", window=window)
+            )
+        rows.append(await _websocket(app, frames, args.model, "flood"))
+        rows.append(
+            await _websocket(
+                app, frames, args.model, f"camera {args.camera_fps:g} fps", fps=args.camera_fps
+            )
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", type=ModelId, default=ModelId.cnnv2)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument(
+        "--frame-size", type=int, nargs=2, default=[32, 32], metavar=("WIDTH", "HEIGHT")
+    )
+    parser.add_argument("--http-concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--window", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--camera-fps", type=float, default=30.0)
+    parser.add_argument("--json", type=Path, default=None, help="Optional results file.")
+    args = parser.parse_args()
+
+    rows = asyncio.run(_run(args))
+    print(
+        f"{args.frames} frames of {args.frame_size[0]}x{args.frame_size[1]} PNG, "
+        f"model {args.model.value}, stream pending limit {settings.stream_max_pending_frames}"
+    )
+    print_table(list(rows[0]), [list(row.values()) for row in rows])
+    write_json(
+        args.json,
+        {
+            "metadata": host_metadata(),
+            "frames": args.frames,
+            "frame_size": args.frame_size,
+            "model": args.model.value,
+            "stream_max_pending_frames": settings.stream_max_pending_frames,
+            "results": rows,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
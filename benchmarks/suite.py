@@ -0,0 +1,297 @@
+"""Reproducible serving-stack benchmark suite with machine-readable results.
+
+    python -m benchmarks.suite --json bench/head.json
+    python -m benchmarks.compare bench/base.json bench/head.json
+
+Sections (select with `--sections`):
+- preprocess: `image_bytes_to_tensor` and `decode_image_fast` across image sizes and formats.
+- forward: raw `BaselineCNN` / `CNNV2` forward across batch sizes and torch thread counts.
+- e2e: `/api/v1/predict` throughput and latency percentiles at several concurrency
+  levels, driven in-process through the ASGI app (lifespan included, no sockets).
+"""
+
+from __future__ import annotations
+
+import os
+
+# A missing checkpoint must not abort the e2e section; fallback weights are registered below.
+os.environ.setdefault("MODEL_LOADING", "lazy")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import statistics  # noqa: E402
+from collections.abc import Callable  # noqa: E402
+from pathlib import Path  # noqa: E402
+from time import perf_counter  # noqa: E402
+
+import torch  # noqa: E402
+
+from benchmarks._common import (  # noqa: E402
+    BENCHMARK_MODEL_IDS,
+    build_registry,
+    host_metadata,
+    multipart_body,
+    percentile,
+    print_table,
+    synthetic_image_bytes,
+    write_json,
+)
+from webapp.core.config import settings  # noqa: E402
+from webapp.models.cnn import create_model  # noqa: E402
+from webapp.schemas.prediction import ModelId  # noqa: E402
+from webapp.services.optimize import example_batch  # noqa: E402
+from webapp.services.preprocess import decode_image_fast, image_bytes_to_tensor  # noqa: E402
+
+SCHEMA_VERSION = 1
+SECTIONS = ("preprocess", "forward", "e2e")
+
+
+def _result(suite: str, params: dict[str, object], metrics: dict[str, float]) -> dict[str, object]:
+    name = suite + ":" + ",".join(f"{key}={value}" for key, value in params.items())
+    return {"suite": suite, "name": name, "params": params, "metrics": metrics}
+
+
+def _latency_metrics(samples_ms: list[float]) -> dict[str, float]:
+    samples_ms = sorted(samples_ms)
+    return {
+        "median_ms": round(statistics.median(samples_ms), 4),
+        "p95_ms": round(percentile(samples_ms, 0.95), 4),
+    }
+
+
+def _time_calls(fn: Callable[[], object], repeats: int, warmup: int = 3) -> list[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        start = perf_counter()
+        fn()
+        samples.append((perf_counter() - start) * 1000)
+    return samples
+
+
+def run_preprocess(sizes: list[int], repeats: int) -> list[dict[str, object]]:
+    mean, std = settings.normalization_mean, settings.normalization_std
+    paths = {
+        "reference": lambda data: image_bytes_to_tensor(data, mean=mean, std=std),
+        "fast": lambda data: decode_image_fast(data, mean=mean, std=std),
+    }
+    results = []
+    for image_format in ("PNG", "JPEG"):
+        for size in sizes:
+            data = synthetic_image_bytes(image_format, size, size)
+            for path_name, decode in paths.items():
+                samples = _time_calls(lambda: decode(data), repeats)
+                params = {"path": path_name, "format": image_format, "size": size}
+                results.append(_result("preprocess", params, _latency_metrics(samples)))
+    return results
+
+
+@torch.inference_mode()
+def run_forward(
+    models: list[ModelId],
+    batch_sizes: list[int],
+    thread_counts: list[int],
+    repeats: int,
+) -> list[dict[str, object]]:
+    registry = build_registry(settings)
+    original_threads = torch.get_num_threads()
+    results = []
+    try:
+        for model_id in models:
+            model = registry.get_model(model_id)
+            for threads in thread_counts:
+                torch.set_num_threads(threads)
+                for batch_size in batch_sizes:
+                    batch = example_batch(batch_size)
+                    samples = _time_calls(lambda: model(batch), repeats)
+                    metrics = _latency_metrics(samples)
+                    metrics["images_per_s"] = round(batch_size * 1000 / metrics["median_ms"], 1)
+                    params = {"model_id": model_id.value, "threads": threads, "batch": batch_size}
+                    results.append(_result("forward", params, metrics))
+    finally:
+        torch.set_num_threads(original_threads)
+    return results
+
+
+async def _asgi_post(app: Callable, path: str, body: bytes, content_type: str) -> int:
+    """Send one HTTP request straight into the ASGI app and return its status code."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"benchmark"),
+            (b"content-type", content_type.encode()),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+    }
+    request_sent = False
+    disconnected = asyncio.Event()
+    status = 0
+
+    async def receive() -> dict[str, object]:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, object]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = int(message["status"])
+        elif message["type"] == "http.response.body" and not message.get("more_body", False):
+            disconnected.set()
+
+    await app(scope, receive, send)
+    return status
+
+
+async def _drive_e2e(
+    app: Callable,
+    bodies: list[tuple[bytes, str]],
+    concurrency: int,
+) -> tuple[float, list[float], int]:
+    pending = iter(bodies)
+    latencies_ms: list[float] = []
+    failures = 0
+
+    async def client() -> None:
+        nonlocal failures
+        for body, content_type in pending:
+            start = perf_counter()
+            status = await _asgi_post(app, "/api/v1/predict", body, content_type)
+            latencies_ms.append((perf_counter() - start) * 1000)
+            failures += status != 200
+
+    start = perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return perf_counter() - start, latencies_ms, failures
+
+
+async def _run_e2e(
+    models: list[ModelId],
+    concurrency_levels: list[int],
+    total_requests: int,
+    image_size: int,
+) -> list[dict[str, object]]:
+    from webapp.main import app
+
+    results = []
+    async with app.router.lifespan_context(app):
+        registry = app.state.model_registry
+        for model_id in models:
+            if not registry.is_available(model_id):
+                registry.register(model_id, create_model(model_id))
+        for model_id in models:
+            for concurrency in concurrency_levels:
+                # Distinct images per request so the prediction cache never answers.
+                seeds = range(total_requests + concurrency)
+                bodies = [
+                    multipart_body(
+                        synthetic_image_bytes("JPEG", image_size, image_size, seed), model_id
+                    )
+                    for seed in seeds
+                ]
+                await _drive_e2e(app, bodies[:concurrency], concurrency)
+                elapsed_s, latencies_ms, failures = await _drive_e2e(
+                    app, bodies[concurrency:], concurrency
+                )
+                latencies_ms.sort()
+                metrics = {
+                    "throughput_rps": round(total_requests / elapsed_s, 1),
+                    "p50_ms": round(percentile(latencies_ms, 0.50), 3),
+                    "p95_ms": round(percentile(latencies_ms, 0.95), 3),
+                    "p99_ms": round(percentile(latencies_ms, 0.99), 3),
+                    "failures": failures,
+                }
+                params = {
+                    "model_id": model_id.value,
+                    "concurrency": concurrency,
+                    "image_size": image_size,
+                }
+                results.append(_result("e2e", params, metrics))
+    return results
+
+
+def _print_results(results: list[dict[str, object]]) -> None:
+    for suite in SECTIONS:
+        rows = [result for result in results if result["suite"] == suite]
+        if not rows:
+            continue
+        print(f"\n[{suite}]")
+        headers = [*rows[0]["params"], *rows[0]["metrics"]]
+        print_table(
+            headers,
+            [[*row["params"].values(), *row["metrics"].values()] for row in rows],
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", nargs="+", choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument("--models", nargs="+", type=ModelId, default=list(BENCHMARK_MODEL_IDS))
+    parser.add_argument("--image-sizes", type=int, nargs="+", default=[32, 256, 1024, 3000])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument(
+        "--threads",
+        type=int,
+        nargs="+",
+        default=sorted({1, torch.get_num_threads()}),
+        help="torch intra-op thread counts for the forward section.",
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=256, help="Requests per e2e case.")
+    parser.add_argument("--e2e-image-size", type=int, default=256)
+    parser.add_argument("--repeats", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, default=Path("bench/suite.json"))
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    metadata = host_metadata()
+    results: list[dict[str, object]] = []
+    if "preprocess" in args.sections:
+        results += run_preprocess(args.image_sizes, args.repeats)
+    if "forward" in args.sections:
+        results += run_forward(args.models, args.batch_sizes, args.threads, args.repeats)
+    if "e2e" in args.sections:
+        results += asyncio.run(
+            _run_e2e(args.models, args.concurrency, args.requests, args.e2e_image_size)
+        )
+
+    _print_results(results)
+    write_json(
+        args.json,
+        {
+            "schema_version": SCHEMA_VERSION,
+            "metadata": metadata,
+            "config": {
+                "sections": args.sections,
+                "models": [model_id.value for model_id in args.models],
+                "image_sizes": args.image_sizes,
+                "batch_sizes": args.batch_sizes,
+                "threads": args.threads,
+                "concurrency": args.concurrency,
+                "requests": args.requests,
+                "e2e_image_size": args.e2e_image_size,
+                "repeats": args.repeats,
+                "seed": args.seed,
+            },
+            "results": results,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
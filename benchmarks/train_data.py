@@ -0,0 +1,146 @@
+"""Training epoch time: the notebook's per-sample PIL loader vs. the mmap'd batch pipeline.
+
+    python -m benchmarks.train_data --epochs 2 --model baseline
+
+The notebook loader is a `DataLoader(num_workers=0)` over a dataset doing what
+torchvision's `CIFAR10.__getitem__` does (`Image.fromarray` + transforms). Uses
+the store from `python -m tools.train_data` when present, otherwise a synthetic
+store of the same shape.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+from collections.abc import Iterable
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torchvision.transforms as transforms
+from PIL import Image
+from torch.utils.data import DataLoader, Dataset
+
+from benchmarks._common import host_metadata, print_table, write_json, write_synthetic_store
+from tools.train_data import (
+    DEFAULT_STORE_DIR,
+    STATS_FILENAME,
+    CIFAR10Batches,
+    open_store,
+    stratified_split,
+)
+from webapp.models.cnn import create_model
+from webapp.schemas.prediction import ModelId
+
+
+class _NotebookDataset(Dataset):
+    def __init__(self, images: np.ndarray, labels: np.ndarray, transform: transforms.Compose):
+        self.images = images
+        self.labels = labels
+        self.transform = transform
+
+    def __len__(self) -> int:
+        return len(self.images)
+
+    def __getitem__(self, index: int) -> tuple[torch.Tensor, int]:
+        return self.transform(Image.fromarray(self.images[index])), int(self.labels[index])
+
+
+def _epoch_seconds(
+    batches: Iterable[tuple[torch.Tensor, torch.Tensor]],
+    model: nn.Module | None,
+) -> tuple[float, int]:
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.01, momentum=0.9) if model else None
+    criterion = nn.CrossEntropyLoss()
+    samples = 0
+    start = perf_counter()
+    for images, labels in batches:
+        samples += len(labels)
+        if model is not None:
+            optimizer.zero_grad()
+            criterion(model(images), labels).backward()
+            optimizer.step()
+    return perf_counter() - start, samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--store-dir", type=Path, default=DEFAULT_STORE_DIR)
+    parser.add_argument("--synthetic-samples", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--epochs", type=int, default=2)
+    parser.add_argument(
+        "--model",
+        type=ModelId,
+        choices=[ModelId.baseline, ModelId.cnnv2],
+        default=None,
+        help="Also run a training step per batch, to show the loader's share of an epoch.",
+    )
+    parser.add_argument("--json", type=Path, default=None, help="Optional results file.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_dir, source = args.store_dir, str(args.store_dir)
+        if not (store_dir / STATS_FILENAME).exists():
+            store_dir, source = Path(tmp), "synthetic"
+            write_synthetic_store(store_dir, args.synthetic_samples)
+        store = open_store(store_dir)
+        images, labels, mean, std = store.train_images, store.train_labels, store.mean, store.std
+        train_idx, _ = stratified_split(labels, val_ratio=0.1, seed=42)
+
+        notebook_transform = transforms.Compose(
+            [
+                transforms.RandomCrop(32, padding=4),
+                transforms.RandomHorizontalFlip(),
+                transforms.ToTensor(),
+                transforms.Normalize(mean=list(mean), std=list(std)),
+            ]
+        )
+        loaders = {
+            "notebook_pil": DataLoader(
+                torch.utils.data.Subset(
+                    _NotebookDataset(images, labels, notebook_transform), train_idx
+                ),
+                batch_size=args.batch_size,
+                shuffle=True,
+                num_workers=0,
+                generator=torch.Generator().manual_seed(42),
+            ),
+            "mmap_batched": CIFAR10Batches(
+                images, labels, train_idx, args.batch_size, mean, std, augment=True, shuffle=True
+            ),
+        }
+
+        rows: list[dict[str, object]] = []
+        for name, loader in loaders.items():
+            model = create_model(args.model).train() if args.model else None
+            timings = []
+            for epoch in range(args.epochs):
+                if isinstance(loader, CIFAR10Batches):
+                    loader.set_epoch(epoch)
+                seconds, samples = _epoch_seconds(loader, model)
+                timings.append(seconds)
+            epoch_s = statistics.median(timings)
+            rows.append(
+                {
+                    "loader": name,
+                    "model": args.model.value if args.model else "none",
+                    "samples": samples,
+                    "epoch_s": round(epoch_s, 3),
+                    "images_per_s": round(samples / epoch_s, 1),
+                }
+            )
+        base = float(rows[0]["epoch_s"])
+        for row in rows:
+            row["speedup"] = round(base / float(row["epoch_s"]), 2)
+
+    print(f"data: {source}, torch threads: {torch.get_num_threads()}")
+    print_table(list(rows[0]), [list(row.values()) for row in rows])
+    write_json(args.json, {"metadata": host_metadata(), "source": source, "results": rows})
+
+
+if __name__ == "__main__":
+    main()
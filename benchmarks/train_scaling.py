@@ -0,0 +1,105 @@
+"""Training throughput of `tools.train` with 1, 2 and 4 gloo processes on this machine.
+
+    python -m benchmarks.train_scaling --processes 1 2 4 --model cnnv2
+
+Each run is a `torchrun --standalone` launch at the same global batch size, so
+the CPU's cores are split between processes. The first epoch is treated as
+warm-up, and the median training time of the remaining epochs is reported.
+Uses the store from `python -m tools.train_data` when present, otherwise a
+synthetic store.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks._common import host_metadata, print_table, write_json, write_synthetic_store
+from tools.train_data import DEFAULT_STORE_DIR, STATS_FILENAME
+
+
+def _run(processes: int, model: str, epochs: int, store_dir: Path, work_dir: Path) -> list[dict]:
+    history_path = work_dir / f"history_{processes}.json"
+    command = [
+        sys.executable,
+        "-m",
+        "torch.distributed.run",
+        "--standalone",
+        "--nproc-per-node",
+        str(processes),
+        "-m",
+        "tools.train",
+        "--model",
+        model,
+        "--epochs",
+        str(epochs),
+        "--patience",
+        str(epochs),
+        "--store-dir",
+        str(store_dir),
+        "--output-dir",
+        str(work_dir / f"run_{processes}"),
+        "--history-json",
+        str(history_path),
+    ]
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+    return json.loads(history_path.read_text(encoding="utf-8"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--model", choices=["baseline", "cnnv2"], default="baseline")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--store-dir", type=Path, default=DEFAULT_STORE_DIR)
+    parser.add_argument(
+        "--synthetic-samples",
+        type=int,
+        default=10_000,
+        help="Training-set size when the real store is missing.",
+    )
+    parser.add_argument("--json", type=Path, default=None, help="Optional results file.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        store_dir, source = args.store_dir, str(args.store_dir)
+        if not (store_dir / STATS_FILENAME).exists():
+            store_dir, source = work_dir / "store", "synthetic"
+            write_synthetic_store(store_dir, args.synthetic_samples)
+
+        rows: list[dict[str, object]] = []
+        for processes in args.processes:
+            history = _run(processes, args.model, args.epochs, store_dir, work_dir)
+            measured = history[1:] or history
+            train_s = statistics.median(float(epoch["train_s"]) for epoch in measured)
+            samples = int(measured[-1]["train_samples"])
+            rows.append(
+                {
+                    "processes": processes,
+                    "model": args.model,
+                    "samples": samples,
+                    "epoch_train_s": round(train_s, 3),
+                    "images_per_s": round(samples / train_s, 1),
+                    "final_val_acc": round(float(history[-1]["val_accuracy"]), 4),
+                }
+            )
+        base = rows[0]
+        for row in rows:
+            speedup = float(row["images_per_s"]) / float(base["images_per_s"])
+            row["speedup"] = round(speedup, 2)
+            row["efficiency"] = round(speedup * int(base["processes"]) / int(row["processes"]), 2)
+
+    print(f"data: {source}, cpus: {os.cpu_count()}")
+    print_table(list(rows[0]), [list(row.values()) for row in rows])
+    write_json(args.json, {"metadata": host_metadata(), "source": source, "results": rows})
+
+
+if __name__ == "__main__":
+    main()
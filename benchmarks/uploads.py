@@ -0,0 +1,143 @@
+"""Peak memory and bytes read while many oversized uploads hit `/api/v1/predict` at once.
+
+    python -m benchmarks.uploads --concurrency 32 --upload-mb 50
+    python -m benchmarks.uploads --without-limit   # same load with UploadLimitMiddleware removed
+
+Each client streams a multipart body in 64 KiB chunks into the ASGI app in
+process, either with a `Content-Length` header or chunked. Peak memory is the
+`tracemalloc` high-water mark of Python allocations during the run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tracemalloc
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+from time import perf_counter
+
+from benchmarks._common import (
+    host_metadata,
+    multipart_body,
+    print_table,
+    synthetic_image_bytes,
+    write_json,
+)
+from webapp.schemas.prediction import ModelId
+
+_CHUNK_BYTES = 64 * 1024
+
+
+async def _stream_upload(
+    app: Callable, body: bytes, content_type: str, declare_length: bool
+) -> tuple[int, int]:
+    """POST `body` in chunks; returns `(status, bytes the app actually pulled)`."""
+    headers = [(b"host", b"benchmark"), (b"content-type", content_type.encode())]
+    if declare_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/v1/predict",
+        "raw_path": b"/api/v1/predict",
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+    }
+    offset = 0
+    status = 0
+    finished = asyncio.Event()
+
+    async def receive() -> dict[str, object]:
+        nonlocal offset
+        if offset >= len(body):
+            await finished.wait()
+            return {"type": "http.disconnect"}
+        chunk = body[offset : offset + _CHUNK_BYTES]
+        offset += len(chunk)
+        await asyncio.sleep(0)  # interleave clients like a network would
+        return {"type": "http.request", "body": chunk, "more_body": offset < len(body)}
+
+    async def send(message: dict[str, object]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = int(message["status"])
+        elif message["type"] == "http.response.body" and not message.get("more_body", False):
+            finished.set()
+
+    await app(scope, receive, send)
+    return status, offset
+
+
+async def _run(concurrency: int, upload_mb: float, without_limit: bool) -> list[dict[str, object]]:
+    from webapp.main import app
+    from webapp.services.upload_limits import UploadLimitMiddleware
+
+    if without_limit:
+        app.user_middleware = [
+            middleware
+            for middleware in app.user_middleware
+            if middleware.cls is not UploadLimitMiddleware
+        ]
+        app.middleware_stack = None
+
+    # Valid JPEG header followed by padding: the decoder would accept the prefix.
+    image_bytes = synthetic_image_bytes("JPEG", 64, 64)
+    oversized = image_bytes + b"\0" * int(upload_mb * 1024 * 1024)
+    body, content_type = multipart_body(oversized, ModelId.baseline)
+
+    rows = []
+    async with app.router.lifespan_context(app):
+        for declare_length in (True, False):
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+            start = perf_counter()
+            results = await asyncio.gather(
+                *(
+                    _stream_upload(app, body, content_type, declare_length)
+                    for _ in range(concurrency)
+                )
+            )
+            elapsed = perf_counter() - start
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            statuses = Counter(status for status, _ in results)
+            rows.append(
+                {
+                    "limit": "off" if without_limit else "on",
+                    "content_length": declare_length,
+                    "concurrency": concurrency,
+                    "offered_mb": round(concurrency * len(body) / (1024 * 1024), 1),
+                    "read_mb": round(sum(read for _, read in results) / (1024 * 1024), 1),
+                    "peak_traced_mb": round(peak_bytes / (1024 * 1024), 1),
+                    "elapsed_s": round(elapsed, 3),
+                    "statuses": dict(sorted(statuses.items())),
+                }
+            )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--upload-mb", type=float, default=50.0)
+    parser.add_argument("--without-limit", action="store_true")
+    parser.add_argument("--json", type=Path, default=None, help="Optional results file.")
+    args = parser.parse_args()
+
+    rows = asyncio.run(_run(args.concurrency, args.upload_mb, args.without_limit))
+    headers = list(rows[0].keys())
+    print_table(headers, [[row[key] for key in headers] for row in rows])
+    write_json(args.json, {"metadata": host_metadata(), "results": rows})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Bytes on the wire and simulated slow-link latency for the demo page and its uploads.
+
+    python -m benchmarks.web_transfer
+    python -m benchmarks.web_transfer --uplink-kbps 675 --downlink-kbps 1440 --rtt-ms 563
+
+Sections:
+- assets: bytes and requests for `/`'s CSS/JS, `/api/v1/reports` and the confusion
+  matrices on a first visit without compression, a first visit accepting gzip/br,
+  and a repeat visit (fingerprinted URLs are not requested again; the rest
+  revalidate into 304s).
+- upload: `/api/v1/predict` sending the original photo vs. the page's 32x32 PNG.
+  The browser's canvas downscale is emulated with Pillow (stepwise halving,
+  then a bilinear resize to 32x32), and its time is counted as client time.
+
+The app runs in process. Link time is modelled rather than throttled:
+one round trip, plus the request bytes at the uplink rate, plus the response bytes at the
+downlink rate. The defaults are Chrome DevTools' "Fast 3G" preset.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import re
+import statistics
+from collections.abc import Callable
+from io import BytesIO
+from pathlib import Path
+from time import perf_counter
+
+# Each upload is distinct anyway; keep the cache out of the server timings regardless.
+os.environ.setdefault("PREDICTION_CACHE_SIZE", "0")
+os.environ.setdefault("HOT_RELOAD_INTERVAL_SECONDS", "0")
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from benchmarks._common import (  # noqa: E402
+    asgi_request,
+    build_registry,
+    host_metadata,
+    multipart_body,
+    print_table,
+    synthetic_image_bytes,
+    write_json,
+)
+from webapp.core.config import settings  # noqa: E402
+from webapp.core.constants import INPUT_IMAGE_SIZE  # noqa: E402
+from webapp.schemas.prediction import ModelId  # noqa: E402
+from webapp.services.image_decode import open_rgb_image, resize_to_input  # noqa: E402
+
+def _link_ms(sent: int, received: int, args: argparse.Namespace) -> float:
+    return args.rtt_ms + sent * 8 / args.uplink_kbps + received * 8 / args.downlink_kbps
+
+
+def _page_asset_paths() -> list[str]:
+    html = (settings.templates_dir / "index.html").read_text(encoding="utf-8")
+    return re.findall(r"asset_url\('([^']+)'\)", html)
+
+
+async def _assets(app: Callable, args: argparse.Namespace) -> list[dict[str, object]]:
+    from webapp.main import static_files
+
+    urls = [static_files.asset_url(path) for path in _page_asset_paths()]
+    _, _, reports_body = await asgi_request(app, "GET", "/api/v1/reports", {})
+    figures = re.findall(r'"url":"([^"]+)"', reports_body.decode())
+    urls += ["/api/v1/reports", *figures]
+
+    rows = []
+    held: dict[str, str] = {}
+    for visit, accept_encoding in (
+        ("first, identity", "identity"),
+        ("first, gzip/br", "gzip, br"),
+        ("repeat", "gzip, br"),
+    ):
+        requests = received = text_received = 0
+        for url in urls:
+            headers = {"accept-encoding": accept_encoding}
+            if visit == "repeat":
+                if "?v=" in url:
+                    continue  # still fresh in the browser cache: `immutable`
+                headers["if-none-match"] = held[url]
+            status, response_headers, body = await asgi_request(app, "GET", url, headers)
+            if status not in (200, 304):
+                raise RuntimeError(f"GET {url} answered {status}")
+            held[url] = response_headers["etag"]
+            requests += 1
+            received += len(body)
+            if not response_headers.get("content-type", "").startswith("image/"):
+                text_received += len(body)
+        rows.append(
+            {
+                "visit": visit,
+                "requests": requests,
+                "body_bytes": received,
+                "text_bytes": text_received,
+                # Browsers fetch in parallel; one round trip plus the bytes is the lower bound.
+                "link_ms": round(_link_ms(0, received, args) if requests else 0.0, 1),
+            }
+        )
+    return rows
+
+
+def client_downscale(image_bytes: bytes) -> bytes:
+    """Pillow stand-in for the page's canvas pipeline: halve in steps, resize, encode PNG."""
+    height, width = INPUT_IMAGE_SIZE
+    image = Image.open(BytesIO(image_bytes)).convert("RGB")
+    while image.width > 2 * width or image.height > 2 * height:
+        image = image.resize(
+            (max(width, -(-image.width // 2)), max(height, -(-image.height // 2))),
+            Image.Resampling.BILINEAR,
+        )
+    buffer = BytesIO()
+    image.resize((width, height), Image.Resampling.BILINEAR).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def _uploads(app: Callable, args: argparse.Namespace) -> list[dict[str, object]]:
+    rows = []
+    for size in args.photo_sizes:
+        width, height = size, size * 3 // 4
+        for variant in ("original", "32x32 png"):
+            client_ms: list[float] = []
+            server_ms: list[float] = []
+            sent_bytes: list[int] = []
+            received_bytes: list[int] = []
+            pixel_error: list[float] = []
+            for seed in range(args.repeats):
+                photo = synthetic_image_bytes("JPEG", width, height, seed)
+                upload, filename, content_type = photo, "photo.jpg", "image/jpeg"
+                if variant != "original":
+                    start = perf_counter()
+                    upload = client_downscale(photo)
+                    filename, content_type = "tile.png", "image/png"
+                    client_ms.append((perf_counter() - start) * 1000)
+                    # How far the browser-side resize lands from the server's own.
+                    served = np.asarray(resize_to_input(open_rgb_image(photo)), dtype=np.float32)
+                    sent_pixels = np.asarray(Image.open(BytesIO(upload)), dtype=np.float32)
+                    pixel_error.append(float(np.abs(served - sent_pixels).mean()))
+                body, multipart_type = multipart_body(
+                    upload, ModelId.baseline, filename=filename, content_type=content_type
+                )
+                start = perf_counter()
+                status, _, response = await asgi_request(
+                    app, "POST", "/api/v1/predict", {"content-type": multipart_type}, body
+                )
+                server_ms.append((perf_counter() - start) * 1000)
+                if status != 200:
+                    raise RuntimeError(f"/api/v1/predict answered {status} for {variant}")
+                sent_bytes.append(len(body))
+                received_bytes.append(len(response))
+            client_ms = client_ms or [0.0]
+            sent = statistics.median(sent_bytes)
+            link_ms = _link_ms(sent, statistics.median(received_bytes), args)
+            total_ms = statistics.median(client_ms) + statistics.median(server_ms) + link_ms
+            rows.append(
+                {
+                    "photo": f"{width}x{height}",
+                    "upload": variant,
+                    "request_bytes": int(sent),
+                    "client_ms": round(statistics.median(client_ms), 2),
+                    "server_ms": round(statistics.median(server_ms), 2),
+                    "link_ms": round(link_ms, 1),
+                    "total_ms": round(total_ms, 1),
+                    "mean_abs_pixel_diff": (
+                        round(statistics.mean(pixel_error), 2) if pixel_error else 0.0
+                    ),
+                }
+            )
+    return rows
+
+
+async def _run(args: argparse.Namespace) -> dict[str, list[dict[str, object]]]:
+    from webapp.main import app
+
+    app.state.preloaded_registry = build_registry(settings)
+    async with app.router.lifespan_context(app):
+        return {"assets": await _assets(app, args), "upload": await _uploads(app, args)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uplink-kbps", type=float, default=675.0)
+    parser.add_argument("--downlink-kbps", type=float, default=1440.0)
+    parser.add_argument("--rtt-ms", type=float, default=562.5)
+    parser.add_argument(
+        "--photo-sizes",
+        type=int,
+        nargs="+",
+        default=[640, 1600, 3000],
+        help="Photo widths; heights are 3/4 of them.",
+    )
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--json", type=Path, default=None, help="Optional results file.")
+    args = parser.parse_args()
+
+    results = asyncio.run(_run(args))
+    print(
+        f"link: {args.uplink_kbps:g} kbps up, {args.downlink_kbps:g} kbps down, "
+        f"{args.rtt_ms:g} ms RTT"
+    )
+    for section, rows in results.items():
+        print(f"\n[{section}]")
+        print_table(list(rows[0]), [list(row.values()) for row in rows])
+    write_json(
+        args.json,
+        {
+            "metadata": host_metadata(),
+            "link": {
+                "uplink_kbps": args.uplink_kbps,
+                "downlink_kbps": args.downlink_kbps,
+                "rtt_ms": args.rtt_ms,
+            },
+            **results,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Offline tooling that produces checkpoints and report artifacts (run with `python -m tools.<name>`)."""
@@ -0,0 +1,55 @@
+"""Tune torch threads, memory format and the batch cap for this host and save the profile.
+
+    python -m tools.autotune
+    AUTOTUNE_LATENCY_BUDGET_MS=25 python -m tools.autotune
+
+Loads the checkpoints the server would, benchmarks them as `AUTOTUNE=on`
+does on a first start (see `webapp.services.autotune`) and writes the profile
+to `AUTOTUNE_DIR`. Run it once per host type before `webapp.serve`, whose
+workers only apply an existing profile. Keep the environment (budget,
+`MODEL_OPTIMIZATION`, `MODEL_LOADING`) the same as the server's, or the
+profile will not match and the server retunes.
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from webapp.core.config import settings
+from webapp.core.constants import AUTOTUNE_REPEATS
+from webapp.services.autotune import available_cpus, profile_path, save_profile, tune
+from webapp.services.model_registry import ModelRegistry
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=AUTOTUNE_REPEATS)
+    args = parser.parse_args()
+
+    registry = ModelRegistry(settings)
+    registry.load_all()
+    profile = tune(registry, settings, repeats=args.repeats)
+    path = profile_path(settings)
+    save_profile(path, profile)
+
+    print(f"{profile.cpu_model}, {available_cpus()} CPUs, torch {profile.torch_version}")
+    print(f"models: {', '.join(model_id.value for model_id in profile.models)}")
+    print("threads  channels_last  forward_ms (batch of 8, summed over models)")
+    for candidate in profile.candidates:
+        print(
+            f"{candidate.intra_op_threads:>7}  {str(candidate.channels_last):>13}  "
+            f"{candidate.forward_ms:>10.3f}"
+        )
+    print("batch  slowest_forward_ms")
+    for batch_size, forward_ms in profile.batch_forward_ms.items():
+        print(f"{batch_size:>5}  {forward_ms:>18.3f}")
+    print(
+        f"Chose {profile.intra_op_threads} intra-op / {profile.interop_threads} inter-op threads, "
+        f"channels_last={profile.channels_last}, batch cap {profile.batch_max_size} "
+        f"(budget {profile.latency_budget_ms:g} ms) in {profile.tuning_ms / 1000:.1f} s; "
+        f"wrote {path}"
+    )
+
+
+if __name__ == "__main__":
+    main()
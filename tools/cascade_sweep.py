@@ -0,0 +1,190 @@
+"""Sweep the `model_id=auto` escalation threshold and report accuracy vs. average compute.
+
+    python -m tools.cascade_sweep --max-accuracy-drop 0.005
+
+Both cascade models are evaluated once on the CIFAR-10 test split. Every
+threshold is then scored from the cached probabilities:
+- accuracy of the cascade's answers
+- share of images escalated to the second model
+- average MACs and batch-1 CPU latency per image (first model always, second when escalated)
+
+Confidence and margin thresholds are swept separately. The curve is written to
+`src/reports/cascade_sweep.json` / `cascade_sweep.csv`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from tools.cifar import (
+    DEFAULT_DATA_ROOT,
+    checkpoint_normalization,
+    iter_batches,
+    load_cifar10_arrays,
+)
+from tools.reporting import count_macs, single_image_latency_ms
+from webapp.core.config import settings
+from webapp.core.constants import MODEL_CHECKPOINT_FILENAMES
+from webapp.schemas.prediction import ModelId
+from webapp.services.cascade import CascadePolicy, escalation_mask
+from webapp.services.model_registry import ModelRegistry
+
+SWEEP_JSON = "cascade_sweep.json"
+SWEEP_CSV = "cascade_sweep.csv"
+
+
+@torch.inference_mode()
+def test_probabilities(
+    model: nn.Module,
+    images: np.ndarray,
+    labels: np.ndarray,
+    mean: tuple[float, float, float],
+    std: tuple[float, float, float],
+    batch_size: int,
+) -> torch.Tensor:
+    return torch.cat(
+        [
+            torch.softmax(model(batch), dim=1)
+            for batch, _ in iter_batches(images, labels, batch_size, mean, std)
+        ]
+    )
+
+
+def sweep(
+    first: torch.Tensor,
+    second: torch.Tensor,
+    labels: np.ndarray,
+    costs: dict[str, tuple[float, float]],
+    thresholds: list[float],
+) -> list[dict[str, object]]:
+    """One row per (criterion, threshold); `costs` maps "macs"/"latency_ms" to (first, second)."""
+    targets = torch.from_numpy(labels)
+    first_correct = first.argmax(dim=1) == targets
+    second_correct = second.argmax(dim=1) == targets
+    rows = []
+    for criterion in ("confidence", "margin"):
+        for threshold in thresholds:
+            min_confidence = threshold if criterion == "confidence" else 0.0
+            min_margin = threshold if criterion == "margin" else 0.0
+            escalated = escalation_mask(first, min_confidence, min_margin)
+            rate = float(escalated.float().mean())
+            correct = torch.where(escalated, second_correct, first_correct)
+            row: dict[str, object] = {
+                "criterion": criterion,
+                "threshold": round(threshold, 4),
+                "escalation_rate": rate,
+                "accuracy": float(correct.float().mean()),
+            }
+            for name, (first_cost, second_cost) in costs.items():
+                row[f"avg_{name}"] = first_cost + rate * second_cost
+                row[f"{name}_vs_second_only"] = (first_cost + rate * second_cost) / second_cost
+            rows.append(row)
+    return rows
+
+
+def recommend(
+    rows: list[dict[str, object]], second_accuracy: float, max_accuracy_drop: float
+) -> dict[str, object] | None:
+    """Cheapest swept setting within `max_accuracy_drop` of always using the second model."""
+    floor = second_accuracy - max_accuracy_drop
+    eligible = [row for row in rows if float(row["accuracy"]) >= floor]
+    return min(eligible, key=lambda row: float(row["avg_macs"])) if eligible else None
+
+
+def write_sweep(reports_dir: Path, payload: dict[str, object]) -> None:
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    (reports_dir / SWEEP_JSON).write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    rows = payload["curve"]
+    with (reports_dir / SWEEP_CSV).open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-root", type=Path, default=DEFAULT_DATA_ROOT)
+    parser.add_argument("--checkpoints-dir", type=Path, default=settings.checkpoints_dir)
+    parser.add_argument("--reports-dir", type=Path, default=settings.reports_dir)
+    parser.add_argument("--eval-batch-size", type=int, default=500)
+    parser.add_argument("--steps", type=int, default=20, help="Thresholds in [0, 1] per criterion.")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.005)
+    parser.add_argument("--no-report", action="store_true", help="Only print the curve.")
+    args = parser.parse_args()
+
+    policy = CascadePolicy.from_settings(settings)
+    test_images, test_labels = load_cifar10_arrays(args.data_root, train=False)
+    registry = ModelRegistry(settings)
+
+    probabilities: dict[ModelId, torch.Tensor] = {}
+    costs_by_model: dict[ModelId, tuple[float, float]] = {}
+    for model_id in (policy.first, policy.second):
+        checkpoint_path = args.checkpoints_dir / MODEL_CHECKPOINT_FILENAMES[model_id.value]
+        mean, std = checkpoint_normalization(checkpoint_path, settings)
+        model = registry.load_checkpoint(model_id, checkpoint_path)
+        probabilities[model_id] = test_probabilities(
+            model, test_images, test_labels, mean, std, args.eval_batch_size
+        )
+        costs_by_model[model_id] = (float(count_macs(model)), single_image_latency_ms(model))
+
+    first_costs, second_costs = costs_by_model[policy.first], costs_by_model[policy.second]
+    costs = {
+        "macs": (first_costs[0], second_costs[0]),
+        "latency_ms": (first_costs[1], second_costs[1]),
+    }
+    thresholds = [step / args.steps for step in range(args.steps + 1)]
+    curve = sweep(
+        probabilities[policy.first], probabilities[policy.second], test_labels, costs, thresholds
+    )
+    accuracies = {
+        model_id.value: float(
+            (probs.argmax(dim=1) == torch.from_numpy(test_labels)).float().mean()
+        )
+        for model_id, probs in probabilities.items()
+    }
+    recommended = recommend(curve, accuracies[policy.second.value], args.max_accuracy_drop)
+
+    print(f"{'criterion':<10} {'thr':>5} {'escalated':>9} {'accuracy':>8} {'MACs vs 2nd':>11}")
+    for row in curve:
+        print(
+            f"{row['criterion']:<10} {row['threshold']:>5.2f} {row['escalation_rate']:>9.3f} "
+            f"{row['accuracy']:>8.4f} {row['macs_vs_second_only']:>11.3f}"
+        )
+    if recommended is None:
+        print(f"No threshold stays within {args.max_accuracy_drop:.3f} of {policy.second.value}.")
+    else:
+        env_name = f"CASCADE_MIN_{str(recommended['criterion']).upper()}"
+        print(
+            f"Recommended: {env_name}={recommended['threshold']} "
+            f"(accuracy {recommended['accuracy']:.4f}, "
+            f"{recommended['macs_vs_second_only']:.1%} of {policy.second.value}'s MACs)"
+        )
+
+    if not args.no_report:
+        write_sweep(
+            args.reports_dir,
+            {
+                "models": [policy.first.value, policy.second.value],
+                "accuracy": accuracies,
+                "macs": {model_id.value: macs for model_id, (macs, _) in costs_by_model.items()},
+                "latency_ms": {
+                    model_id.value: latency_ms
+                    for model_id, (_, latency_ms) in costs_by_model.items()
+                },
+                "max_accuracy_drop": args.max_accuracy_drop,
+                "recommended": recommended,
+                "curve": curve,
+            },
+        )
+        print(f"Wrote {args.reports_dir / SWEEP_JSON}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""CIFAR-10 loading helpers shared by the offline tools."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+import torch
+import torchvision
+
+from webapp.core.config import Settings
+
+DEFAULT_DATA_ROOT = Path(__file__).resolve().parents[1] / "data"
+
+
+def load_cifar10_arrays(root: Path, train: bool) -> tuple[np.ndarray, np.ndarray]:
+    """Return `(images [N, 32, 32, 3] uint8, labels [N] int64)`, downloading if needed."""
+    dataset = torchvision.datasets.CIFAR10(root=str(root), train=train, download=True)
+    return dataset.data, np.asarray(dataset.targets, dtype=np.int64)
+
+
+def checkpoint_normalization(
+    checkpoint_path: Path,
+    settings: Settings,
+) -> tuple[tuple[float, float, float], tuple[float, float, float]]:
+    """Mean/std the checkpoint was trained with, falling back to the serving defaults."""
+    checkpoint_obj = torch.load(checkpoint_path, map_location="cpu", weights_only=True)
+    if isinstance(checkpoint_obj, dict):
+        mean, std = checkpoint_obj.get("mean"), checkpoint_obj.get("std")
+        if isinstance(mean, list | tuple) and isinstance(std, list | tuple):
+            return tuple(float(v) for v in mean), tuple(float(v) for v in std)  # type: ignore[return-value]
+    return settings.normalization_mean, settings.normalization_std
+
+
+def normalize_batch(
+    images: np.ndarray,
+    mean: tuple[float, float, float],
+    std: tuple[float, float, float],
+) -> torch.Tensor:
+    """Vectorized ToTensor + Normalize for a `[N, H, W, 3]` uint8 array."""
+    batch = torch.from_numpy(np.ascontiguousarray(images)).permute(0, 3, 1, 2).float()
+    mean_t = torch.tensor(mean).view(1, 3, 1, 1) * 255.0
+    std_t = torch.tensor(std).view(1, 3, 1, 1) * 255.0
+    return batch.sub_(mean_t).div_(std_t).contiguous()
+
+
+def iter_batches(
+    images: np.ndarray,
+    labels: np.ndarray,
+    batch_size: int,
+    mean: tuple[float, float, float],
+    std: tuple[float, float, float],
+) -> Iterator[tuple[torch.Tensor, np.ndarray]]:
+    for start in range(0, len(images), batch_size):
+        stop = start + batch_size
+        yield normalize_batch(images[start:stop], mean, std), labels[start:stop]
+
+
+def stratified_indices(labels: np.ndarray, per_class: int, seed: int) -> np.ndarray:
+    """Deterministic class-balanced sample of `per_class` indices per label."""
+    rng = np.random.default_rng(seed)
+    picks = [
+        rng.choice(np.flatnonzero(labels == label), size=per_class, replace=False)
+        for label in np.unique(labels)
+    ]
+    return np.sort(np.concatenate(picks))
@@ -0,0 +1,95 @@
+"""Precompute `CNNV2.embed` vectors of the CIFAR-10 training set for `/api/v1/similar`.
+
+    python -m tools.embeddings
+    python -m tools.embeddings --dtype float32 --embeddings-dir candidate/embeddings
+
+All 50,000 training images are embedded in batches with the checkpoint's own
+normalization. The L2-normalized vectors, their labels and the checkpoint hash
+are written to `EMBEDDINGS_DIR` (see `webapp.services.similarity`). The
+server only loads an index whose hash matches its current `best_cnnv2.pth`,
+so rerun this after publishing a new checkpoint.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import torch
+
+from tools.cifar import (
+    DEFAULT_DATA_ROOT,
+    checkpoint_normalization,
+    load_cifar10_arrays,
+    normalize_batch,
+)
+from tools.evaluate import available_cpus
+from tools.train_data import DEFAULT_STORE_DIR, STATS_FILENAME, open_store
+from webapp.core.config import settings
+from webapp.core.constants import EMBEDDING_MODEL_ID, MODEL_CHECKPOINT_FILENAMES
+from webapp.schemas.prediction import ModelId
+from webapp.services.model_registry import ModelRegistry, file_sha256
+from webapp.services.similarity import INDEX_DTYPES, embed_batch, write_index
+
+
+def load_train_split(data_root: Path, store_dir: Path) -> tuple[np.ndarray, np.ndarray]:
+    """Training images and labels, memory-mapped from the `tools.train_data` store when built."""
+    if (store_dir / STATS_FILENAME).exists():
+        store = open_store(store_dir)
+        return store.train_images, store.train_labels
+    return load_cifar10_arrays(data_root, train=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-root", type=Path, default=DEFAULT_DATA_ROOT)
+    parser.add_argument("--store-dir", type=Path, default=DEFAULT_STORE_DIR)
+    parser.add_argument("--checkpoints-dir", type=Path, default=settings.checkpoints_dir)
+    parser.add_argument("--embeddings-dir", type=Path, default=settings.embeddings_dir)
+    parser.add_argument("--dtype", choices=INDEX_DTYPES, default="float16")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    torch.set_num_threads(available_cpus())
+    checkpoint_path = args.checkpoints_dir / MODEL_CHECKPOINT_FILENAMES[EMBEDDING_MODEL_ID]
+    checkpoint_sha256 = file_sha256(checkpoint_path)
+    mean, std = checkpoint_normalization(checkpoint_path, settings)
+    model = ModelRegistry(settings).load_checkpoint(ModelId(EMBEDDING_MODEL_ID), checkpoint_path)
+    images, labels = load_train_split(args.data_root, args.store_dir)
+
+    start = perf_counter()
+    embeddings = np.concatenate(
+        [
+            embed_batch(
+                model,
+                # Copies the uint8 slice out of a read-only memory map.
+                normalize_batch(np.array(images[offset : offset + args.batch_size]), mean, std),
+            ).numpy()
+            for offset in range(0, len(images), args.batch_size)
+        ]
+    )
+    elapsed = perf_counter() - start
+    if file_sha256(checkpoint_path) != checkpoint_sha256:
+        raise SystemExit(f"{checkpoint_path} changed while embedding; rerun.")
+
+    write_index(
+        args.embeddings_dir,
+        embeddings,
+        labels,
+        checkpoint_sha256=checkpoint_sha256,
+        mean=mean,
+        std=std,
+        dtype=args.dtype,
+    )
+    size_mb = len(embeddings) * embeddings.shape[1] * np.dtype(args.dtype).itemsize / 2**20
+    print(
+        f"Embedded {len(embeddings):,} images in {elapsed:.1f} s "
+        f"({len(embeddings) / elapsed:.0f} img/s); wrote {embeddings.shape[1]}-d {args.dtype} "
+        f"vectors ({size_mb:.1f} MB) to {args.embeddings_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Evaluate checkpoints on the CIFAR-10 test split and regenerate `src/reports/`.
+
+    python -m tools.evaluate
+    python -m tools.evaluate --models cnnv2 --checkpoints-dir candidate/ \
+        --max-accuracy-drop 0.005 --no-report
+
+For each model in `MODEL_CHECKPOINT_FILENAMES` whose checkpoint exists, the
+test split is classified in large batches by a pool of forked worker
+processes that share the loaded weights. Accuracy, macro P/R/F1, test-set
+throughput and batch-1 latency are upserted into `results.json` /
+`results.csv`, and `figures/confusion_matrix_<model>.png` is redrawn.
+
+Exits with status 1 when a model's accuracy is below `--min-accuracy`, or
+more than `--max-accuracy-drop` below its current `results.json` row.
+Deployments can be gated on the exit status.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from tools.cifar import (
+    DEFAULT_DATA_ROOT,
+    checkpoint_normalization,
+    load_cifar10_arrays,
+    normalize_batch,
+)
+from tools.reporting import (
+    CONFUSION_MATRIX_FIGURE,
+    RESULTS_JSON,
+    classification_metrics,
+    confusion_matrix,
+    merge_results,
+    render_confusion_matrix,
+    single_image_latency_ms,
+)
+from tools.train_data import DEFAULT_STORE_DIR, STATS_FILENAME, open_store
+from webapp.core.config import settings
+from webapp.core.constants import CIFAR10_CLASSES, MODEL_CHECKPOINT_FILENAMES
+from webapp.schemas.prediction import ModelId
+from webapp.services.model_registry import ModelRegistry
+
+# Read by forked workers; set in the parent before the pool starts so the
+# children inherit the model and images without pickling them.
+_WORKER_INPUTS: dict[str, object] = {}
+
+
+def available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def load_test_split(data_root: Path, store_dir: Path) -> tuple[np.ndarray, np.ndarray]:
+    """Test images and labels, memory-mapped from the `tools.train_data` store when built."""
+    if (store_dir / STATS_FILENAME).exists():
+        store = open_store(store_dir)
+        return store.test_images, store.test_labels
+    return load_cifar10_arrays(data_root, train=False)
+
+
+def _init_worker(threads: int) -> None:
+    torch.set_num_threads(threads)
+
+
+@torch.inference_mode()
+def _predict_range(bounds: tuple[int, int]) -> np.ndarray:
+    start, stop = bounds
+    model: nn.Module = _WORKER_INPUTS["model"]  # type: ignore[assignment]
+    images = normalize_batch(
+        # Copies the uint8 slice out of a read-only memory map; a quarter of the float batch.
+        np.array(_WORKER_INPUTS["images"][start:stop]),  # type: ignore[index]
+        _WORKER_INPUTS["mean"],  # type: ignore[arg-type]
+        _WORKER_INPUTS["std"],  # type: ignore[arg-type]
+    )
+    return model(images).argmax(dim=1).numpy()
+
+
+def predict_labels(
+    model: nn.Module,
+    images: np.ndarray,
+    mean: tuple[float, float, float],
+    std: tuple[float, float, float],
+    batch_size: int,
+    workers: int,
+) -> np.ndarray:
+    """Top-1 class per image, with batches spread over `workers` forked processes."""
+    _WORKER_INPUTS.update(model=model, images=images, mean=mean, std=std)
+    bounds = [(start, start + batch_size) for start in range(0, len(images), batch_size)]
+    try:
+        if workers <= 1:
+            return np.concatenate([_predict_range(chunk) for chunk in bounds])
+        threads = max(1, available_cpus() // workers)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_worker,
+            initargs=(threads,),
+        ) as pool:
+            return np.concatenate(list(pool.map(_predict_range, bounds)))
+    finally:
+        _WORKER_INPUTS.clear()
+
+
+def _checkpoint_class_names(checkpoint_path: Path) -> list[str]:
+    checkpoint_obj = torch.load(checkpoint_path, map_location="cpu", weights_only=True)
+    if isinstance(checkpoint_obj, dict):
+        names = checkpoint_obj.get("class_names")
+        if isinstance(names, list | tuple) and len(names) == len(CIFAR10_CLASSES):
+            return [str(name) for name in names]
+    return list(CIFAR10_CLASSES)
+
+
+def _reported_accuracy(reports_dir: Path) -> dict[str, float]:
+    try:
+        rows = json.loads((reports_dir / RESULTS_JSON).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return {
+        str(row["model"]): float(row["test_accuracy"])
+        for row in rows
+        if isinstance(row, dict) and isinstance(row.get("test_accuracy"), int | float)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        type=ModelId,
+        choices=[ModelId(model_id) for model_id in MODEL_CHECKPOINT_FILENAMES],
+        default=None,
+        help="Defaults to every model whose checkpoint exists.",
+    )
+    parser.add_argument("--data-root", type=Path, default=DEFAULT_DATA_ROOT)
+    parser.add_argument("--store-dir", type=Path, default=DEFAULT_STORE_DIR)
+    parser.add_argument("--checkpoints-dir", type=Path, default=settings.checkpoints_dir)
+    parser.add_argument("--reports-dir", type=Path, default=settings.reports_dir)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=available_cpus(),
+        help="Forked evaluation processes (default: available CPUs).",
+    )
+    parser.add_argument("--min-accuracy", type=float, default=None)
+    parser.add_argument(
+        "--max-accuracy-drop",
+        type=float,
+        default=None,
+        help="Fail when accuracy falls this far below the model's results.json row.",
+    )
+    parser.add_argument("--no-report", action="store_true", help="Skip results and figures.")
+    args = parser.parse_args()
+
+    # As in webapp.serve: keep the parent's OpenMP pool unstarted until the workers fork.
+    torch.set_num_threads(1 if args.workers > 1 else available_cpus())
+    images, labels = load_test_split(args.data_root, args.store_dir)
+    reported = _reported_accuracy(args.reports_dir)
+    model_ids = args.models or [
+        ModelId(model_id)
+        for model_id, filename in MODEL_CHECKPOINT_FILENAMES.items()
+        if (args.checkpoints_dir / filename).exists()
+    ]
+    if not model_ids:
+        raise SystemExit(f"No checkpoints found in {args.checkpoints_dir}.")
+
+    registry = ModelRegistry(settings)
+    models: dict[ModelId, nn.Module] = {}
+    rows: list[dict[str, object]] = []
+    failures: list[str] = []
+    for model_id in model_ids:
+        checkpoint_path = args.checkpoints_dir / MODEL_CHECKPOINT_FILENAMES[model_id.value]
+        mean, std = checkpoint_normalization(checkpoint_path, settings)
+        models[model_id] = model = registry.load_checkpoint(model_id, checkpoint_path)
+
+        start = perf_counter()
+        predictions = predict_labels(model, images, mean, std, args.batch_size, args.workers)
+        elapsed = perf_counter() - start
+        metrics = classification_metrics(labels, predictions, len(CIFAR10_CLASSES))
+        metrics["images_per_s"] = len(labels) / elapsed
+        rows.append({"model": model_id.value, **metrics})
+
+        accuracy = metrics["test_accuracy"]
+        if args.min_accuracy is not None and accuracy < args.min_accuracy:
+            failures.append(f"{model_id.value}: accuracy {accuracy:.4f} < {args.min_accuracy}")
+        previous = reported.get(model_id.value)
+        if (
+            args.max_accuracy_drop is not None
+            and previous is not None
+            and accuracy < previous - args.max_accuracy_drop
+        ):
+            failures.append(
+                f"{model_id.value}: accuracy {accuracy:.4f} is more than "
+                f"{args.max_accuracy_drop} below the reported {previous:.4f}"
+            )
+
+        if not args.no_report:
+            figure_path = args.reports_dir / CONFUSION_MATRIX_FIGURE.format(model=model_id.value)
+            figure_path.parent.mkdir(parents=True, exist_ok=True)
+            partial_path = figure_path.with_name(f"{figure_path.name}.partial")
+            render_confusion_matrix(
+                confusion_matrix(labels, predictions, len(CIFAR10_CLASSES)),
+                _checkpoint_class_names(checkpoint_path),
+                title=f"Confusion Matrix - {model_id.value}",
+            ).save(partial_path, format="PNG")
+            # Renamed into place: the server may be watching for this file.
+            os.replace(partial_path, figure_path)
+
+    # Batch-1 latency with every thread, as served; no more forks after this point.
+    torch.set_num_threads(available_cpus())
+    for row, model in zip(rows, models.values(), strict=True):
+        row["latency_ms"] = single_image_latency_ms(model)
+        print(
+            f"{row['model']:<10} acc={row['test_accuracy']:.4f} f1={row['test_f1_macro']:.4f} "
+            f"{row['images_per_s']:.0f} img/s latency={row['latency_ms']:.3f} ms"
+        )
+
+    if not args.no_report:
+        merge_results(args.reports_dir, rows)
+        print(f"Updated {args.reports_dir}")
+    if failures:
+        print("\n".join(failures))
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
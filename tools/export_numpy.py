@@ -0,0 +1,59 @@
+"""Export `best_baseline.pth` to a plain `.npz` for the torch-free NumPy backend.
+
+    python -m tools.export_numpy
+
+The export is verified against the torch model on a fixed random batch and
+refused when logits differ by more than `NUMPY_EQUIVALENCE_ATOL`.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from webapp.core.config import settings
+from webapp.core.constants import MODEL_CHECKPOINT_FILENAMES, NUMPY_CHECKPOINT_FILENAMES
+from webapp.schemas.prediction import ModelId
+from webapp.services.model_registry import ModelRegistry
+from webapp.services.numpy_backend import NUMPY_EQUIVALENCE_ATOL, NumpyBaselineCNN
+from webapp.services.optimize import example_batch
+
+
+@torch.inference_mode()
+def export_numpy_weights(model: nn.Module, path: Path) -> float:
+    """Write `model`'s weights to `path` and return the max logit difference of the export."""
+    weights = {name: value.detach().cpu().numpy() for name, value in model.state_dict().items()}
+    batch = example_batch(batch_size=64)
+    difference = float(
+        np.abs(NumpyBaselineCNN(weights)(batch.numpy()) - model(batch).numpy()).max()
+    )
+    if difference > NUMPY_EQUIVALENCE_ATOL:
+        raise RuntimeError(
+            f"NumPy export differs from torch by {difference:.2e} > {NUMPY_EQUIVALENCE_ATOL:.0e}."
+        )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, **weights)
+    return difference
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checkpoints-dir", type=Path, default=settings.checkpoints_dir)
+    args = parser.parse_args()
+
+    registry = ModelRegistry(settings)
+    for raw_model_id, npz_name in NUMPY_CHECKPOINT_FILENAMES.items():
+        model_id = ModelId(raw_model_id)
+        checkpoint_path = args.checkpoints_dir / MODEL_CHECKPOINT_FILENAMES[raw_model_id]
+        model = registry.load_checkpoint(model_id, checkpoint_path)
+        output_path = args.checkpoints_dir / npz_name
+        difference = export_numpy_weights(model, output_path)
+        print(f"Saved {output_path} (max logit difference {difference:.2e})")
+
+
+if __name__ == "__main__":
+    main()
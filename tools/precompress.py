@@ -0,0 +1,85 @@
+"""Write gzip and brotli variants of the text assets that the web app serves.
+
+    python -m tools.precompress
+    python -m tools.precompress webapp/web/static src/reports
+
+Each `.js`, `.css`, `.json` (and similar) file gets `<file>.gz` and, when the
+optional `brotli` package is installed, `<file>.br`. Variants are stamped with
+their source's mtime; `CachingStaticFiles` only serves a variant whose mtime
+still matches, so editing a source without rerunning this is safe. Variants
+that would not be smaller than the source are removed rather than written.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import os
+from pathlib import Path
+
+from webapp.core.config import settings
+from webapp.core.constants import PRECOMPRESSED_ENCODINGS, PRECOMPRESSIBLE_SUFFIXES
+
+try:
+    import brotli
+except ImportError:  # optional; gzip variants are still written
+    brotli = None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, quality=11)
+
+
+def precompress_file(path: Path) -> dict[str, int]:
+    """Write the variants of `path` and return `{encoding: size}` for those kept."""
+    data = path.read_bytes()
+    source_stat = path.stat()
+    sizes: dict[str, int] = {}
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        variant_path = path.with_name(path.name + suffix)
+        if encoding == "br" and brotli is None:
+            continue
+        compressed = compress(data, encoding)
+        if len(compressed) >= len(data):
+            variant_path.unlink(missing_ok=True)
+            continue
+        partial_path = variant_path.with_name(variant_path.name + ".partial")
+        partial_path.write_bytes(compressed)
+        os.utime(partial_path, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+        os.replace(partial_path, variant_path)
+        sizes[encoding] = len(compressed)
+    return sizes
+
+
+def precompress_tree(root: Path) -> list[tuple[Path, int, dict[str, int]]]:
+    """Precompress every eligible file under `root`; `(path, size, variant sizes)` per file."""
+    results = []
+    for path in sorted(root.rglob("*")):
+        if path.is_file() and path.suffix in PRECOMPRESSIBLE_SUFFIXES:
+            results.append((path, path.stat().st_size, precompress_file(path)))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "roots",
+        nargs="*",
+        type=Path,
+        default=[settings.static_dir, settings.reports_dir],
+        help="Directories to walk (default: the static and reports directories).",
+    )
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("brotli is not installed; writing gzip variants only.")
+    for root in args.roots:
+        for path, size, variants in precompress_tree(root):
+            sizes = ", ".join(f"{encoding} {length:,}" for encoding, length in variants.items())
+            print(f"{path}: {size:,} B -> {sizes or 'not compressible'}")
+
+
+if __name__ == "__main__":
+    main()
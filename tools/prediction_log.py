@@ -0,0 +1,73 @@
+"""Summarize, or export as NumPy arrays, one UTC day of the server's prediction log.
+
+    python -m tools.prediction_log
+    python -m tools.prediction_log --day 2026-10-17 --npz predictions-20261017.npz
+
+Reads every `predictions-<YYYYMMDD>-*.bin` segment in `PREDICTION_LOG_DIR` (see
+`webapp.services.prediction_log.load_day`), whichever worker wrote it. For each
+model it prints the record count, the share answered from the prediction cache,
+mean top-1 confidence, latency percentiles and the predicted-class distribution.
+`--npz` writes the columns for offline drift or accuracy analysis.
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import UTC, date, datetime
+from pathlib import Path
+
+import numpy as np
+
+from webapp.core.config import settings
+from webapp.core.constants import CIFAR10_CLASSES
+from webapp.services.prediction_log import load_day
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--day",
+        type=date.fromisoformat,
+        default=datetime.now(UTC).date(),
+        help="UTC day, YYYY-MM-DD (default: today).",
+    )
+    parser.add_argument("--log-dir", type=Path, default=settings.prediction_log_dir)
+    parser.add_argument("--npz", type=Path, default=None, help="Optional column export.")
+    args = parser.parse_args()
+
+    columns = load_day(args.log_dir, args.day)
+    total = len(columns["timestamp"])
+    print(f"{total:,} predictions on {args.day.isoformat()} in {args.log_dir}")
+    if total:
+        sources, source_counts = np.unique(columns["source"], return_counts=True)
+        print(", ".join(f"{source}: {count:,}" for source, count in zip(sources, source_counts)))
+        print(
+            f"{'model':<14} {'records':>9} {'cached':>7} {'conf':>6} "
+            f"{'p50_ms':>8} {'p95_ms':>8}  predicted classes"
+        )
+    for model_id in np.unique(columns["model_id"]):
+        selected = columns["model_id"] == model_id
+        probabilities = columns["probabilities"][selected]
+        latency_ms = columns["latency_ms"][selected]
+        class_share = np.bincount(
+            probabilities.argmax(axis=1), minlength=len(CIFAR10_CLASSES)
+        ) / len(probabilities)
+        print(
+            f"{model_id:<14} {int(selected.sum()):>9,} "
+            f"{columns['cached'][selected].mean():>7.1%} "
+            f"{probabilities.max(axis=1).mean():>6.3f} "
+            f"{np.percentile(latency_ms, 50):>8.2f} {np.percentile(latency_ms, 95):>8.2f}  "
+            + " ".join(
+                f"{name}={share:.0%}"
+                for name, share in zip(CIFAR10_CLASSES, class_share, strict=True)
+            )
+        )
+
+    if args.npz is not None:
+        args.npz.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(args.npz, **columns)
+        print(f"Wrote {args.npz}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""Channel-prune `cnnv2` by BatchNorm scale, fine-tune it and report the trade-off.
+
+    python -m tools.prune
+    python -m tools.prune --ratios 0.25 0.5 0.75 --export-ratio 0.5 --finetune-epochs 3
+
+For each ratio, every conv of `CNNV2` keeps its `1 - ratio` share of output
+channels with the largest |BatchNorm gamma|, rounded up to `--channel-multiple`
+so the narrower convs stay friendly to vectorized CPU kernels. The dropped
+channels are cut out of the conv, its BatchNorm and the next layer's input,
+leaving a smaller dense `CNNV2` rather than a masked one. Each pruned model is
+then fine-tuned on the training split, and the epoch with the best validation
+accuracy is kept.
+
+MACs, parameter count, batch-1 CPU latency and test accuracy of the unpruned
+model and every ratio are upserted into `results.json` / `results.csv` as
+`cnnv2` and `cnnv2_pruned_<percent>`. The `--export-ratio` model is saved as
+`cnnv2_pruned.pth` together with its architecture spec, and the app serves it
+as `cnnv2_pruned`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import os
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+
+from tools.cifar import DEFAULT_DATA_ROOT, checkpoint_normalization
+from tools.evaluate import available_cpus, predict_labels
+from tools.reporting import (
+    classification_metrics,
+    count_macs,
+    merge_results,
+    single_image_latency_ms,
+)
+from tools.train import (
+    DistributedContext,
+    TrainConfig,
+    evaluate,
+    seed_everything,
+    train_epoch,
+)
+from tools.train_data import (
+    DEFAULT_STORE_DIR,
+    CIFAR10Batches,
+    build_store,
+    open_store,
+    stratified_split,
+)
+from webapp.core.config import settings
+from webapp.core.constants import (
+    CIFAR10_CLASSES,
+    MODEL_CHECKPOINT_FILENAMES,
+    PRUNED_CHECKPOINT_FILENAMES,
+)
+from webapp.models.cnn import CNNV2, architecture_spec
+from webapp.schemas.prediction import ModelId
+from webapp.services.model_registry import ModelRegistry, file_sha256
+
+
+def kept_channels(channels: int, ratio: float, multiple: int) -> int:
+    """Channels left after removing `ratio` of `channels`, rounded up to `multiple`."""
+    kept = channels * (1.0 - ratio)
+    return min(channels, max(multiple, -(-round(kept) // multiple) * multiple))
+
+
+@torch.no_grad()
+def prune_cnnv2(model: CNNV2, ratio: float, multiple: int = 8) -> CNNV2:
+    """A narrower `CNNV2` keeping each conv's channels with the largest |BatchNorm gamma|."""
+    convs = [module for module in model.features if isinstance(module, nn.Conv2d)]
+    norms = [module for module in model.features if isinstance(module, nn.BatchNorm2d)]
+    keep = [
+        torch.argsort(norm.weight.abs(), descending=True)[
+            : kept_channels(norm.num_features, ratio, multiple)
+        ].sort().values
+        for norm in norms
+    ]
+    pruned = CNNV2(widths=tuple(len(indices) for indices in keep)).eval()
+    pruned_convs = [module for module in pruned.features if isinstance(module, nn.Conv2d)]
+    pruned_norms = [module for module in pruned.features if isinstance(module, nn.BatchNorm2d)]
+
+    in_keep = torch.arange(convs[0].in_channels)
+    for conv, norm, new_conv, new_norm, out_keep in zip(
+        convs, norms, pruned_convs, pruned_norms, keep, strict=True
+    ):
+        new_conv.weight.copy_(conv.weight[out_keep][:, in_keep])
+        for name in ("weight", "bias", "running_mean", "running_var"):
+            getattr(new_norm, name).copy_(getattr(norm, name)[out_keep])
+        new_norm.num_batches_tracked.copy_(norm.num_batches_tracked)
+        in_keep = out_keep
+    pruned.head[-1].weight.copy_(model.head[-1].weight[:, in_keep])
+    pruned.head[-1].bias.copy_(model.head[-1].bias)
+    return pruned
+
+
+def fine_tune(
+    model: nn.Module,
+    train_batches: CIFAR10Batches,
+    val_batches: CIFAR10Batches,
+    config: TrainConfig,
+) -> tuple[nn.Module, float]:
+    """Train with the notebook's recipe for `config.epochs`; returns the best validation epoch.
+
+    The starting point counts as epoch 0, so fine-tuning never makes the result worse.
+    """
+    ctx = DistributedContext(rank=0, world_size=1, local_rank=0, local_world_size=1)
+    criterion = nn.CrossEntropyLoss(label_smoothing=config.label_smoothing)
+    best_model = copy.deepcopy(model).eval()
+    best_accuracy = evaluate(model, val_batches, criterion, ctx)["val_accuracy"]
+    if config.epochs <= 0:
+        return best_model, best_accuracy
+    optimizer = torch.optim.SGD(
+        model.parameters(),
+        lr=config.lr,
+        momentum=config.momentum,
+        weight_decay=config.weight_decay,
+    )
+    scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, T_max=config.epochs)
+    for epoch in range(1, config.epochs + 1):
+        train_batches.set_epoch(epoch)
+        train_epoch(model, train_batches, optimizer, criterion, ctx)
+        scheduler.step()
+        accuracy = evaluate(model, val_batches, criterion, ctx)["val_accuracy"]
+        print(f"  epoch {epoch}/{config.epochs}: val_acc={accuracy:.4f}")
+        if accuracy > best_accuracy:
+            best_model, best_accuracy = copy.deepcopy(model).eval(), accuracy
+    return best_model, best_accuracy
+
+
+def cost_metrics(model: nn.Module) -> dict[str, float]:
+    return {
+        "macs": float(count_macs(model)),
+        "params": float(sum(parameter.numel() for parameter in model.parameters())),
+        "latency_ms": single_image_latency_ms(model),
+    }
+
+
+def save_pruned_checkpoint(
+    model: CNNV2,
+    path: Path,
+    metadata: dict[str, object],
+) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = path.with_name(f"{path.name}.partial")
+    torch.save(
+        {
+            "model_name": ModelId.cnnv2_pruned.value,
+            "base_model": ModelId.cnnv2.value,
+            "architecture": architecture_spec(model),
+            "model_state_dict": model.state_dict(),
+            "class_names": list(CIFAR10_CLASSES),
+            **metadata,
+        },
+        partial_path,
+    )
+    # Renamed into place: the server may be watching for this file.
+    os.replace(partial_path, path)
+
+
+def main() -> None:
+    defaults = TrainConfig()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ratios", type=float, nargs="+", default=[0.25, 0.5, 0.75])
+    parser.add_argument(
+        "--export-ratio",
+        type=float,
+        default=0.5,
+        help="Ratio saved as the served cnnv2_pruned checkpoint.",
+    )
+    parser.add_argument("--channel-multiple", type=int, default=8)
+    parser.add_argument("--finetune-epochs", type=int, default=3)
+    parser.add_argument("--lr", type=float, default=0.01)
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--data-root", type=Path, default=DEFAULT_DATA_ROOT)
+    parser.add_argument("--store-dir", type=Path, default=DEFAULT_STORE_DIR)
+    parser.add_argument("--checkpoints-dir", type=Path, default=settings.checkpoints_dir)
+    parser.add_argument("--reports-dir", type=Path, default=settings.reports_dir)
+    parser.add_argument("--no-report", action="store_true", help="Skip results.json/csv.")
+    args = parser.parse_args()
+    if args.export_ratio not in args.ratios:
+        parser.error("--export-ratio must be one of --ratios.")
+    if not all(0.0 < ratio < 1.0 for ratio in args.ratios):
+        parser.error("--ratios must be between 0 and 1.")
+
+    torch.set_num_threads(available_cpus())
+    build_store(args.data_root, args.store_dir)
+    store = open_store(args.store_dir)
+    checkpoint_path = args.checkpoints_dir / MODEL_CHECKPOINT_FILENAMES[ModelId.cnnv2.value]
+    mean, std = checkpoint_normalization(checkpoint_path, settings)
+    base_model = ModelRegistry(settings).load_checkpoint(ModelId.cnnv2, checkpoint_path)
+
+    config = TrainConfig(
+        model=ModelId.cnnv2.value,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        epochs=args.finetune_epochs,
+        lr=args.lr,
+    )
+    train_idx, val_idx = stratified_split(store.train_labels, config.val_ratio, config.seed)
+    train_batches = CIFAR10Batches(
+        store.train_images,
+        store.train_labels,
+        train_idx,
+        config.batch_size,
+        mean,
+        std,
+        augment=config.augment,
+        shuffle=True,
+        seed=config.seed,
+    )
+    val_batches = CIFAR10Batches(
+        store.train_images, store.train_labels, val_idx, config.batch_size, mean, std
+    )
+
+    def test_metrics(model: nn.Module) -> dict[str, float]:
+        predictions = predict_labels(model, store.test_images, mean, std, 1000, workers=1)
+        return classification_metrics(store.test_labels, predictions, len(CIFAR10_CLASSES))
+
+    rows: list[dict[str, object]] = [
+        {
+            "model": ModelId.cnnv2.value,
+            **test_metrics(base_model),
+            **cost_metrics(base_model),
+            "prune_ratio": 0.0,
+        }
+    ]
+    for ratio in sorted(args.ratios):
+        seed_everything(config.seed)
+        pruned = prune_cnnv2(base_model, ratio, args.channel_multiple)
+        print(f"ratio {ratio:g}: widths {pruned.widths}")
+        pruned, val_accuracy = fine_tune(pruned, train_batches, val_batches, config)
+        row = {
+            "model": f"{ModelId.cnnv2_pruned.value}_{round(ratio * 100)}",
+            **test_metrics(pruned),
+            **cost_metrics(pruned),
+            "prune_ratio": ratio,
+            "val_accuracy": val_accuracy,
+        }
+        rows.append(row)
+        if ratio == args.export_ratio:
+            output_path = args.checkpoints_dir / PRUNED_CHECKPOINT_FILENAMES[
+                ModelId.cnnv2_pruned.value
+            ]
+            save_pruned_checkpoint(
+                pruned,
+                output_path,
+                metadata={
+                    "mean": list(mean),
+                    "std": list(std),
+                    "prune_ratio": ratio,
+                    "finetune_epochs": config.epochs,
+                    "best_val_acc": val_accuracy,
+                    "base_checkpoint_sha256": file_sha256(checkpoint_path),
+                },
+            )
+            rows.append({**row, "model": ModelId.cnnv2_pruned.value})
+            print(f"Saved {output_path}")
+
+    base = rows[0]
+    print(f"{'model':<18} {'acc':>7} {'MMACs':>8} {'params':>9} {'latency':>10}")
+    for row in rows:
+        print(
+            f"{row['model']:<18} {row['test_accuracy']:>7.4f} {row['macs'] / 1e6:>8.1f} "
+            f"{row['params']:>9,.0f} {row['latency_ms']:>7.3f} ms"
+            f"  ({row['macs'] / base['macs']:.0%} of cnnv2's MACs)"
+        )
+    if not args.no_report:
+        merge_results(args.reports_dir, rows)
+        print(f"Updated {args.reports_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Build INT8 checkpoints by post-training static quantization and report the trade-off.
+
+    python -m tools.quantize --models cnnv2 baseline --calibration-per-class 100
+
+For each model: calibrate on a fixed, class-balanced slice of the CIFAR-10
+training split, save `<model>_int8.pth` next to the float checkpoints, then
+evaluate float and INT8 on the test split and upsert accuracy and batch-1 CPU
+latency into `src/reports/results.json` / `results.csv`.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from tools.cifar import (
+    DEFAULT_DATA_ROOT,
+    checkpoint_normalization,
+    iter_batches,
+    load_cifar10_arrays,
+    stratified_indices,
+)
+from tools.reporting import classification_metrics, merge_results, single_image_latency_ms
+from webapp.core.config import settings
+from webapp.core.constants import (
+    CIFAR10_CLASSES,
+    MODEL_CHECKPOINT_FILENAMES,
+    QUANTIZED_CHECKPOINT_FILENAMES,
+)
+from webapp.schemas.prediction import ModelId
+from webapp.services.model_registry import ModelRegistry
+from webapp.services.quantization import (
+    QUANTIZED_BASE_MODELS,
+    quantize_model,
+    quantized_engine,
+    save_quantized_checkpoint,
+)
+
+
+@torch.inference_mode()
+def evaluate(
+    model: nn.Module,
+    images: np.ndarray,
+    labels: np.ndarray,
+    mean: tuple[float, float, float],
+    std: tuple[float, float, float],
+    batch_size: int,
+) -> dict[str, float]:
+    predictions = [
+        model(batch).argmax(dim=1).numpy()
+        for batch, _ in iter_batches(images, labels, batch_size, mean, std)
+    ]
+    metrics = classification_metrics(labels, np.concatenate(predictions), len(CIFAR10_CLASSES))
+    metrics["latency_ms"] = single_image_latency_ms(model)
+    return metrics
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        type=ModelId,
+        default=list(QUANTIZED_BASE_MODELS.values()),
+        help="Float model ids to quantize.",
+    )
+    parser.add_argument("--data-root", type=Path, default=DEFAULT_DATA_ROOT)
+    parser.add_argument("--checkpoints-dir", type=Path, default=settings.checkpoints_dir)
+    parser.add_argument("--reports-dir", type=Path, default=settings.reports_dir)
+    parser.add_argument("--calibration-per-class", type=int, default=100)
+    parser.add_argument("--calibration-batch-size", type=int, default=64)
+    parser.add_argument("--eval-batch-size", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-report", action="store_true", help="Skip results.json/csv.")
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    engine = quantized_engine()
+    quantized_ids = {base: quantized for quantized, base in QUANTIZED_BASE_MODELS.items()}
+    train_images, train_labels = load_cifar10_arrays(args.data_root, train=True)
+    test_images, test_labels = load_cifar10_arrays(args.data_root, train=False)
+    calibration_idx = stratified_indices(train_labels, args.calibration_per_class, args.seed)
+
+    registry = ModelRegistry(settings)
+    rows: list[dict[str, object]] = []
+    for model_id in args.models:
+        quantized_id = quantized_ids[model_id]
+        checkpoint_path = args.checkpoints_dir / MODEL_CHECKPOINT_FILENAMES[model_id.value]
+        mean, std = checkpoint_normalization(checkpoint_path, settings)
+        float_model = registry.load_checkpoint(model_id, checkpoint_path)
+
+        calibration = (
+            batch
+            for batch, _ in iter_batches(
+                train_images[calibration_idx],
+                train_labels[calibration_idx],
+                args.calibration_batch_size,
+                mean,
+                std,
+            )
+        )
+        quantized_model = quantize_model(float_model, calibration, engine=engine)
+        output_path = args.checkpoints_dir / QUANTIZED_CHECKPOINT_FILENAMES[quantized_id.value]
+        save_quantized_checkpoint(
+            quantized_model,
+            quantized_id,
+            output_path,
+            metadata={
+                "mean": list(mean),
+                "std": list(std),
+                "calibration_size": int(len(calibration_idx)),
+                "calibration_seed": args.seed,
+            },
+        )
+        print(f"Saved {output_path}")
+
+        for served_id, model in ((model_id, float_model), (quantized_id, quantized_model)):
+            metrics = evaluate(model, test_images, test_labels, mean, std, args.eval_batch_size)
+            rows.append({"model": served_id.value, **metrics})
+            print(
+                f"{served_id.value:<14} acc={metrics['test_accuracy']:.4f} "
+                f"f1={metrics['test_f1_macro']:.4f} latency={metrics['latency_ms']:.3f} ms"
+            )
+
+    if not args.no_report:
+        merge_results(args.reports_dir, rows)
+        print(f"Updated {args.reports_dir}")
+
+
+if __name__ == "__main__":
+    main()
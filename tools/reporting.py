@@ -0,0 +1,210 @@
+"""Metric computation and `src/reports/results.*` writers for the offline tools."""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import statistics
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import torch
+import torch.nn as nn
+from PIL import Image, ImageDraw, ImageFont
+
+from webapp.core.constants import INPUT_IMAGE_SIZE
+
+RESULTS_JSON = "results.json"
+RESULTS_CSV = "results.csv"
+CONFUSION_MATRIX_FIGURE = "figures/confusion_matrix_{model}.png"
+
+# Light-to-dark blue ramp for the confusion-matrix heatmap.
+_HEATMAP_LOW = np.array([247, 251, 255], dtype=np.float64)
+_HEATMAP_HIGH = np.array([8, 48, 107], dtype=np.float64)
+
+
+def confusion_matrix(y_true: np.ndarray, y_pred: np.ndarray, num_classes: int) -> np.ndarray:
+    flat = np.bincount(y_true * num_classes + y_pred, minlength=num_classes * num_classes)
+    return flat.reshape(num_classes, num_classes)
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    out = np.zeros_like(numerator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=out, where=denominator > 0)
+
+
+def classification_metrics(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    num_classes: int,
+) -> dict[str, float]:
+    """Accuracy and macro P/R/F1 matching sklearn's `zero_division=0` semantics."""
+    return confusion_metrics(confusion_matrix(y_true, y_pred, num_classes), prefix="test")
+
+
+def confusion_metrics(matrix: np.ndarray, prefix: str) -> dict[str, float]:
+    """`classification_metrics` from an already accumulated `[C, C]` confusion matrix."""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    true_positives = np.diag(matrix)
+    predicted = matrix.sum(axis=0)
+    actual = matrix.sum(axis=1)
+    precision = _safe_divide(true_positives, predicted)
+    recall = _safe_divide(true_positives, actual)
+    f1 = _safe_divide(2 * precision * recall, precision + recall)
+    return {
+        f"{prefix}_accuracy": float(true_positives.sum() / max(1.0, matrix.sum())),
+        f"{prefix}_precision_macro": float(precision.mean()),
+        f"{prefix}_recall_macro": float(recall.mean()),
+        f"{prefix}_f1_macro": float(f1.mean()),
+    }
+
+
+@torch.inference_mode()
+def single_image_latency_ms(model: nn.Module, repeats: int = 100) -> float:
+    """Median batch-1 forward latency on CPU, as served by `/api/v1/predict`."""
+    image = torch.randn(1, 3, *INPUT_IMAGE_SIZE)
+    for _ in range(10):
+        model(image)
+    samples = []
+    for _ in range(repeats):
+        start = perf_counter()
+        model(image)
+        samples.append((perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+@torch.inference_mode()
+def count_macs(model: nn.Module) -> int:
+    """Multiply-accumulates of one batch-1 forward through the model's Conv2d and Linear layers."""
+    total = 0
+
+    def conv_hook(module: nn.Conv2d, _inputs: tuple[torch.Tensor], output: torch.Tensor) -> None:
+        nonlocal total
+        kernel_macs = module.weight[0].numel()
+        total += output.numel() * kernel_macs
+
+    def linear_hook(module: nn.Linear, _inputs: tuple[torch.Tensor], output: torch.Tensor) -> None:
+        nonlocal total
+        total += output.numel() * module.in_features
+
+    handles = []
+    for module in model.modules():
+        if isinstance(module, nn.Conv2d):
+            handles.append(module.register_forward_hook(conv_hook))
+        elif isinstance(module, nn.Linear):
+            handles.append(module.register_forward_hook(linear_hook))
+    try:
+        model(torch.zeros(1, 3, *INPUT_IMAGE_SIZE))
+    finally:
+        for handle in handles:
+            handle.remove()
+    return total
+
+
+def render_confusion_matrix(
+    matrix: np.ndarray,
+    class_names: list[str] | tuple[str, ...],
+    title: str,
+    cell_size: int = 48,
+) -> Image.Image:
+    """Heatmap of raw counts, shaded by each cell's share of its true class."""
+    font = ImageFont.load_default(size=13)
+    title_font = ImageFont.load_default(size=16)
+    num_classes = len(class_names)
+    label_width = max(int(font.getlength(name)) for name in class_names) + 12
+    left, top = label_width + 24, 40
+    grid = cell_size * num_classes
+    width, height = left + grid + 16, top + grid + label_width + 28
+
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    draw.text((left + grid / 2, 12), title, fill="black", font=title_font, anchor="mt")
+
+    counts = np.asarray(matrix, dtype=np.int64)
+    shares = counts / np.maximum(counts.sum(axis=1, keepdims=True), 1)
+    for row in range(num_classes):
+        for column in range(num_classes):
+            share = float(shares[row, column])
+            colour = tuple(int(v) for v in _HEATMAP_LOW + (_HEATMAP_HIGH - _HEATMAP_LOW) * share)
+            x0, y0 = left + column * cell_size, top + row * cell_size
+            draw.rectangle((x0, y0, x0 + cell_size, y0 + cell_size), fill=colour)
+            draw.text(
+                (x0 + cell_size / 2, y0 + cell_size / 2),
+                str(counts[row, column]),
+                fill="white" if share > 0.5 else "black",
+                font=font,
+                anchor="mm",
+            )
+        draw.text(
+            (left - 6, top + row * cell_size + cell_size / 2),
+            class_names[row],
+            fill="black",
+            font=font,
+            anchor="rm",
+        )
+
+    # Predicted-class labels run vertically under their columns.
+    labels = Image.new("RGB", (label_width, grid), "white")
+    labels_draw = ImageDraw.Draw(labels)
+    for column, name in enumerate(class_names):
+        labels_draw.text(
+            (label_width - 6, column * cell_size + cell_size / 2),
+            name,
+            fill="black",
+            font=font,
+            anchor="rm",
+        )
+    image.paste(labels.rotate(90, expand=True), (left, top + grid))
+    draw.text((left + grid / 2, height - 6), "Predicted", fill="black", font=font, anchor="mb")
+    vertical = Image.new("RGB", (grid, 18), "white")
+    ImageDraw.Draw(vertical).text((grid / 2, 9), "True", fill="black", font=font, anchor="mm")
+    image.paste(vertical.rotate(90, expand=True), (2, top))
+    return image
+
+
+def merge_results(reports_dir: Path, rows: list[dict[str, object]]) -> list[dict[str, object]]:
+    """Upsert `rows` by `model` into results.json/results.csv, keeping other models' rows."""
+    json_path = reports_dir / RESULTS_JSON
+    existing: list[dict[str, object]] = []
+    if json_path.exists():
+        try:
+            loaded = json.loads(json_path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            loaded = []
+        if isinstance(loaded, list):
+            existing = [row for row in loaded if isinstance(row, dict)]
+
+    by_model = {str(row.get("model")): dict(row) for row in existing}
+    for row in rows:
+        by_model.setdefault(str(row["model"]), {}).update(row)
+    merged = sorted(
+        by_model.values(),
+        key=lambda row: float(row.get("test_accuracy") or 0.0),  # type: ignore[arg-type]
+        reverse=True,
+    )
+
+    # Same 10-digit precision the notebook's `DataFrame.to_json` export used.
+    rounded = [
+        {key: round(value, 10) if isinstance(value, float) else value for key, value in row.items()}
+        for row in merged
+    ]
+    reports_dir.mkdir(parents=True, exist_ok=True)
+
+    columns: list[str] = []
+    for row in merged:
+        columns.extend(key for key in row if key not in columns)
+    csv_path = reports_dir / RESULTS_CSV
+    partial_csv_path = csv_path.with_name(f"{csv_path.name}.partial")
+    with partial_csv_path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(merged)
+    os.replace(partial_csv_path, csv_path)
+
+    # Renamed into place, and last: the server reloads the reports when this file changes.
+    partial_json_path = json_path.with_name(f"{json_path.name}.partial")
+    partial_json_path.write_text(json.dumps(rounded, indent=2) + "\n", encoding="utf-8")
+    os.replace(partial_json_path, json_path)
+    return merged
@@ -0,0 +1,446 @@
+"""Data-parallel CPU training for the served models, with full-state checkpoints and resume.
+
+    python -m tools.train --model cnnv2
+    torchrun --standalone --nproc-per-node 4 -m tools.train --model cnnv2 --resume
+    torchrun --nnodes 2 --node-rank 0 --master-addr HOST --master-port 29500 \\
+        --nproc-per-node 4 -m tools.train --model cnnv2 --resume
+
+Follows the notebook's recipe: SGD with a cosine schedule, label smoothing, the
+stratified 90/10 split, crop/flip augmentation and early stopping on validation
+accuracy. Data comes from the `tools.train_data` store. Under `torchrun` each
+process trains on `batch_size / world_size` samples of every global batch, and
+`DistributedDataParallel` averages gradients over the gloo backend. One update
+therefore matches a single-process step at the same global batch size.
+
+After every `--checkpoint-every` epochs, rank 0 writes
+`<model>_train_state.pth`. It holds the model, optimizer, scheduler, per-rank
+RNG state, epoch, early-stopping counters and history, and `--resume`
+continues from it. Whenever validation accuracy improves, rank 0 writes
+`best_<model>.pth` in the notebook's checkpoint format, which `ModelRegistry`
+serves.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import torch
+import torch.distributed as dist
+import torch.nn as nn
+from torch.nn.parallel import DistributedDataParallel
+
+from tools.cifar import DEFAULT_DATA_ROOT
+from tools.reporting import confusion_metrics
+from tools.train_data import (
+    DEFAULT_STORE_DIR,
+    CIFAR10Batches,
+    build_store,
+    open_store,
+    stratified_split,
+)
+from webapp.core.config import settings
+from webapp.core.constants import CIFAR10_CLASSES, MODEL_CHECKPOINT_FILENAMES
+from webapp.models.cnn import create_model
+from webapp.schemas.prediction import ModelId
+
+TRAINABLE_MODEL_IDS = (ModelId.baseline, ModelId.cnnv2)
+
+
+@dataclass(frozen=True)
+class TrainConfig:
+    """Hyperparameters; the defaults are the notebook's `CONFIG`."""
+
+    model: str = ModelId.cnnv2.value
+    seed: int = 42
+    batch_size: int = 128
+    epochs: int = 30
+    lr: float = 0.03
+    momentum: float = 0.9
+    weight_decay: float = 5e-4
+    val_ratio: float = 0.1
+    augment: bool = True
+    label_smoothing: float = 0.1
+    patience: int = 8
+
+
+@dataclass(frozen=True)
+class DistributedContext:
+    rank: int
+    world_size: int
+    local_rank: int
+    local_world_size: int
+
+    @property
+    def is_main(self) -> bool:
+        return self.rank == 0
+
+
+def init_distributed() -> DistributedContext:
+    """Join the gloo process group described by `torchrun`'s environment, if there is one."""
+    world_size = int(os.environ.get("WORLD_SIZE", "1"))
+    if world_size > 1:
+        dist.init_process_group(backend="gloo")
+    return DistributedContext(
+        rank=int(os.environ.get("RANK", "0")),
+        world_size=world_size,
+        local_rank=int(os.environ.get("LOCAL_RANK", "0")),
+        local_world_size=int(os.environ.get("LOCAL_WORLD_SIZE", "1")),
+    )
+
+
+def _all_reduce(tensor: torch.Tensor, ctx: DistributedContext) -> torch.Tensor:
+    if ctx.world_size > 1:
+        dist.all_reduce(tensor)
+    return tensor
+
+
+def _barrier(ctx: DistributedContext) -> None:
+    if ctx.world_size > 1:
+        dist.barrier()
+
+
+def seed_everything(seed: int) -> None:
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def rng_state() -> dict[str, object]:
+    """This process's RNG state, stored with tensors only so it loads with `weights_only`."""
+    name, keys, position, has_gauss, cached_gaussian = np.random.get_state()
+    return {
+        "torch": torch.get_rng_state(),
+        "numpy": (
+            name,
+            torch.from_numpy(keys.astype(np.int64)),
+            position,
+            has_gauss,
+            cached_gaussian,
+        ),
+        "python": random.getstate(),
+    }
+
+
+def set_rng_state(state: dict[str, object]) -> None:
+    torch.set_rng_state(state["torch"])
+    name, keys, position, has_gauss, cached_gaussian = state["numpy"]
+    np.random.set_state(
+        (name, keys.numpy().astype(np.uint32), position, has_gauss, cached_gaussian)
+    )
+    version, internal, gauss_next = state["python"]
+    random.setstate((version, tuple(internal), gauss_next))
+
+
+def _save_atomic(payload: dict[str, object], path: Path) -> None:
+    # A crash mid-write leaves the previous checkpoint intact.
+    partial = path.with_suffix(path.suffix + ".partial")
+    torch.save(payload, partial)
+    os.replace(partial, path)
+
+
+def train_epoch(
+    model: nn.Module,
+    batches: CIFAR10Batches,
+    optimizer: torch.optim.Optimizer,
+    criterion: nn.Module,
+    ctx: DistributedContext,
+) -> tuple[float, float, int]:
+    """`(loss, accuracy, samples)` over every rank's shard of one epoch."""
+    model.train()
+    totals = torch.zeros(3, dtype=torch.float64)
+    for images, targets in batches:
+        optimizer.zero_grad()
+        outputs = model(images)
+        loss = criterion(outputs, targets)
+        loss.backward()
+        optimizer.step()
+        totals += torch.tensor(
+            [
+                loss.item() * len(targets),
+                (outputs.argmax(dim=1) == targets).sum().item(),
+                len(targets),
+            ],
+            dtype=torch.float64,
+        )
+    loss_sum, correct, samples = _all_reduce(totals, ctx).tolist()
+    return loss_sum / samples, correct / samples, int(samples)
+
+
+@torch.inference_mode()
+def evaluate(
+    model: nn.Module,
+    batches: CIFAR10Batches,
+    criterion: nn.Module,
+    ctx: DistributedContext,
+) -> dict[str, float]:
+    """Validation loss plus accuracy and macro P/R/F1 over every rank's shard."""
+    model.eval()
+    num_classes = len(CIFAR10_CLASSES)
+    loss_sum = torch.zeros(1, dtype=torch.float64)
+    matrix = torch.zeros(num_classes * num_classes, dtype=torch.int64)
+    for images, targets in batches:
+        outputs = model(images)
+        loss_sum += criterion(outputs, targets).item() * len(targets)
+        matrix += torch.bincount(
+            targets * num_classes + outputs.argmax(dim=1), minlength=num_classes * num_classes
+        )
+    _all_reduce(loss_sum, ctx)
+    _all_reduce(matrix, ctx)
+    metrics = confusion_metrics(matrix.view(num_classes, num_classes).numpy(), prefix="val")
+    return {"val_loss": float(loss_sum) / int(matrix.sum()), **metrics}
+
+
+def _sync_buffers(model: nn.Module, ctx: DistributedContext) -> None:
+    # DDP only broadcasts BatchNorm statistics at the start of a training forward, so
+    # each rank's last batch leaves them slightly different; evaluate with rank 0's.
+    if ctx.world_size > 1:
+        for buffer in model.buffers():
+            dist.broadcast(buffer, src=0)
+
+
+def train(
+    config: TrainConfig,
+    ctx: DistributedContext,
+    store_dir: Path,
+    output_dir: Path,
+    checkpoint_every: int = 1,
+    resume: bool = False,
+) -> list[dict[str, object]]:
+    """Train `config.model` and return the per-epoch history (identical on every rank)."""
+    if config.batch_size % ctx.world_size:
+        raise ValueError(
+            f"batch_size {config.batch_size} is not divisible by world_size {ctx.world_size}."
+        )
+    model_id = ModelId(config.model)
+    state_path = output_dir / f"{model_id.value}_train_state.pth"
+    best_path = output_dir / MODEL_CHECKPOINT_FILENAMES[model_id.value]
+
+    seed_everything(config.seed)
+    store = open_store(store_dir)
+    train_idx, val_idx = stratified_split(store.train_labels, config.val_ratio, config.seed)
+    shard = {"rank": ctx.rank, "world_size": ctx.world_size, "seed": config.seed}
+    train_batches = CIFAR10Batches(
+        store.train_images,
+        store.train_labels,
+        train_idx,
+        config.batch_size // ctx.world_size,
+        store.mean,
+        store.std,
+        augment=config.augment,
+        shuffle=True,
+        **shard,
+    )
+    val_batches = CIFAR10Batches(
+        store.train_images,
+        store.train_labels,
+        val_idx,
+        config.batch_size,
+        store.mean,
+        store.std,
+        **shard,
+    )
+
+    model = create_model(model_id)
+    # Gradients are averaged in place, so the optimizer can hold the unwrapped module's parameters.
+    train_model = DistributedDataParallel(model) if ctx.world_size > 1 else model
+    criterion = nn.CrossEntropyLoss(label_smoothing=config.label_smoothing)
+    optimizer = torch.optim.SGD(
+        model.parameters(),
+        lr=config.lr,
+        momentum=config.momentum,
+        weight_decay=config.weight_decay,
+    )
+    scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, T_max=config.epochs)
+
+    progress: dict[str, object] = {
+        "epoch": 0,
+        "best_val_acc": -1.0,
+        "best_epoch": -1,
+        "bad_epochs": 0,
+        "history": [],
+    }
+    if resume and state_path.exists():
+        state = torch.load(state_path, map_location="cpu", weights_only=True)
+        if state["config"]["model"] != model_id.value:
+            raise ValueError(f"{state_path} was written for {state['config']['model']!r}.")
+        model.load_state_dict(state["model_state_dict"])
+        optimizer.load_state_dict(state["optimizer_state_dict"])
+        scheduler.load_state_dict(state["scheduler_state_dict"])
+        # A resumed run may extend `--epochs`; the cosine schedule stretches to match.
+        scheduler.T_max = config.epochs
+        progress = state["progress"]
+        if len(state["rng_states"]) == ctx.world_size:
+            set_rng_state(state["rng_states"][ctx.rank])
+        else:
+            # Dropout masks then differ from an uninterrupted run; data order does not.
+            seed_everything(config.seed + progress["epoch"] * ctx.world_size + ctx.rank)
+        if ctx.is_main:
+            print(f"Resumed {model_id.value} from {state_path} after epoch {progress['epoch']}")
+
+    history: list[dict[str, object]] = progress["history"]
+    if ctx.is_main:
+        print(
+            f"Training {model_id.value} on {ctx.world_size} process(es), "
+            f"{train_batches.batch_size} samples per process per step, "
+            f"{torch.get_num_threads()} threads each"
+        )
+    for epoch in range(progress["epoch"] + 1, config.epochs + 1):
+        if progress["bad_epochs"] >= config.patience:
+            break
+        train_batches.set_epoch(epoch)
+        start = perf_counter()
+        train_loss, train_acc, train_samples = train_epoch(
+            train_model, train_batches, optimizer, criterion, ctx
+        )
+        train_s = perf_counter() - start
+        _sync_buffers(model, ctx)
+        val_metrics = evaluate(model, val_batches, criterion, ctx)
+        history.append(
+            {
+                "model": model_id.value,
+                "epoch": epoch,
+                "train_loss": train_loss,
+                "train_acc": train_acc,
+                **val_metrics,
+                "lr": optimizer.param_groups[0]["lr"],
+                "train_s": round(train_s, 3),
+                "train_samples": train_samples,
+                "world_size": ctx.world_size,
+            }
+        )
+
+        val_acc = val_metrics["val_accuracy"]
+        if val_acc > progress["best_val_acc"]:
+            progress.update(best_val_acc=val_acc, best_epoch=epoch, bad_epochs=0)
+            if ctx.is_main:
+                _save_atomic(
+                    {
+                        "model_name": model_id.value,
+                        "model_state_dict": model.state_dict(),
+                        "best_val_acc": val_acc,
+                        "epoch": epoch,
+                        "mean": list(store.mean),
+                        "std": list(store.std),
+                        "class_names": list(CIFAR10_CLASSES),
+                    },
+                    best_path,
+                )
+        else:
+            progress["bad_epochs"] += 1
+        scheduler.step()
+        progress["epoch"] = epoch
+
+        stopping = progress["bad_epochs"] >= config.patience
+        if epoch % checkpoint_every == 0 or epoch == config.epochs or stopping:
+            rng_states = [None] * ctx.world_size
+            if ctx.world_size > 1:
+                dist.all_gather_object(rng_states, rng_state())
+            else:
+                rng_states[0] = rng_state()
+            if ctx.is_main:
+                _save_atomic(
+                    {
+                        "config": asdict(config),
+                        "model_state_dict": model.state_dict(),
+                        "optimizer_state_dict": optimizer.state_dict(),
+                        "scheduler_state_dict": scheduler.state_dict(),
+                        "rng_states": rng_states,
+                        "progress": progress,
+                    },
+                    state_path,
+                )
+        if ctx.is_main:
+            print(
+                f"Epoch {epoch:02d}/{config.epochs} | "
+                f"train_acc={train_acc:.4f} val_acc={val_acc:.4f} | "
+                f"train_loss={train_loss:.4f} val_loss={val_metrics['val_loss']:.4f} | "
+                f"{train_samples / train_s:.0f} img/s"
+            )
+        if stopping:
+            if ctx.is_main:
+                print(f"Early stopping after {epoch} epochs.")
+            break
+    _barrier(ctx)
+    return history
+
+
+def main() -> None:
+    defaults = TrainConfig()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--model",
+        choices=[model_id.value for model_id in TRAINABLE_MODEL_IDS],
+        default=defaults.model,
+    )
+    parser.add_argument("--epochs", type=int, default=defaults.epochs)
+    parser.add_argument(
+        "--batch-size", type=int, default=defaults.batch_size, help="Global, across processes."
+    )
+    parser.add_argument("--lr", type=float, default=defaults.lr)
+    parser.add_argument("--momentum", type=float, default=defaults.momentum)
+    parser.add_argument("--weight-decay", type=float, default=defaults.weight_decay)
+    parser.add_argument("--val-ratio", type=float, default=defaults.val_ratio)
+    parser.add_argument("--label-smoothing", type=float, default=defaults.label_smoothing)
+    parser.add_argument("--patience", type=int, default=defaults.patience)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--no-augment", action="store_true")
+    parser.add_argument("--data-root", type=Path, default=DEFAULT_DATA_ROOT)
+    parser.add_argument("--store-dir", type=Path, default=DEFAULT_STORE_DIR)
+    parser.add_argument("--output-dir", type=Path, default=settings.checkpoints_dir)
+    parser.add_argument("--checkpoint-every", type=int, default=1, help="Epochs between saves.")
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="Torch threads per process (default: CPU count / processes on this node).",
+    )
+    parser.add_argument("--history-json", type=Path, default=None)
+    args = parser.parse_args()
+
+    ctx = init_distributed()
+    torch.set_num_threads(args.threads or max(1, (os.cpu_count() or 1) // ctx.local_world_size))
+    if ctx.local_rank == 0:
+        build_store(args.data_root, args.store_dir)
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+    _barrier(ctx)
+
+    config = TrainConfig(
+        model=args.model,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        epochs=args.epochs,
+        lr=args.lr,
+        momentum=args.momentum,
+        weight_decay=args.weight_decay,
+        val_ratio=args.val_ratio,
+        augment=not args.no_augment,
+        label_smoothing=args.label_smoothing,
+        patience=args.patience,
+    )
+    try:
+        history = train(
+            config,
+            ctx,
+            store_dir=args.store_dir,
+            output_dir=args.output_dir,
+            checkpoint_every=args.checkpoint_every,
+            resume=args.resume,
+        )
+    finally:
+        if ctx.world_size > 1:
+            dist.destroy_process_group()
+    if ctx.is_main and args.history_json is not None:
+        args.history_json.parent.mkdir(parents=True, exist_ok=True)
+        args.history_json.write_text(json.dumps(history, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
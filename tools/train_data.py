@@ -0,0 +1,262 @@
+"""Memory-mapped CIFAR-10 store and vectorized minibatch pipeline for training.
+
+    python -m tools.train_data --store-dir data/cifar10_u8
+
+Converts CIFAR-10 once into `.npy` uint8 arrays (`[N, 32, 32, 3]` images and
+`[N]` labels per split) plus the training-set channel statistics. Training
+then reads minibatches straight from the memory map: one fancy-index gather per
+batch, followed by padded random crop, horizontal flip and normalization as
+whole-batch tensor ops. This replaces the notebook's per-sample PIL transforms
+(`RandomCrop(32, padding=4)`, `RandomHorizontalFlip`, `ToTensor`, `Normalize`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from tools.cifar import DEFAULT_DATA_ROOT, load_cifar10_arrays
+from webapp.core.constants import INPUT_IMAGE_SIZE
+
+DEFAULT_STORE_DIR = DEFAULT_DATA_ROOT / "cifar10_u8"
+STATS_FILENAME = "stats.json"
+CROP_PADDING = 4
+
+
+@dataclass(frozen=True)
+class CIFAR10Store:
+    """Read-only memory-mapped splits plus the training-set normalization."""
+
+    train_images: np.ndarray
+    train_labels: np.ndarray
+    test_images: np.ndarray
+    test_labels: np.ndarray
+    mean: tuple[float, float, float]
+    std: tuple[float, float, float]
+
+
+def _split_paths(store_dir: Path, split: str) -> tuple[Path, Path]:
+    return store_dir / f"{split}_images.npy", store_dir / f"{split}_labels.npy"
+
+
+def channel_stats(
+    images: np.ndarray, chunk_size: int = 10_000
+) -> tuple[tuple[float, float, float], tuple[float, float, float]]:
+    """Per-channel mean/std on the [0, 1] scale, as the notebook computes from `ToTensor`."""
+    total = np.zeros(3)
+    total_sq = np.zeros(3)
+    for start in range(0, len(images), chunk_size):
+        chunk = images[start : start + chunk_size].reshape(-1, 3).astype(np.float64) / 255.0
+        total += chunk.sum(axis=0)
+        total_sq += np.square(chunk).sum(axis=0)
+    pixels = len(images) * images.shape[1] * images.shape[2]
+    mean = total / pixels
+    std = np.sqrt(total_sq / pixels - np.square(mean))
+    return tuple(float(v) for v in mean), tuple(float(v) for v in std)  # type: ignore[return-value]
+
+
+def write_store(
+    store_dir: Path,
+    train: tuple[np.ndarray, np.ndarray],
+    test: tuple[np.ndarray, np.ndarray],
+) -> None:
+    """Write `(images, labels)` per split plus the training-set statistics to `store_dir`."""
+    store_dir.mkdir(parents=True, exist_ok=True)
+    for split, (images, labels) in (("train", train), ("test", test)):
+        images_path, labels_path = _split_paths(store_dir, split)
+        np.save(images_path, np.ascontiguousarray(images, dtype=np.uint8))
+        np.save(labels_path, np.asarray(labels, dtype=np.int64))
+    mean, std = channel_stats(train[0])
+    # Written last, so an interrupted build is redone rather than half-used.
+    (store_dir / STATS_FILENAME).write_text(
+        json.dumps({"mean": list(mean), "std": list(std)}, indent=2) + "\n", encoding="utf-8"
+    )
+
+
+def build_store(data_root: Path, store_dir: Path) -> None:
+    """Download CIFAR-10 if needed and write the uint8 store; a no-op when it already exists."""
+    if (store_dir / STATS_FILENAME).exists():
+        return
+    write_store(
+        store_dir,
+        train=load_cifar10_arrays(data_root, train=True),
+        test=load_cifar10_arrays(data_root, train=False),
+    )
+
+
+def open_store(store_dir: Path) -> CIFAR10Store:
+    stats = json.loads((store_dir / STATS_FILENAME).read_text(encoding="utf-8"))
+    arrays = {}
+    for split in ("train", "test"):
+        images_path, labels_path = _split_paths(store_dir, split)
+        arrays[f"{split}_images"] = np.load(images_path, mmap_mode="r")
+        arrays[f"{split}_labels"] = np.load(labels_path)
+    return CIFAR10Store(mean=tuple(stats["mean"]), std=tuple(stats["std"]), **arrays)
+
+
+def _approximate_mode(
+    class_counts: np.ndarray, n_draws: int, rng: np.random.RandomState
+) -> np.ndarray:
+    continuous = class_counts / class_counts.sum() * n_draws
+    floored = np.floor(continuous)
+    need_to_add = int(n_draws - floored.sum())
+    if need_to_add > 0:
+        remainder = continuous - floored
+        for value in np.sort(np.unique(remainder))[::-1]:
+            (candidates,) = np.where(remainder == value)
+            add_now = min(len(candidates), need_to_add)
+            floored[rng.choice(candidates, size=add_now, replace=False)] += 1
+            need_to_add -= add_now
+            if need_to_add == 0:
+                break
+    return floored.astype(int)
+
+
+def stratified_split(
+    labels: np.ndarray, val_ratio: float, seed: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """`(train_idx, val_idx)` drawn exactly like the notebook's stratified `train_test_split`.
+
+    Mirrors scikit-learn's `StratifiedShuffleSplit` draw order, so the same seed
+    yields the same indices without depending on scikit-learn.
+    """
+    n_samples = len(labels)
+    n_val = math.ceil(val_ratio * n_samples)
+    n_train = n_samples - n_val
+    _, label_indices = np.unique(labels, return_inverse=True)
+    class_counts = np.bincount(label_indices)
+    class_members = np.split(
+        np.argsort(label_indices, kind="mergesort"), np.cumsum(class_counts)[:-1]
+    )
+
+    rng = np.random.RandomState(seed)
+    train_counts = _approximate_mode(class_counts, n_train, rng)
+    val_counts = _approximate_mode(class_counts - train_counts, n_val, rng)
+    train: list[int] = []
+    val: list[int] = []
+    for members, count, train_count, val_count in zip(
+        class_members, class_counts, train_counts, val_counts, strict=True
+    ):
+        shuffled = members.take(rng.permutation(count), mode="clip")
+        train.extend(shuffled[:train_count])
+        val.extend(shuffled[train_count : train_count + val_count])
+    return rng.permutation(train), rng.permutation(val)
+
+
+def augment_batch(images: torch.Tensor, generator: torch.Generator) -> torch.Tensor:
+    """Zero-padded random crop and horizontal flip of a `[B, H, W, 3]` uint8 batch in one gather."""
+    batch, height, width, _ = images.shape
+    pad = CROP_PADDING
+    padded = torch.nn.functional.pad(images, (0, 0, pad, pad, pad, pad))
+    offsets = torch.randint(0, 2 * pad + 1, (2, batch, 1), generator=generator)
+    rows = offsets[0] + torch.arange(height)
+    columns = offsets[1] + torch.arange(width)
+    flip = torch.rand(batch, 1, generator=generator) < 0.5
+    columns = torch.where(flip, columns.flip(1), columns)
+    return padded[torch.arange(batch)[:, None, None], rows[:, :, None], columns[:, None, :]]
+
+
+class CIFAR10Batches:
+    """Iterate `(images [B, 3, H, W] float32, labels [B] int64)` over `indices` of a split.
+
+    Each epoch draws its shuffle from `seed + epoch` (see `set_epoch`), so runs
+    are reproducible without a per-sample RNG. With `world_size > 1` every rank
+    sees the same shuffled order and takes every `world_size`-th index from it.
+    Shuffled iteration pads the order by repeating its start, so all ranks run
+    the same number of steps as DDP requires. Unshuffled iteration splits
+    exactly, for evaluation.
+    """
+
+    def __init__(
+        self,
+        images: np.ndarray,
+        labels: np.ndarray,
+        indices: np.ndarray,
+        batch_size: int,
+        mean: tuple[float, float, float],
+        std: tuple[float, float, float],
+        augment: bool = False,
+        shuffle: bool = False,
+        seed: int = 0,
+        rank: int = 0,
+        world_size: int = 1,
+    ) -> None:
+        self.images = images
+        self.labels = torch.from_numpy(np.asarray(labels, dtype=np.int64))
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.batch_size = batch_size
+        self.augment = augment
+        self.shuffle = shuffle
+        self.seed = seed
+        self.rank = rank
+        self.world_size = world_size
+        self.epoch = 0
+        mean_t = torch.tensor(mean, dtype=torch.float32).view(1, 3, 1, 1)
+        std_t = torch.tensor(std, dtype=torch.float32).view(1, 3, 1, 1)
+        self._scale = 1.0 / (255.0 * std_t)
+        self._shift = -mean_t / std_t
+
+    def __len__(self) -> int:
+        return math.ceil(self.num_samples / self.batch_size)
+
+    @property
+    def num_samples(self) -> int:
+        """Samples this rank yields per epoch."""
+        if self.shuffle:
+            return math.ceil(len(self.indices) / self.world_size)
+        return len(range(self.rank, len(self.indices), self.world_size))
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+
+    def __iter__(self) -> Iterator[tuple[torch.Tensor, torch.Tensor]]:
+        generator = torch.Generator().manual_seed(self.seed + self.epoch)
+        order = self.indices
+        if self.shuffle:
+            order = order[torch.randperm(len(order), generator=generator).numpy()]
+            padding = self.num_samples * self.world_size - len(order)
+            order = np.concatenate([order, order[:padding]])
+        order = order[self.rank :: self.world_size]
+        if self.world_size > 1:
+            # Distinct crops and flips per rank, still a pure function of (seed, epoch, rank).
+            generator.manual_seed((self.seed + self.epoch) * self.world_size + self.rank)
+        height, width = INPUT_IMAGE_SIZE
+        for start in range(0, len(order), self.batch_size):
+            batch_indices = order[start : start + self.batch_size]
+            # Sorted reads touch the memory map front to back; the batch itself stays shuffled.
+            read_order = np.argsort(batch_indices, kind="stable")
+            pixels = np.empty((len(batch_indices), height, width, 3), dtype=np.uint8)
+            pixels[read_order] = self.images[batch_indices[read_order]]
+            batch = torch.from_numpy(pixels)
+            if self.augment:
+                batch = augment_batch(batch, generator)
+            images = torch.empty(len(batch_indices), 3, height, width)
+            torch.addcmul(self._shift, batch.permute(0, 3, 1, 2), self._scale, out=images)
+            yield images, self.labels[torch.from_numpy(batch_indices)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-root", type=Path, default=DEFAULT_DATA_ROOT)
+    parser.add_argument("--store-dir", type=Path, default=DEFAULT_STORE_DIR)
+    args = parser.parse_args()
+
+    build_store(args.data_root, args.store_dir)
+    store = open_store(args.store_dir)
+    mean = ", ".join(f"{value:.4f}" for value in store.mean)
+    std = ", ".join(f"{value:.4f}" for value in store.std)
+    print(
+        f"{args.store_dir}: train {store.train_images.shape}, test {store.test_images.shape}, "
+        f"mean ({mean}), std ({std})"
+    )
+
+
+if __name__ == "__main__":
+    main()
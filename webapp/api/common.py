@@ -0,0 +1,188 @@
+"""Routes, middleware and error mapping shared by `webapp.main` and `webapp.lite`.
+
+Nothing here imports torch, so the lite app mounts this module as-is; backend
+specifics stay behind `ModelProvider` and the per-app routes.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from time import perf_counter
+from uuid import uuid4
+
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response
+from fastapi.templating import Jinja2Templates
+
+from webapp.core.config import Settings
+from webapp.core.constants import INFERENCE_RETRY_AFTER_SECONDS
+from webapp.schemas.prediction import ModelId, ReportSummaryResponse
+from webapp.services.executor import InferenceQueueFullError
+from webapp.services.http_cache import CachingStaticFiles, encoded_response
+from webapp.services.image_decode import (
+    InvalidImageError,
+    UnsupportedMediaTypeError,
+    UploadTooLargeError,
+)
+from webapp.services.metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    RequestMetrics,
+    server_timing_header,
+    start_request_timing,
+)
+from webapp.services.model_provider import ModelNotLoadedError, ModelProvider
+from webapp.services.reports import encoded_report_summary
+
+logger = logging.getLogger("webapp")
+
+router = APIRouter()
+
+# Raised while decoding an upload or running a forward; `http_error` maps each to a status.
+PREDICTION_ERRORS = (
+    InferenceQueueFullError,
+    ModelNotLoadedError,
+    UnsupportedMediaTypeError,
+    UploadTooLargeError,
+    InvalidImageError,
+)
+
+
+def configure_logging() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+
+def mount_static_files(app: FastAPI, settings: Settings) -> CachingStaticFiles:
+    static_files = CachingStaticFiles(directory=settings.static_dir, url_prefix="/static")
+    app.mount("/static", static_files, name="static")
+    settings.reports_dir.mkdir(parents=True, exist_ok=True)
+    app.mount(
+        "/reports-assets",
+        CachingStaticFiles(directory=settings.reports_dir, url_prefix="/reports-assets"),
+        name="reports-assets",
+    )
+    return static_files
+
+
+def build_templates(settings: Settings, static_files: CachingStaticFiles) -> Jinja2Templates:
+    templates = Jinja2Templates(directory=str(settings.templates_dir))
+    # `{{ asset_url("js/app.js") }}` renders a fingerprinted, immutably cacheable URL.
+    templates.env.globals["asset_url"] = static_files.asset_url
+    return templates
+
+
+def http_error(exc: Exception) -> HTTPException:
+    """The response for one of `PREDICTION_ERRORS`."""
+    if isinstance(exc, InferenceQueueFullError):
+        return HTTPException(
+            status_code=503,
+            detail=str(exc),
+            headers={"Retry-After": str(INFERENCE_RETRY_AFTER_SECONDS)},
+        )
+    if isinstance(exc, ModelNotLoadedError):
+        return HTTPException(status_code=503, detail=str(exc))
+    if isinstance(exc, UnsupportedMediaTypeError):
+        return HTTPException(status_code=415, detail=str(exc))
+    if isinstance(exc, UploadTooLargeError):
+        return HTTPException(status_code=413, detail=str(exc))
+    if isinstance(exc, InvalidImageError):
+        return HTTPException(status_code=422, detail=str(exc))
+    raise TypeError(f"No HTTP mapping for {type(exc).__name__}") from exc
+
+
+def model_choices(request: Request) -> list[ModelId]:
+    """Models this app can answer for: `auto` first when both cascade models are available."""
+    registry: ModelProvider = request.app.state.model_registry
+    available = set(registry.available_model_ids)
+    choices = [model_id for model_id in ModelId if model_id in available]
+    policy = getattr(request.app.state, "cascade_policy", None)
+    if policy is not None and {policy.first, policy.second} <= available:
+        choices.insert(0, ModelId.auto)
+    return choices
+
+
+def health_fields(request: Request) -> dict[str, object]:
+    """The `HealthResponse` fields every app reports; `webapp.main` adds its services' stats."""
+    registry: ModelProvider = request.app.state.model_registry
+    return {
+        "status": "ok",
+        "models_loaded": registry.loaded_model_ids,
+        "version": request.app.state.settings.version,
+        "models_available": registry.available_model_ids,
+    }
+
+
+async def request_context_middleware(request: Request, call_next) -> Response:
+    request_id = request.headers.get("x-request-id", str(uuid4()))
+    request.state.request_id = request_id
+    metrics: RequestMetrics = request.app.state.metrics
+
+    start_request_timing(request)
+    start = perf_counter()
+    metrics.in_flight.inc()
+    try:
+        response = await call_next(request)
+    except Exception:
+        metrics.observe_request(request, 500, perf_counter() - start)
+        raise
+    finally:
+        metrics.in_flight.dec()
+    elapsed = perf_counter() - start
+    elapsed_ms = elapsed * 1000
+    metrics.observe_request(request, response.status_code, elapsed)
+
+    logger.info(
+        json.dumps(
+            {
+                "event": "request",
+                "request_id": request_id,
+                "method": request.method,
+                "path": request.url.path,
+                "status_code": response.status_code,
+                "latency_ms": round(elapsed_ms, 3),
+            }
+        )
+    )
+
+    response.headers["X-Request-ID"] = request_id
+    response.headers["X-Process-Time-MS"] = f"{elapsed_ms:.2f}"
+    response.headers["Server-Timing"] = server_timing_header(request, elapsed)
+    return response
+
+
+@router.get("/", response_class=HTMLResponse)
+async def index(request: Request) -> HTMLResponse:
+    settings: Settings = request.app.state.settings
+    choices = [model_id.value for model_id in model_choices(request)]
+    default_model = settings.default_model_id
+    if default_model not in choices and choices:
+        default_model = choices[0]
+    template = request.app.state.templates
+    return template.TemplateResponse(
+        request,
+        "index.html",
+        {
+            "models": choices,
+            "default_model": default_model,
+            "max_upload_mb": settings.max_upload_bytes // (1024 * 1024),
+        },
+    )
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request) -> PlainTextResponse:
+    registry: ModelProvider = request.app.state.model_registry
+    request_metrics: RequestMetrics = request.app.state.metrics
+    return PlainTextResponse(
+        request_metrics.render(
+            loaded=registry.loaded_model_ids,
+            available=registry.available_model_ids,
+        ),
+        media_type=PROMETHEUS_CONTENT_TYPE,
+    )
+
+
+@router.get("/api/v1/reports", response_model=ReportSummaryResponse)
+async def reports(request: Request) -> Response:
+    body = encoded_report_summary(request.app.state.report_summary)
+    return encoded_response(request.headers, body, media_type="application/json")
@@ -2,49 +2,102 @@
 
 from __future__ import annotations
 
+import contextlib
+from collections.abc import AsyncIterator, Iterator
+from functools import partial
 from time import perf_counter
 from typing import Annotated
+from uuid import uuid4
 
 import torch
-from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile
-from fastapi.responses import HTMLResponse
+from fastapi import (
+    APIRouter,
+    File,
+    Form,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
 
-from webapp.core.constants import CIFAR10_CLASSES
+from webapp.api.common import PREDICTION_ERRORS, health_fields, http_error
+from webapp.core.config import Settings
+from webapp.core.constants import (
+    BINARY_PROBABILITIES_MIME_TYPE,
+    CIFAR10_CLASSES,
+    EMBEDDING_MODEL_ID,
+)
 from webapp.schemas.prediction import (
+    BatchPredictionError,
+    BatchPredictionItem,
+    CascadeDecision,
     ErrorResponse,
     HealthResponse,
     ModelId,
     PredictionResponse,
-    ReportSummaryResponse,
+    SimilarImage,
+    SimilarResponse,
+    StreamFrameError,
     TopKPrediction,
 )
+from webapp.services.batch_inputs import (
+    BatchImage,
+    BatchUpload,
+    DecodedChunk,
+    decode_next_chunk,
+    iter_batch_images,
+    validate_batch_uploads,
+)
+from webapp.services.batching import BatchScheduler, timed_forward
+from webapp.services.cascade import CascadePolicy, confidence_and_margin
+from webapp.services.executor import (
+    InferenceExecutor,
+    InferenceQueueFullError,
+    InferenceReservation,
+)
+from webapp.services.metrics import (
+    record_parse_stage,
+    record_stage,
+    stage_timings,
+    timed_stage,
+)
 from webapp.services.model_registry import ModelRegistry
+from webapp.services.prediction_cache import (
+    CachedPrediction,
+    PredictionCache,
+    cache_key,
+    content_digest,
+)
+from webapp.services.prediction_log import PredictionLog, PredictionSource
 from webapp.services.preprocess import (
     InvalidImageError,
-    UnsupportedMediaTypeError,
-    UploadTooLargeError,
-    image_bytes_to_tensor,
-    validate_upload,
+    decode_frames,
+    decode_image_fast,
+    is_array_upload,
+    validate_content_type,
+    validate_upload_size,
 )
+from webapp.services.similarity import SimilarityIndex
+from webapp.services.streaming import FrameFormat, FrameStream
 
 router = APIRouter()
 
 
-@torch.inference_mode()
-def _predict_with_model(
+def _build_prediction_response(
     *,
-    registry: ModelRegistry,
     model_id: ModelId,
-    image_tensor: torch.Tensor,
+    probabilities: torch.Tensor,
     top_k: int,
+    inference_ms: float,
     request_id: str | None,
+    cached: bool = False,
+    cascade: CascadeDecision | None = None,
 ) -> PredictionResponse:
-    model = registry.get_model(model_id)
-    start = perf_counter()
-    logits = model(image_tensor.to(registry.device))
-    probabilities = torch.softmax(logits, dim=1).squeeze(0).cpu()
-    inference_ms = (perf_counter() - start) * 1000
-
     safe_top_k = max(1, min(top_k, len(CIFAR10_CLASSES)))
     values, indices = torch.topk(probabilities, safe_top_k)
     predictions = [
@@ -62,31 +115,202 @@ def _predict_with_model(
         top_k=predictions,
         inference_ms=round(float(inference_ms), 3),
         request_id=request_id,
+        cached=cached,
+        cascade=cascade,
     )
 
 
-@router.get("/", response_class=HTMLResponse)
-async def index(request: Request) -> HTMLResponse:
-    settings = request.app.state.settings
-    template = request.app.state.templates
-    return template.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "default_model": settings.default_model_id,
-            "max_upload_mb": settings.max_upload_bytes // (1024 * 1024),
-        },
+def _wants_binary(request: Request) -> bool:
+    return BINARY_PROBABILITIES_MIME_TYPE in request.headers.get("accept", "")
+
+
+def _probability_bytes(probabilities: torch.Tensor) -> bytes:
+    """Row-major little-endian float32, `len(CIFAR10_CLASSES)` values per item."""
+    return probabilities.numpy().astype("<f4", copy=False).tobytes()
+
+
+def _log_prediction(
+    request: Request,
+    *,
+    model_id: ModelId,
+    probabilities: torch.Tensor,
+    digest: str,
+    cached: bool,
+    inference_ms: float,
+) -> None:
+    prediction_log: PredictionLog | None = request.app.state.prediction_log
+    if prediction_log is None:
+        return
+    timings = stage_timings(request)
+    prediction_log.submit(
+        request_id=getattr(request.state, "request_id", None),
+        model_id=model_id,
+        source=PredictionSource.predict,
+        probabilities=probabilities,
+        input_digest=digest,
+        cached=cached,
+        decode_ms=(timings.get("decode", 0.0) + timings.get("preprocess", 0.0)) * 1000,
+        queue_ms=timings.get("queue", 0.0) * 1000,
+        forward_ms=inference_ms,
+        latency_ms=(perf_counter() - request.state.started_at) * 1000,
     )
 
 
+def _log_batch_chunk(
+    prediction_log: PredictionLog,
+    chunk: DecodedChunk,
+    probabilities: torch.Tensor,
+    *,
+    model_id: ModelId,
+    request_id: str | None,
+    inference_ms: float,
+    started_at: float,
+) -> None:
+    latency_ms = (perf_counter() - started_at) * 1000
+    for (index, _), digest, row in zip(chunk.entries, chunk.digests, probabilities, strict=True):
+        prediction_log.submit(
+            request_id=request_id,
+            model_id=model_id,
+            source=PredictionSource.batch,
+            probabilities=row,
+            input_digest=digest,
+            item=index,
+            forward_ms=inference_ms,
+            latency_ms=latency_ms,
+        )
+
+
+async def _stream_batch_predictions(
+    *,
+    reservation: InferenceReservation,
+    registry: ModelRegistry,
+    settings: Settings,
+    images: Iterator[BatchImage],
+    model_id: ModelId,
+    top_k: int,
+    request_id: str | None,
+    binary: bool = False,
+    prediction_log: PredictionLog | None = None,
+    started_at: float = 0.0,
+) -> AsyncIterator[str | bytes]:
+    try:
+        model = await reservation.run(registry.get_model, model_id)
+        while True:
+            # One chunk in flight per stream, inside the slot reserved before streaming
+            # began, so later chunks are neither rejected halfway nor left uncapped.
+            chunk = await reservation.run(
+                decode_next_chunk,
+                images,
+                settings.predict_batch_chunk_size,
+                settings.max_upload_bytes,
+                settings.normalization_mean,
+                settings.normalization_std,
+                with_digests=prediction_log is not None,
+            )
+            if chunk is None:
+                return
+
+            if binary:
+                # Chunk items have consecutive indices; failed items keep their row as NaNs.
+                first_index = min(index for index, *_ in [*chunk.entries, *chunk.errors])
+                matrix = torch.full(
+                    (len(chunk.entries) + len(chunk.errors), len(CIFAR10_CLASSES)), float("nan")
+                )
+                if chunk.entries:
+                    probabilities, inference_ms = await reservation.run(
+                        timed_forward, model, chunk.images, registry.device
+                    )
+                    rows = torch.tensor([index - first_index for index, _ in chunk.entries])
+                    matrix[rows] = probabilities
+                    if prediction_log is not None:
+                        _log_batch_chunk(
+                            prediction_log,
+                            chunk,
+                            probabilities,
+                            model_id=model_id,
+                            request_id=request_id,
+                            inference_ms=inference_ms,
+                            started_at=started_at,
+                        )
+                yield _probability_bytes(matrix)
+                continue
+
+            lines: list[tuple[int, str]] = [
+                (
+                    index,
+                    BatchPredictionError(
+                        index=index,
+                        filename=filename,
+                        detail=detail,
+                        request_id=request_id,
+                    ).model_dump_json(),
+                )
+                for index, filename, detail in chunk.errors
+            ]
+            if chunk.entries:
+                probabilities, inference_ms = await reservation.run(
+                    timed_forward, model, chunk.images, registry.device
+                )
+                if prediction_log is not None:
+                    _log_batch_chunk(
+                        prediction_log,
+                        chunk,
+                        probabilities,
+                        model_id=model_id,
+                        request_id=request_id,
+                        inference_ms=inference_ms,
+                        started_at=started_at,
+                    )
+                for (index, filename), row in zip(chunk.entries, probabilities, strict=True):
+                    response = _build_prediction_response(
+                        model_id=model_id,
+                        probabilities=row,
+                        top_k=top_k,
+                        inference_ms=inference_ms,
+                        request_id=request_id,
+                    )
+                    item = BatchPredictionItem(
+                        index=index,
+                        filename=filename,
+                        **response.model_dump(),
+                    )
+                    lines.append((index, item.model_dump_json()))
+
+            lines.sort(key=lambda line: line[0])
+            yield "".join(f"{line}\n" for _, line in lines)
+    finally:
+        reservation.release()
+
+
+def _timed_search(
+    similarity_index: SimilarityIndex, images: torch.Tensor, top_k: int
+) -> tuple[list[list[tuple[int, str, float]]], float]:
+    start = perf_counter()
+    neighbors = similarity_index.search(images, top_k)
+    return neighbors, perf_counter() - start
+
+
 @router.get("/health", response_model=HealthResponse)
 async def health(request: Request) -> HealthResponse:
-    registry = request.app.state.model_registry
-    settings = request.app.state.settings
     return HealthResponse(
-        status="ok",
-        models_loaded=registry.loaded_model_ids,
-        version=settings.version,
+        **health_fields(request),
+        model_memory=request.app.state.model_registry.stats(),
+        batching=request.app.state.batch_scheduler.stats(),
+        inference_queue=request.app.state.inference_executor.stats(),
+        prediction_cache=request.app.state.prediction_cache.stats(),
+        hot_reload=request.app.state.artifact_watcher.stats(),
+        similarity_index=(
+            request.app.state.similarity_index.stats()
+            if request.app.state.similarity_index is not None
+            else None
+        ),
+        autotune=request.app.state.autotune,
+        streaming=request.app.state.stream_counters.stats(),
+        prediction_log=(
+            request.app.state.prediction_log.stats()
+            if request.app.state.prediction_log is not None
+            else None
+        ),
     )
 
 
@@ -96,6 +320,7 @@ async def health(request: Request) -> HealthResponse:
     responses={
         413: {"model": ErrorResponse},
         415: {"model": ErrorResponse},
+        503: {"model": ErrorResponse},
     },
 )
 async def predict(
@@ -103,48 +328,315 @@ async def predict(
     file: UploadFile = File(...),
     model_id: Annotated[ModelId, Form()] = ModelId.cnnv2,
     top_k: Annotated[int, Form(ge=1, le=10)] = 5,
-) -> PredictionResponse:
+) -> Response:
+    record_parse_stage(request)
+    request.state.model_id = model_id
     settings = request.app.state.settings
+    inference_executor: InferenceExecutor = request.app.state.inference_executor
+    batch_scheduler: BatchScheduler = request.app.state.batch_scheduler
+    prediction_cache: PredictionCache = request.app.state.prediction_cache
+    registry: ModelRegistry = request.app.state.model_registry
+
+    decoded: list[torch.Tensor] = []
+    array_upload = is_array_upload(file.filename, file.content_type)
+
+    # `UploadLimitMiddleware` already capped the body while it streamed in; the
+    # spooled upload is hashed and decoded in place rather than read into bytes.
+    async def decode() -> torch.Tensor:
+        if not decoded:
+            decode_timings: dict[str, float] = {}
+            if array_upload:
+                decoder = partial(decode_frames, max_frames=1)
+            else:
+                decoder = decode_image_fast
+            decoded.append(
+                await inference_executor.run(
+                    decoder,
+                    source=file.file,
+                    mean=settings.normalization_mean,
+                    std=settings.normalization_std,
+                    timings=decode_timings,
+                )
+            )
+            for stage, seconds in decode_timings.items():
+                record_stage(request, stage, seconds)
+        return decoded[0]
 
-    raw_bytes = await file.read()
+    async def predict_with(target_id: ModelId, digest: str) -> tuple[CachedPrediction, bool]:
+        async def compute() -> CachedPrediction:
+            image_tensor = await decode()
+            submitted_at = perf_counter()
+            result = await batch_scheduler.predict(target_id, image_tensor)
+            forward_seconds = result.inference_ms / 1000
+            record_stage(request, "queue", perf_counter() - submitted_at - forward_seconds)
+            record_stage(request, "forward", forward_seconds)
+            # Clone so the entry does not pin the whole batch's probability matrix.
+            return CachedPrediction(
+                probabilities=result.probabilities.clone(),
+                inference_ms=result.inference_ms,
+            )
+
+        # Resolved before the lookup, so a lazily loaded model's key carries the hash
+        # of the checkpoint that answers, not an empty one that outlives a reload.
+        if registry.is_resident(target_id):
+            checkpoint_sha256 = registry.serving_checkpoint_sha256(target_id)
+        else:
+            checkpoint_sha256 = await inference_executor.run(
+                registry.serving_checkpoint_sha256, target_id, bounded=False
+            )
+        key = cache_key(
+            digest,
+            target_id,
+            checkpoint_sha256,
+            input_kind="array" if array_upload else "image",
+        )
+        return await prediction_cache.get_or_compute(key, compute)
+
+    cascade: CascadeDecision | None = None
     try:
-        validate_upload(
-            content_type=file.content_type,
-            raw_bytes=raw_bytes,
-            max_upload_bytes=settings.max_upload_bytes,
+        validate_content_type(file.content_type, allow_arrays=True)
+        validate_upload_size(file.size or 0, settings.max_upload_bytes)
+        with timed_stage(request, "hash"):
+            digest = await inference_executor.run(content_digest, file.file)
+        if model_id != ModelId.auto:
+            answered_by = model_id
+            prediction, cached = await predict_with(model_id, digest)
+            inference_ms = 0.0 if cached else prediction.inference_ms
+        else:
+            policy: CascadePolicy = request.app.state.cascade_policy
+            first, first_cached = await predict_with(policy.first, digest)
+            confidence, margin = confidence_and_margin(first.probabilities)
+            escalated = policy.should_escalate(first.probabilities)
+            cascade = CascadeDecision(
+                first_model_id=policy.first,
+                first_confidence=round(float(confidence), 6),
+                first_margin=round(float(margin), 6),
+                escalated=escalated,
+            )
+            answered_by, prediction, cached = policy.first, first, first_cached
+            inference_ms = 0.0 if first_cached else first.inference_ms
+            if escalated:
+                answered_by = policy.second
+                prediction, cached = await predict_with(policy.second, digest)
+                inference_ms += 0.0 if cached else prediction.inference_ms
+                cached = cached and first_cached
+    except PREDICTION_ERRORS as exc:
+        raise http_error(exc) from exc
+
+    _log_prediction(
+        request,
+        model_id=answered_by,
+        probabilities=prediction.probabilities,
+        digest=digest,
+        cached=cached,
+        inference_ms=inference_ms,
+    )
+    if _wants_binary(request):
+        with timed_stage(request, "serialize"):
+            body = _probability_bytes(prediction.probabilities.unsqueeze(0))
+        return Response(
+            content=body,
+            media_type=BINARY_PROBABILITIES_MIME_TYPE,
+            headers={"X-Model-Id": answered_by.value, "X-Cached": str(cached).lower()},
         )
-        image_tensor = image_bytes_to_tensor(
-            image_bytes=raw_bytes,
-            mean=settings.normalization_mean,
-            std=settings.normalization_std,
+
+    request_id = getattr(request.state, "request_id", None)
+    with timed_stage(request, "serialize"):
+        body = _build_prediction_response(
+            model_id=answered_by,
+            probabilities=prediction.probabilities,
+            top_k=top_k,
+            inference_ms=inference_ms,
+            request_id=request_id,
+            cached=cached,
+            cascade=cascade,
+        ).model_dump_json()
+    return Response(content=body, media_type="application/json")
+
+
+@router.post(
+    "/api/v1/similar",
+    response_model=SimilarResponse,
+    responses={
+        413: {"model": ErrorResponse},
+        415: {"model": ErrorResponse},
+        503: {"model": ErrorResponse},
+    },
+)
+async def similar(
+    request: Request,
+    file: UploadFile = File(...),
+    top_k: Annotated[int, Form(ge=1, le=100)] = 5,
+) -> SimilarResponse:
+    """Training images whose `cnnv2` embedding is closest (by cosine) to the upload's."""
+    record_parse_stage(request)
+    request.state.model_id = ModelId(EMBEDDING_MODEL_ID)
+    settings = request.app.state.settings
+    inference_executor: InferenceExecutor = request.app.state.inference_executor
+    similarity_index: SimilarityIndex | None = request.app.state.similarity_index
+    if similarity_index is None:
+        raise HTTPException(status_code=503, detail=request.app.state.similarity_index_error)
+
+    try:
+        validate_content_type(file.content_type, allow_arrays=True)
+        validate_upload_size(file.size or 0, settings.max_upload_bytes)
+        if is_array_upload(file.filename, file.content_type):
+            decoder = partial(decode_frames, max_frames=1)
+        else:
+            decoder = decode_image_fast
+        decode_timings: dict[str, float] = {}
+        # Decoded with the normalization the index was built with.
+        image_tensor = await inference_executor.run(
+            decoder,
+            source=file.file,
+            mean=similarity_index.mean,
+            std=similarity_index.std,
+            timings=decode_timings,
         )
-    except UnsupportedMediaTypeError as exc:
-        raise HTTPException(
-            status_code=415,
-            detail=str(exc),
-        ) from exc
-    except UploadTooLargeError as exc:
-        raise HTTPException(
-            status_code=413,
-            detail=str(exc),
-        ) from exc
-    except InvalidImageError as exc:
+        for stage, seconds in decode_timings.items():
+            record_stage(request, stage, seconds)
+        neighbors, search_seconds = await inference_executor.run(
+            _timed_search, similarity_index, image_tensor, top_k
+        )
+        record_stage(request, "forward", search_seconds)
+    except PREDICTION_ERRORS as exc:
+        raise http_error(exc) from exc
+
+    return SimilarResponse(
+        model_id=ModelId(EMBEDDING_MODEL_ID),
+        neighbors=[
+            SimilarImage(index=index, class_name=class_name, similarity=round(similarity, 6))
+            for index, class_name, similarity in neighbors[0]
+        ],
+        search_ms=round(search_seconds * 1000, 3),
+        request_id=getattr(request.state, "request_id", None),
+    )
+
+
+@router.post(
+    "/api/v1/predict/batch",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}, BINARY_PROBABILITIES_MIME_TYPE: {}},
+            "description": (
+                "One BatchPredictionItem or BatchPredictionError JSON object per line, or with "
+                "`Accept: application/octet-stream` one float32 probability row per item "
+                "(NaN for failed items)."
+            ),
+        },
+        422: {"model": ErrorResponse},
+        503: {"model": ErrorResponse},
+    },
+)
+async def predict_batch(
+    request: Request,
+    files: list[UploadFile] = File(...),
+    model_id: Annotated[ModelId, Form()] = ModelId.cnnv2,
+    top_k: Annotated[int, Form(ge=1, le=10)] = 5,
+) -> StreamingResponse:
+    record_parse_stage(request)
+    request.state.model_id = model_id
+    settings = request.app.state.settings
+    inference_executor: InferenceExecutor = request.app.state.inference_executor
+    registry: ModelRegistry = request.app.state.model_registry
+
+    if model_id == ModelId.auto:
         raise HTTPException(
             status_code=422,
-            detail=str(exc),
-        ) from exc
+            detail="model_id=auto is only supported by /api/v1/predict.",
+        )
 
-    registry = request.app.state.model_registry
-    request_id = getattr(request.state, "request_id", None)
-    return _predict_with_model(
+    binary = _wants_binary(request)
+    uploads = [
+        BatchUpload(filename=file.filename, content_type=file.content_type, file=file.file)
+        for file in files
+    ]
+    try:
+        # Held by the response for its whole stream, so every chunk counts against capacity.
+        reservation = inference_executor.reserve()
+    except InferenceQueueFullError as exc:
+        raise http_error(exc) from exc
+    try:
+        await reservation.run(validate_batch_uploads, uploads)
+        if not registry.is_available(model_id):
+            raise HTTPException(
+                status_code=503,
+                detail=f"Model {model_id.value} is not loaded.",
+            )
+    except InvalidImageError as exc:
+        reservation.release()
+        raise http_error(exc) from exc
+    except BaseException:
+        reservation.release()
+        raise
+
+    return StreamingResponse(
+        _stream_batch_predictions(
+            reservation=reservation,
+            registry=registry,
+            settings=settings,
+            images=iter_batch_images(uploads, settings.max_upload_bytes),
+            model_id=model_id,
+            top_k=top_k,
+            request_id=getattr(request.state, "request_id", None),
+            binary=binary,
+            prediction_log=request.app.state.prediction_log,
+            started_at=request.state.started_at,
+        ),
+        media_type=BINARY_PROBABILITIES_MIME_TYPE if binary else "application/x-ndjson",
+        headers={"X-Model-Id": model_id.value} if binary else None,
+        # Also releases the slot when the client leaves before the stream starts.
+        background=BackgroundTask(reservation.release),
+    )
+
+
+@router.websocket("/api/v1/stream")
+async def stream(
+    websocket: WebSocket,
+    model_id: ModelId = ModelId.cnnv2,
+    top_k: Annotated[int, Query(ge=1, le=10)] = 5,
+    frame_format: FrameFormat = FrameFormat.image,
+    max_pending: Annotated[int | None, Query(ge=1)] = None,
+) -> None:
+    """Classify frames sent as binary messages over one session (see `webapp.services.streaming`).
+
+    `max_pending` may lower, but not raise, the server's `STREAM_MAX_PENDING_FRAMES`.
+    """
+    settings: Settings = websocket.app.state.settings
+    registry: ModelRegistry = websocket.app.state.model_registry
+    batch_scheduler: BatchScheduler = websocket.app.state.batch_scheduler
+    await websocket.accept()
+
+    detail = None
+    if model_id == ModelId.auto:
+        detail = "model_id=auto is only supported by /api/v1/predict."
+    elif not registry.is_available(model_id):
+        detail = f"Model {model_id.value} is not loaded."
+    if detail is not None:
+        await websocket.send_text(StreamFrameError(type="error", detail=detail).model_dump_json())
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=detail)
+        return
+
+    session = FrameStream(
+        websocket,
         registry=registry,
+        executor=websocket.app.state.inference_executor,
+        counters=websocket.app.state.stream_counters,
         model_id=model_id,
-        image_tensor=image_tensor,
         top_k=top_k,
-        request_id=request_id,
+        frame_format=frame_format,
+        max_pending=min(
+            max_pending or settings.stream_max_pending_frames,
+            settings.stream_max_pending_frames,
+        ),
+        max_batch_size=batch_scheduler.max_batch_size,
+        max_frame_bytes=settings.max_upload_bytes,
+        mean=settings.normalization_mean,
+        std=settings.normalization_std,
+        request_id=websocket.headers.get("x-request-id", str(uuid4())),
+        prediction_log=websocket.app.state.prediction_log,
     )
-
-
-@router.get("/api/v1/reports", response_model=ReportSummaryResponse)
-async def reports(request: Request) -> ReportSummaryResponse:
-    return request.app.state.report_summary
+    # A client that closes mid-reply ends the session like one that closes between frames.
+    with contextlib.suppress(WebSocketDisconnect):
+        await session.run()
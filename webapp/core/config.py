@@ -18,6 +18,29 @@ class Settings:
     default_model_id: str
     normalization_mean: tuple[float, float, float]
     normalization_std: tuple[float, float, float]
+    batch_max_size: int
+    batch_max_wait_ms: float
+    inference_workers: int
+    inference_queue_size: int
+    predict_batch_chunk_size: int
+    prediction_cache_size: int
+    prediction_cache_ttl_seconds: float
+    model_optimization: str
+    model_channels_last: bool
+    model_loading: str
+    model_memory_budget_mb: float
+    pinned_models: tuple[str, ...]
+    cascade_models: tuple[str, str]
+    cascade_min_confidence: float
+    cascade_min_margin: float
+    hot_reload_interval_seconds: float
+    autotune: str
+    autotune_latency_budget_ms: float
+    stream_max_pending_frames: int
+    prediction_log: bool
+    prediction_log_buffer_records: int
+    prediction_log_flush_seconds: float
+    prediction_log_segment_mb: float
 
     @property
     def checkpoints_dir(self) -> Path:
@@ -37,6 +60,18 @@ class Settings:
             )
         )
 
+    @property
+    def embeddings_dir(self) -> Path:
+        return Path(os.getenv("EMBEDDINGS_DIR", self.checkpoints_dir / "embeddings"))
+
+    @property
+    def autotune_dir(self) -> Path:
+        return Path(os.getenv("AUTOTUNE_DIR", self.checkpoints_dir / "autotune"))
+
+    @property
+    def prediction_log_dir(self) -> Path:
+        return Path(os.getenv("PREDICTION_LOG_DIR", self.repo_root / "src" / "prediction_logs"))
+
     @property
     def templates_dir(self) -> Path:
         return self.repo_root / "webapp" / "web" / "templates"
@@ -58,7 +93,127 @@ def load_settings() -> Settings:
         default_model_id=os.getenv("DEFAULT_MODEL_ID", constants.DEFAULT_MODEL_ID),
         normalization_mean=constants.NORMALIZATION_MEAN,
         normalization_std=constants.NORMALIZATION_STD,
+        batch_max_size=max(1, int(os.getenv("BATCH_MAX_SIZE", str(constants.DEFAULT_BATCH_MAX_SIZE)))),
+        batch_max_wait_ms=max(
+            0.0, float(os.getenv("BATCH_MAX_WAIT_MS", str(constants.DEFAULT_BATCH_MAX_WAIT_MS)))
+        ),
+        inference_workers=max(
+            1, int(os.getenv("INFERENCE_WORKERS", str(constants.DEFAULT_INFERENCE_WORKERS)))
+        ),
+        inference_queue_size=max(
+            0,
+            int(os.getenv("INFERENCE_QUEUE_SIZE", str(constants.DEFAULT_INFERENCE_QUEUE_SIZE))),
+        ),
+        predict_batch_chunk_size=max(
+            1,
+            int(
+                os.getenv(
+                    "PREDICT_BATCH_CHUNK_SIZE",
+                    str(constants.DEFAULT_PREDICT_BATCH_CHUNK_SIZE),
+                )
+            ),
+        ),
+        prediction_cache_size=max(
+            0,
+            int(os.getenv("PREDICTION_CACHE_SIZE", str(constants.DEFAULT_PREDICTION_CACHE_SIZE))),
+        ),
+        prediction_cache_ttl_seconds=float(
+            os.getenv(
+                "PREDICTION_CACHE_TTL_SECONDS",
+                str(constants.DEFAULT_PREDICTION_CACHE_TTL_SECONDS),
+            )
+        ),
+        model_optimization=os.getenv(
+            "MODEL_OPTIMIZATION", constants.DEFAULT_MODEL_OPTIMIZATION
+        ).lower(),
+        model_channels_last=os.getenv("MODEL_CHANNELS_LAST", "0").lower() in {"1", "true", "yes"},
+        model_loading=os.getenv("MODEL_LOADING", constants.DEFAULT_MODEL_LOADING).lower(),
+        model_memory_budget_mb=max(
+            0.0,
+            float(
+                os.getenv(
+                    "MODEL_MEMORY_BUDGET_MB",
+                    str(constants.DEFAULT_MODEL_MEMORY_BUDGET_MB),
+                )
+            ),
+        ),
+        pinned_models=tuple(
+            model_id.strip()
+            for model_id in os.getenv("PINNED_MODELS", "").split(",")
+            if model_id.strip()
+        ),
+        cascade_models=_cascade_models(),
+        cascade_min_confidence=float(
+            os.getenv("CASCADE_MIN_CONFIDENCE", str(constants.DEFAULT_CASCADE_MIN_CONFIDENCE))
+        ),
+        cascade_min_margin=float(
+            os.getenv("CASCADE_MIN_MARGIN", str(constants.DEFAULT_CASCADE_MIN_MARGIN))
+        ),
+        hot_reload_interval_seconds=max(
+            0.0,
+            float(
+                os.getenv(
+                    "HOT_RELOAD_INTERVAL_SECONDS",
+                    str(constants.DEFAULT_HOT_RELOAD_INTERVAL_SECONDS),
+                )
+            ),
+        ),
+        autotune=os.getenv("AUTOTUNE", constants.DEFAULT_AUTOTUNE).lower(),
+        autotune_latency_budget_ms=max(
+            0.0,
+            float(
+                os.getenv(
+                    "AUTOTUNE_LATENCY_BUDGET_MS",
+                    str(constants.DEFAULT_AUTOTUNE_LATENCY_BUDGET_MS),
+                )
+            ),
+        ),
+        stream_max_pending_frames=max(
+            1,
+            int(
+                os.getenv(
+                    "STREAM_MAX_PENDING_FRAMES",
+                    str(constants.DEFAULT_STREAM_MAX_PENDING_FRAMES),
+                )
+            ),
+        ),
+        prediction_log=os.getenv("PREDICTION_LOG", "0").lower() in {"1", "true", "yes"},
+        prediction_log_buffer_records=max(
+            2,
+            int(
+                os.getenv(
+                    "PREDICTION_LOG_BUFFER_RECORDS",
+                    str(constants.DEFAULT_PREDICTION_LOG_BUFFER_RECORDS),
+                )
+            ),
+        ),
+        prediction_log_flush_seconds=max(
+            0.01,
+            float(
+                os.getenv(
+                    "PREDICTION_LOG_FLUSH_SECONDS",
+                    str(constants.DEFAULT_PREDICTION_LOG_FLUSH_SECONDS),
+                )
+            ),
+        ),
+        prediction_log_segment_mb=max(
+            1.0,
+            float(
+                os.getenv(
+                    "PREDICTION_LOG_SEGMENT_MB",
+                    str(constants.DEFAULT_PREDICTION_LOG_SEGMENT_MB),
+                )
+            ),
+        ),
     )
 
 
+def _cascade_models() -> tuple[str, str]:
+    raw = os.getenv("CASCADE_MODELS", ",".join(constants.DEFAULT_CASCADE_MODELS))
+    model_ids = [model_id.strip() for model_id in raw.split(",") if model_id.strip()]
+    if len(model_ids) != 2:
+        raise ValueError(f"CASCADE_MODELS must name exactly two models, got {raw!r}.")
+    return model_ids[0], model_ids[1]
+
+
 settings = load_settings()
@@ -23,11 +23,107 @@ MODEL_CHECKPOINT_FILENAMES = {
     "cnnv2": "best_cnnv2.pth",
 }
 
+# INT8 variants produced by `python -m tools.quantize`; served only when present.
+QUANTIZED_CHECKPOINT_FILENAMES = {
+    "baseline_int8": "baseline_int8.pth",
+    "cnnv2_int8": "cnnv2_int8.pth",
+}
+
+# Channel-pruned CNNV2 written by `python -m tools.prune`; served only when present.
+PRUNED_CHECKPOINT_FILENAMES = {
+    "cnnv2_pruned": "cnnv2_pruned.pth",
+}
+
+# Torch-free weights for `webapp.lite`, written by `python -m tools.export_numpy`.
+NUMPY_CHECKPOINT_FILENAMES = {
+    "baseline": "baseline.npz",
+}
+
 DEFAULT_MODEL_ID = "cnnv2"
 ALLOWED_IMAGE_MIME_TYPES = {"image/jpeg", "image/png"}
+# Pre-decoded inputs: concatenated 32x32x3 uint8 HWC frames, or a `.npy` of shape [N, 32, 32, 3].
+ARRAY_MIME_TYPES = {"application/octet-stream", "application/x-npy"}
+# `Accept` value that switches prediction responses to little-endian float32 probability rows.
+BINARY_PROBABILITIES_MIME_TYPE = "application/octet-stream"
+ARCHIVE_MIME_TYPES = {
+    "application/zip",
+    "application/x-zip-compressed",
+    "application/x-tar",
+    "application/gzip",
+    "application/x-gzip",
+    "application/x-gtar",
+}
 
 INPUT_IMAGE_SIZE = (32, 32)
 NORMALIZATION_MEAN = (0.5, 0.5, 0.5)
 NORMALIZATION_STD = (0.5, 0.5, 0.5)
 
 MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+# Allowance on top of the file limit for multipart boundaries, part headers and form fields.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+DEFAULT_BATCH_MAX_SIZE = 32
+DEFAULT_BATCH_MAX_WAIT_MS = 2.0
+
+# Pool threads, not CPU threads: every forward already fans out over torch's
+# intra-op pool, so two workers let one job decode while another runs a forward
+# without multiplying torch's threads by the pool size.
+DEFAULT_INFERENCE_WORKERS = 2
+DEFAULT_INFERENCE_QUEUE_SIZE = 64
+INFERENCE_RETRY_AFTER_SECONDS = 1
+
+DEFAULT_PREDICT_BATCH_CHUNK_SIZE = 64
+
+DEFAULT_PREDICTION_CACHE_SIZE = 1024
+DEFAULT_PREDICTION_CACHE_TTL_SECONDS = 600.0
+
+# One of: none, fuse, torchscript, compile (see webapp/services/optimize.py).
+DEFAULT_MODEL_OPTIMIZATION = "none"
+
+# `model_id=auto`: answer with the first model unless its top-1 probability or its
+# top-1/top-2 margin falls below these thresholds (see `tools.cascade_sweep`).
+DEFAULT_CASCADE_MODELS = ("baseline", "cnnv2")
+DEFAULT_CASCADE_MIN_CONFIDENCE = 0.8
+DEFAULT_CASCADE_MIN_MARGIN = 0.0
+
+# "eager" loads every checkpoint at startup; "lazy" loads each model on first use.
+DEFAULT_MODEL_LOADING = "eager"
+# Resident parameter/buffer budget for loaded models; 0 disables eviction.
+DEFAULT_MODEL_MEMORY_BUDGET_MB = 0.0
+
+# How often checkpoints_dir and reports_dir are polled for changed files; 0 disables.
+DEFAULT_HOT_RELOAD_INTERVAL_SECONDS = 2.0
+
+# HTTP caching: `?v=<fingerprint>` asset URLs never change content, so they are immutable;
+# everything else is revalidated against its content-hash ETag on each use.
+ASSET_FINGERPRINT_LENGTH = 12
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+# Content-coding and file suffix of the variants `tools.precompress` writes, in preference order.
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+PRECOMPRESSIBLE_SUFFIXES = (".css", ".js", ".json", ".svg", ".html", ".csv")
+
+# `/api/v1/similar`: `CNNV2.embed` vectors of the CIFAR-10 training split, written by
+# `python -m tools.embeddings`. Rows are scored in blocks of this many per matrix product.
+EMBEDDING_MODEL_ID = "cnnv2"
+SIMILARITY_BLOCK_ROWS = 8192
+
+# `/api/v1/stream`: frames a WebSocket session may have waiting for inference. A frame that
+# arrives while this many are pending evicts the oldest one, which is reported as dropped.
+DEFAULT_STREAM_MAX_PENDING_FRAMES = 8
+
+# Prediction log (see webapp/services/prediction_log.py): records buffered between writes,
+# how often the writer appends them, and the size at which a segment file rotates.
+DEFAULT_PREDICTION_LOG_BUFFER_RECORDS = 8192
+DEFAULT_PREDICTION_LOG_FLUSH_SECONDS = 1.0
+DEFAULT_PREDICTION_LOG_SEGMENT_MB = 64.0
+
+# Startup autotuning (see webapp/services/autotune.py): "off", "on" (apply the host's saved
+# profile, tuning once when there is none) or "retune" (tune on every start).
+DEFAULT_AUTOTUNE = "off"
+# Largest micro-batch whose slowest model forward stays within this budget becomes the cap.
+DEFAULT_AUTOTUNE_LATENCY_BUDGET_MS = 50.0
+AUTOTUNE_BATCH_SIZES = (1, 2, 4, 8, 16, 32, 64)
+# Thread counts and memory formats are compared on batches of this size.
+AUTOTUNE_REFERENCE_BATCH = 8
+AUTOTUNE_REPEATS = 5
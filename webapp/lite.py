@@ -0,0 +1,151 @@
+"""Torch-free FastAPI entrypoint: serves `baseline` through the NumPy backend.
+
+    uvicorn webapp.lite:app --host 0.0.0.0 --port 8000
+
+Nothing imported here (directly or transitively) imports torch or torchvision,
+so the process starts in a fraction of the time and fits in an image without
+them. Only the models in `NUMPY_CHECKPOINT_FILENAMES` are served; requests for
+any other model answer 503. The index, `/metrics`, reports and request logging
+come from `webapp.api.common`, as in `webapp.main`; micro-batching and the
+prediction cache are only available there.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import Annotated, BinaryIO
+
+import numpy as np
+from fastapi import FastAPI, File, Form, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from webapp.api import common
+from webapp.core.config import settings
+from webapp.core.constants import CIFAR10_CLASSES
+from webapp.schemas.prediction import (
+    ErrorResponse,
+    HealthResponse,
+    ModelId,
+    PredictionResponse,
+    TopKPrediction,
+)
+from webapp.services.image_decode import (
+    decode_image_array,
+    validate_content_type,
+    validate_upload_size,
+)
+from webapp.services.metrics import RequestMetrics
+from webapp.services.numpy_backend import NumpyModelRegistry, softmax
+from webapp.services.reports import load_report_summary
+from webapp.services.upload_limits import UploadLimitMiddleware
+
+logger = logging.getLogger("webapp")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    common.configure_logging()
+
+    model_registry = NumpyModelRegistry(settings)
+    model_registry.load_all()
+
+    app.state.settings = settings
+    app.state.model_registry = model_registry
+    app.state.report_summary = load_report_summary(settings)
+    app.state.metrics = RequestMetrics()
+    app.state.templates = common.build_templates(settings, static_files)
+
+    logger.info(
+        json.dumps(
+            {
+                "event": "startup",
+                "backend": "numpy",
+                "models_loaded": [model_id.value for model_id in model_registry.loaded_model_ids],
+                "checkpoints_dir": str(settings.checkpoints_dir),
+            }
+        )
+    )
+
+    yield
+    logger.info(json.dumps({"event": "shutdown"}))
+
+
+app = FastAPI(
+    title=f"{settings.app_name} (NumPy backend)",
+    version=settings.version,
+    docs_url="/docs",
+    redoc_url="/redoc",
+    lifespan=lifespan,
+)
+
+static_files = common.mount_static_files(app, settings)
+app.add_middleware(UploadLimitMiddleware, limits={"/api/v1/predict": settings.max_upload_bytes})
+app.middleware("http")(common.request_context_middleware)
+app.include_router(common.router)
+
+
+def _predict_probabilities(
+    registry: NumpyModelRegistry,
+    model_id: ModelId,
+    upload: BinaryIO,
+) -> tuple[np.ndarray, float]:
+    image = decode_image_array(
+        upload,
+        mean=settings.normalization_mean,
+        std=settings.normalization_std,
+    )
+    model = registry.get_model(model_id)
+    start = perf_counter()
+    probabilities = softmax(model(image))[0]
+    return probabilities, (perf_counter() - start) * 1000
+
+
+@app.get("/health", response_model=HealthResponse)
+async def health(request: Request) -> HealthResponse:
+    return HealthResponse(**common.health_fields(request))
+
+
+@app.post(
+    "/api/v1/predict",
+    response_model=PredictionResponse,
+    responses={
+        413: {"model": ErrorResponse},
+        415: {"model": ErrorResponse},
+        503: {"model": ErrorResponse},
+    },
+)
+async def predict(
+    request: Request,
+    file: UploadFile = File(...),
+    model_id: Annotated[ModelId, Form()] = ModelId.baseline,
+    top_k: Annotated[int, Form(ge=1, le=10)] = 5,
+) -> PredictionResponse:
+    try:
+        validate_content_type(file.content_type)
+        validate_upload_size(file.size or 0, settings.max_upload_bytes)
+        probabilities, inference_ms = await run_in_threadpool(
+            _predict_probabilities, request.app.state.model_registry, model_id, file.file
+        )
+    except common.PREDICTION_ERRORS as exc:
+        raise common.http_error(exc) from exc
+
+    safe_top_k = max(1, min(top_k, len(CIFAR10_CLASSES)))
+    top_indices = np.argsort(probabilities)[::-1][:safe_top_k]
+    top_predictions = [
+        TopKPrediction(
+            class_name=CIFAR10_CLASSES[index],
+            probability=round(float(probabilities[index]), 6),
+        )
+        for index in top_indices
+    ]
+    return PredictionResponse(
+        model_id=model_id,
+        predicted_class=top_predictions[0].class_name,
+        confidence=top_predictions[0].probability,
+        top_k=top_predictions,
+        inference_ms=round(inference_ms, 3),
+        request_id=getattr(request.state, "request_id", None),
+    )
@@ -5,49 +5,131 @@ from __future__ import annotations
 import json
 import logging
 from contextlib import asynccontextmanager
-from time import perf_counter
-from uuid import uuid4
 
-from fastapi import FastAPI, Request, Response
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi import FastAPI
 
-from webapp.api.routes import router
+from webapp.api import common, routes
 from webapp.core.config import settings
+from webapp.services.autotune import AutotuneError, AutotuneMode, autotune
+from webapp.services.batching import BatchScheduler
+from webapp.services.cascade import CascadePolicy
+from webapp.services.executor import InferenceExecutor
+from webapp.services.hot_reload import ArtifactWatcher
+from webapp.services.metrics import RequestMetrics
 from webapp.services.model_registry import ModelRegistry
+from webapp.services.prediction_cache import PredictionCache
+from webapp.services.prediction_log import PredictionLog
 from webapp.services.reports import load_report_summary
+from webapp.services.similarity import SimilarityIndex, SimilarityIndexError
+from webapp.services.streaming import StreamCounters
+from webapp.services.upload_limits import UploadLimitMiddleware
 
 logger = logging.getLogger("webapp")
 
 
-def _configure_logging() -> None:
-    logging.basicConfig(level=logging.INFO, format="%(message)s")
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    _configure_logging()
-
-    model_registry = ModelRegistry(settings)
-    model_registry.load_all()
+    common.configure_logging()
+
+    # `webapp.serve` loads weights before forking workers; reuse them instead of reloading.
+    model_registry = getattr(app.state, "preloaded_registry", None)
+    if model_registry is None:
+        model_registry = ModelRegistry(settings)
+        model_registry.load_all()
+    autotune_stats = None
+    if AutotuneMode(settings.autotune) != AutotuneMode.off:
+        try:
+            autotune_stats = autotune(
+                settings,
+                model_registry,
+                launcher_threads=getattr(app.state, "torch_threads_per_worker", None),
+            )
+        except AutotuneError as exc:
+            logger.warning(json.dumps({"event": "autotune_skipped", "error": str(exc)}))
     report_summary = load_report_summary(settings)
+    inference_executor = InferenceExecutor(
+        max_workers=settings.inference_workers,
+        max_queue=settings.inference_queue_size,
+    )
+    batch_scheduler = BatchScheduler(
+        model_registry,
+        max_batch_size=(
+            autotune_stats.profile.batch_max_size if autotune_stats else settings.batch_max_size
+        ),
+        max_wait_ms=settings.batch_max_wait_ms,
+        executor=inference_executor,
+    )
 
     app.state.settings = settings
     app.state.model_registry = model_registry
+    app.state.inference_executor = inference_executor
+    app.state.batch_scheduler = batch_scheduler
+    app.state.autotune = autotune_stats
+    app.state.prediction_cache = PredictionCache(
+        max_entries=settings.prediction_cache_size,
+        ttl_seconds=settings.prediction_cache_ttl_seconds,
+    )
+    app.state.cascade_policy = CascadePolicy.from_settings(settings)
+    app.state.stream_counters = StreamCounters(settings.stream_max_pending_frames)
+    prediction_log = None
+    if settings.prediction_log:
+        prediction_log = PredictionLog(
+            settings.prediction_log_dir,
+            buffer_records=settings.prediction_log_buffer_records,
+            flush_seconds=settings.prediction_log_flush_seconds,
+            segment_bytes=int(settings.prediction_log_segment_mb * 1024 * 1024),
+        )
+        prediction_log.start()
+    app.state.prediction_log = prediction_log
+    app.state.similarity_index = None
+    app.state.similarity_index_error = None
+    try:
+        app.state.similarity_index = SimilarityIndex.load(settings, model_registry)
+    except SimilarityIndexError as exc:
+        # Optional: `/api/v1/similar` answers 503 with this reason until an index is built.
+        app.state.similarity_index_error = str(exc)
     app.state.report_summary = report_summary
-    app.state.templates = Jinja2Templates(directory=str(settings.templates_dir))
+    app.state.metrics = RequestMetrics()
+    app.state.templates = common.build_templates(settings, static_files)
+    artifact_watcher = ArtifactWatcher(
+        model_registry,
+        settings,
+        on_reports=lambda summary: setattr(app.state, "report_summary", summary),
+        interval_seconds=settings.hot_reload_interval_seconds,
+    )
+    artifact_watcher.start()
+    app.state.artifact_watcher = artifact_watcher
 
     logger.info(
         json.dumps(
             {
                 "event": "startup",
                 "models_loaded": [model_id.value for model_id in model_registry.loaded_model_ids],
+                "models_available": [
+                    model_id.value for model_id in model_registry.available_model_ids
+                ],
+                "model_loading": model_registry.loading.value,
                 "checkpoints_dir": str(settings.checkpoints_dir),
+                "inference_workers": inference_executor.max_workers,
+                "hot_reload_interval_seconds": artifact_watcher.interval_seconds,
+                "prediction_log_dir": (
+                    str(prediction_log.directory) if prediction_log is not None else None
+                ),
+                "similarity_index": (
+                    app.state.similarity_index.stats().model_dump(mode="json")
+                    if app.state.similarity_index is not None
+                    else app.state.similarity_index_error
+                ),
             }
         )
     )
 
     yield
+    artifact_watcher.stop()
+    await batch_scheduler.close()
+    if prediction_log is not None:
+        prediction_log.stop()
+    inference_executor.shutdown()
     logger.info(json.dumps({"event": "shutdown"}))
 
 
@@ -59,40 +141,15 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-app.mount("/static", StaticFiles(directory=str(settings.static_dir)), name="static")
-settings.reports_dir.mkdir(parents=True, exist_ok=True)
-app.mount(
-    "/reports-assets",
-    StaticFiles(directory=str(settings.reports_dir)),
-    name="reports-assets",
+static_files = common.mount_static_files(app, settings)
+# Added before the request-context middleware so it runs inside it and its 413/415s are logged.
+app.add_middleware(
+    UploadLimitMiddleware,
+    limits={
+        "/api/v1/predict": settings.max_upload_bytes,
+        "/api/v1/similar": settings.max_upload_bytes,
+    },
 )
-
-
-@app.middleware("http")
-async def request_context_middleware(request: Request, call_next) -> Response:
-    request_id = request.headers.get("x-request-id", str(uuid4()))
-    request.state.request_id = request_id
-
-    start = perf_counter()
-    response = await call_next(request)
-    elapsed_ms = (perf_counter() - start) * 1000
-
-    logger.info(
-        json.dumps(
-            {
-                "event": "request",
-                "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
-                "status_code": response.status_code,
-                "latency_ms": round(elapsed_ms, 3),
-            }
-        )
-    )
-
-    response.headers["X-Request-ID"] = request_id
-    response.headers["X-Process-Time-MS"] = f"{elapsed_ms:.2f}"
-    return response
-
-
-app.include_router(router)
+app.middleware("http")(common.request_context_middleware)
+app.include_router(common.router)
+app.include_router(routes.router)
@@ -31,32 +31,43 @@ class BaselineCNN(nn.Module):
 
 
 class CNNV2(nn.Module):
-    """CNNv2 architecture used in the upgraded training notebook."""
+    """CNNv2 architecture used in the upgraded training notebook.
 
-    def __init__(self) -> None:
+    `widths` are the output channels of the six 3x3 convs. The notebook's are
+    the default; `tools.prune` builds narrower variants, and the module and
+    parameter names stay the same for any widths.
+    """
+
+    DEFAULT_WIDTHS = (64, 64, 128, 128, 256, 256)
+
+    def __init__(self, widths: tuple[int, ...] = DEFAULT_WIDTHS) -> None:
         super().__init__()
+        if len(widths) != len(self.DEFAULT_WIDTHS) or min(widths) < 1:
+            raise ValueError(f"CNNV2 needs six positive conv widths, got {widths}.")
+        self.widths = tuple(int(width) for width in widths)
+        c1, c2, c3, c4, c5, c6 = self.widths
         self.features = nn.Sequential(
-            nn.Conv2d(3, 64, 3, padding=1, bias=False),
-            nn.BatchNorm2d(64),
+            nn.Conv2d(3, c1, 3, padding=1, bias=False),
+            nn.BatchNorm2d(c1),
             nn.ReLU(inplace=True),
-            nn.Conv2d(64, 64, 3, padding=1, bias=False),
-            nn.BatchNorm2d(64),
+            nn.Conv2d(c1, c2, 3, padding=1, bias=False),
+            nn.BatchNorm2d(c2),
             nn.ReLU(inplace=True),
             nn.MaxPool2d(2),
             nn.Dropout(0.15),
-            nn.Conv2d(64, 128, 3, padding=1, bias=False),
-            nn.BatchNorm2d(128),
+            nn.Conv2d(c2, c3, 3, padding=1, bias=False),
+            nn.BatchNorm2d(c3),
             nn.ReLU(inplace=True),
-            nn.Conv2d(128, 128, 3, padding=1, bias=False),
-            nn.BatchNorm2d(128),
+            nn.Conv2d(c3, c4, 3, padding=1, bias=False),
+            nn.BatchNorm2d(c4),
             nn.ReLU(inplace=True),
             nn.MaxPool2d(2),
             nn.Dropout(0.2),
-            nn.Conv2d(128, 256, 3, padding=1, bias=False),
-            nn.BatchNorm2d(256),
+            nn.Conv2d(c4, c5, 3, padding=1, bias=False),
+            nn.BatchNorm2d(c5),
             nn.ReLU(inplace=True),
-            nn.Conv2d(256, 256, 3, padding=1, bias=False),
-            nn.BatchNorm2d(256),
+            nn.Conv2d(c5, c6, 3, padding=1, bias=False),
+            nn.BatchNorm2d(c6),
             nn.ReLU(inplace=True),
             nn.MaxPool2d(2),
             nn.Dropout(0.3),
@@ -64,16 +75,32 @@ class CNNV2(nn.Module):
         self.head = nn.Sequential(
             nn.AdaptiveAvgPool2d(1),
             nn.Flatten(),
-            nn.Linear(256, 10),
+            nn.Linear(c6, 10),
         )
 
     def forward(self, x: torch.Tensor) -> torch.Tensor:
         return self.head(self.features(x))
 
+    def embed(self, x: torch.Tensor) -> torch.Tensor:
+        """Pooled `[N, widths[-1]]` features that the final `Linear` classifies."""
+        return self.head[:-1](self.features(x))
+
+
+def architecture_spec(model: nn.Module) -> dict[str, object]:
+    """What `create_model` needs besides the model id; saved in pruned checkpoints."""
+    if isinstance(model, CNNV2):
+        return {"name": "cnnv2", "widths": list(model.widths)}
+    raise ValueError(f"No architecture spec for {type(model).__name__}.")
+
 
-def create_model(model_id: ModelId) -> nn.Module:
+def create_model(model_id: ModelId, architecture: dict[str, object] | None = None) -> nn.Module:
+    """Build `model_id`; pruned variants need the `architecture` spec from their checkpoint."""
     if model_id == ModelId.baseline:
         return BaselineCNN()
     if model_id == ModelId.cnnv2:
         return CNNV2()
+    if model_id == ModelId.cnnv2_pruned:
+        if not architecture or architecture.get("name") != "cnnv2":
+            raise ValueError(f"{model_id.value} needs a cnnv2 architecture spec in its checkpoint.")
+        return CNNV2(widths=tuple(architecture["widths"]))  # type: ignore[arg-type]
     raise ValueError(f"Unsupported model id: {model_id}")
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+from datetime import datetime
 from enum import Enum
+from typing import Literal
 
 from pydantic import BaseModel, Field
 
@@ -10,6 +12,12 @@ from pydantic import BaseModel, Field
 class ModelId(str, Enum):
     baseline = "baseline"
     cnnv2 = "cnnv2"
+    baseline_int8 = "baseline_int8"
+    cnnv2_int8 = "cnnv2_int8"
+    # `CNNV2` with channels removed by `tools.prune`; its widths come from the checkpoint.
+    cnnv2_pruned = "cnnv2_pruned"
+    # Not a checkpoint: `/api/v1/predict` routes it through the confidence cascade.
+    auto = "auto"
 
 
 class TopKPrediction(BaseModel):
@@ -17,6 +25,13 @@ class TopKPrediction(BaseModel):
     probability: float = Field(ge=0.0, le=1.0)
 
 
+class CascadeDecision(BaseModel):
+    first_model_id: ModelId
+    first_confidence: float = Field(ge=0.0, le=1.0)
+    first_margin: float = Field(ge=0.0, le=1.0)
+    escalated: bool
+
+
 class PredictionResponse(BaseModel):
     model_id: ModelId
     predicted_class: str
@@ -24,6 +39,61 @@ class PredictionResponse(BaseModel):
     top_k: list[TopKPrediction]
     inference_ms: float = Field(ge=0.0)
     request_id: str | None = None
+    cached: bool = False
+    cascade: CascadeDecision | None = None
+
+
+class BatchPredictionItem(PredictionResponse):
+    index: int = Field(ge=0)
+    filename: str | None = None
+
+
+class BatchPredictionError(BaseModel):
+    index: int = Field(ge=0)
+    filename: str | None = None
+    detail: str
+    request_id: str | None = None
+
+
+class SimilarImage(BaseModel):
+    index: int = Field(ge=0, description="Position in the CIFAR-10 training split.")
+    class_name: str
+    similarity: float = Field(ge=-1.0, le=1.0)
+
+
+class SimilarResponse(BaseModel):
+    model_id: ModelId
+    neighbors: list[SimilarImage]
+    search_ms: float = Field(ge=0.0)
+    request_id: str | None = None
+
+
+class StreamReady(BaseModel):
+    type: Literal["ready"] = "ready"
+    model_id: ModelId
+    top_k: int
+    frame_format: str
+    max_pending: int
+    max_batch_size: int
+    request_id: str | None = None
+
+
+class StreamPrediction(BaseModel):
+    type: Literal["prediction"] = "prediction"
+    seq: int = Field(ge=0, description="Position of the frame in the session, from 0.")
+    model_id: ModelId
+    predicted_class: str
+    confidence: float = Field(ge=0.0, le=1.0)
+    top_k: list[TopKPrediction]
+    inference_ms: float = Field(ge=0.0, description="Forward time of the frame's batch.")
+    batch_size: int = Field(ge=1)
+    latency_ms: float = Field(ge=0.0, description="From the frame's arrival to this message.")
+
+
+class StreamFrameError(BaseModel):
+    type: Literal["error", "dropped"]
+    seq: int | None = Field(default=None, ge=0)
+    detail: str
 
 
 class ReportFigure(BaseModel):
@@ -37,6 +107,7 @@ class ReportMetricEntry(BaseModel):
     test_precision_macro: float | None = None
     test_recall_macro: float | None = None
     test_f1_macro: float | None = None
+    latency_ms: float | None = None
 
 
 class ReportMetrics(BaseModel):
@@ -53,7 +124,150 @@ class ErrorResponse(BaseModel):
     request_id: str | None = None
 
 
+class BatchingStats(BaseModel):
+    max_batch_size: int
+    max_wait_ms: float
+    queue_depth: int
+    batches: int
+    items: int
+    mean_batch_size: float
+    largest_batch: int
+    mean_queue_wait_ms: float
+    mean_forward_ms: float
+    max_forward_ms: float
+    batch_size_histogram: dict[int, int] = Field(default_factory=dict)
+
+
+class InferenceQueueStats(BaseModel):
+    workers: int
+    max_queue: int
+    queue_depth: int
+    # Capacity held by streaming batch responses between their jobs.
+    reserved: int = 0
+    in_flight: int
+    completed: int
+    rejected: int
+    mean_wait_ms: float
+    max_wait_ms: float
+
+
+class PredictionCacheStats(BaseModel):
+    entries: int
+    max_entries: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    coalesced: int
+    evictions: int
+    expirations: int
+
+
+class ModelResidencyStats(BaseModel):
+    available: bool
+    resident: bool
+    pinned: bool
+    size_mb: float | None = None
+    load_ms: float | None = None
+    loads: int
+    evictions: int
+    checkpoint_sha256: str | None = None
+    loaded_at: datetime | None = None
+    reload_error: str | None = None
+
+
+class ModelMemoryStats(BaseModel):
+    loading: str
+    budget_mb: float | None = None
+    resident_mb: float
+    models: dict[ModelId, ModelResidencyStats] = Field(default_factory=dict)
+
+
+class HotReloadStats(BaseModel):
+    interval_seconds: float
+    polls: int
+    models_reloaded: int
+    reports_reloaded: int
+    failures: int
+    reports_loaded_at: datetime | None = None
+
+
+class SimilarityIndexStats(BaseModel):
+    model_id: ModelId
+    vectors: int
+    dimensions: int
+    dtype: str
+    size_mb: float
+    checkpoint_sha256: str
+
+
+class StreamingStats(BaseModel):
+    active_sessions: int
+    sessions: int
+    max_pending_frames: int
+    frames_received: int
+    frames_predicted: int
+    frames_dropped: int
+    frames_failed: int
+    batches: int
+    mean_batch_size: float
+    mean_latency_ms: float
+
+
+class PredictionLogStats(BaseModel):
+    directory: str
+    buffer_records: int
+    pending: int
+    records_written: int
+    records_dropped: int
+    bytes_written: int
+    flushes: int
+    segments: int
+    write_errors: int
+
+
+class TuningMeasurement(BaseModel):
+    intra_op_threads: int
+    channels_last: bool
+    # Sum over the tuned models of the median forward time of one reference batch.
+    forward_ms: float
+
+
+class TuningProfile(BaseModel):
+    cpu_model: str
+    cpus: int
+    torch_version: str
+    model_optimization: str
+    models: list[ModelId]
+    latency_budget_ms: float
+    intra_op_threads: int
+    interop_threads: int
+    channels_last: bool
+    batch_max_size: int
+    tuned_at: datetime
+    tuning_ms: float
+    candidates: list[TuningMeasurement] = Field(default_factory=list)
+    # Median forward time of the slowest tuned model per batch size tried.
+    batch_forward_ms: dict[int, float] = Field(default_factory=dict)
+
+
+class AutotuneStats(BaseModel):
+    source: str
+    profile_path: str
+    threads_applied: bool
+    profile: TuningProfile
+
+
 class HealthResponse(BaseModel):
     status: str
     models_loaded: list[ModelId]
     version: str
+    models_available: list[ModelId] = Field(default_factory=list)
+    model_memory: ModelMemoryStats | None = None
+    batching: dict[ModelId, BatchingStats] = Field(default_factory=dict)
+    inference_queue: InferenceQueueStats | None = None
+    prediction_cache: PredictionCacheStats | None = None
+    hot_reload: HotReloadStats | None = None
+    similarity_index: SimilarityIndexStats | None = None
+    autotune: AutotuneStats | None = None
+    streaming: StreamingStats | None = None
+    prediction_log: PredictionLogStats | None = None
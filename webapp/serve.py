@@ -0,0 +1,165 @@
+"""Pre-fork server: load model weights once, then fork uvicorn workers that share them.
+
+    python -m webapp.serve --workers 4 --port 8000
+
+The parent builds the `ModelRegistry` before forking, so every worker serves
+the same weight pages copy-on-write instead of loading a private copy. The
+torch intra-op thread count is split across workers so that together they use
+each core once. Workers that exit unexpectedly are replaced.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+import torch
+import uvicorn
+
+from webapp.core.config import settings
+from webapp.main import app
+from webapp.services.autotune import available_cpus
+from webapp.services.model_registry import ModelRegistry
+
+logger = logging.getLogger("webapp")
+
+_RESPAWN_DELAY_SECONDS = 1.0
+
+
+def threads_per_worker(workers: int, cpus: int | None = None) -> int:
+    return max(1, (cpus or available_cpus()) // max(1, workers))
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, threads: int, log_level: str) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    torch.set_num_threads(threads)
+    # Keeps an `AUTOTUNE` profile from overriding the per-worker split.
+    app.state.torch_threads_per_worker = threads
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _spawn(sock: socket.socket, threads: int, log_level: str) -> int:
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 0
+        try:
+            _run_worker(sock, threads, log_level)
+        except BaseException:
+            logger.exception(json.dumps({"event": "worker_crashed", "pid": os.getpid()}))
+            exit_code = 1
+        finally:
+            # Skip the parent's atexit handlers and buffered state inherited through fork.
+            os._exit(exit_code)
+    logger.info(json.dumps({"event": "worker_started", "pid": pid, "torch_threads": threads}))
+    return pid
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("WEB_CONCURRENCY", "1")),
+        help="Worker processes (defaults to $WEB_CONCURRENCY or 1).",
+    )
+    parser.add_argument(
+        "--threads-per-worker",
+        type=int,
+        default=0,
+        help="torch intra-op threads per worker (0 = available CPUs // workers).",
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    if not hasattr(os, "fork"):
+        sys.exit("webapp.serve needs os.fork; run uvicorn directly on this platform.")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    threads = args.threads_per_worker or threads_per_worker(args.workers)
+
+    # A single thread keeps the parent's OpenMP pool unstarted; a pool created
+    # before fork() can deadlock the children's first parallel region.
+    torch.set_num_threads(1)
+    registry = ModelRegistry(settings)
+    registry.load_all()
+    app.state.preloaded_registry = registry
+    # Move everything allocated so far out of the collector's reach, so that
+    # collections in the workers do not write to (and un-share) those pages.
+    gc.collect()
+    gc.freeze()
+
+    sock = _bind(args.host, args.port)
+    logger.info(
+        json.dumps(
+            {
+                "event": "prefork_ready",
+                "workers": args.workers,
+                "torch_threads_per_worker": threads,
+                "models_loaded": [model_id.value for model_id in registry.loaded_model_ids],
+                "address": f"{args.host}:{args.port}",
+            }
+        )
+    )
+
+    workers = {_spawn(sock, threads, args.log_level) for _ in range(args.workers)}
+    shutting_down = False
+
+    def _stop(signum: int, _frame: object) -> None:
+        nonlocal shutting_down
+        shutting_down = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        workers.discard(pid)
+        if shutting_down:
+            continue
+        logger.warning(
+            json.dumps(
+                {
+                    "event": "worker_exited",
+                    "pid": pid,
+                    "exit_code": os.waitstatus_to_exitcode(status),
+                }
+            )
+        )
+        time.sleep(_RESPAWN_DELAY_SECONDS)
+        if not shutting_down:
+            workers.add(_spawn(sock, threads, args.log_level))
+
+    sock.close()
+    logger.info(json.dumps({"event": "prefork_stopped"}))
+
+
+if __name__ == "__main__":
+    main()
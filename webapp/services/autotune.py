@@ -0,0 +1,278 @@
+"""Per-host tuning of torch threads, memory format and the micro-batch cap.
+
+With `AUTOTUNE=on`, startup looks for a profile in `settings.autotune_dir`
+keyed by CPU model and core count. If there is none, or it was tuned for
+another torch version, optimization mode, latency budget or set of models,
+the resident models are benchmarked and the result saved:
+
+- intra-op threads and channels_last vs. contiguous layout are chosen together,
+  by the summed median forward time of one `AUTOTUNE_REFERENCE_BATCH` batch per model;
+- the batch cap is the largest of `AUTOTUNE_BATCH_SIZES` whose slowest model
+  forward stays within `AUTOTUNE_LATENCY_BUDGET_MS`.
+
+Inter-op threads are not measured: no served graph forks work onto the
+inter-op pool, so a profile pins it to one thread instead of one idle thread per core.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import platform
+import re
+from datetime import UTC, datetime
+from enum import Enum
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+
+import torch
+import torch.nn as nn
+
+from webapp.core.config import Settings
+from webapp.core.constants import (
+    AUTOTUNE_BATCH_SIZES,
+    AUTOTUNE_REFERENCE_BATCH,
+    AUTOTUNE_REPEATS,
+)
+from webapp.schemas.prediction import AutotuneStats, ModelId, TuningMeasurement, TuningProfile
+from webapp.services.model_registry import ModelRegistry
+from webapp.services.optimize import OptimizationError, example_batch, with_memory_format
+from webapp.services.quantization import QUANTIZED_BASE_MODELS
+
+logger = logging.getLogger("webapp")
+
+
+class AutotuneMode(str, Enum):
+    off = "off"
+    on = "on"
+    retune = "retune"
+
+
+class AutotuneError(RuntimeError):
+    """Raised when there is nothing to tune or no usable profile may be tuned here."""
+
+
+def available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as handle:
+            for line in handle:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def profile_path(settings: Settings) -> Path:
+    """`<autotune_dir>/<cpu-model-slug>-<cpus>cpu.json` for this host."""
+    slug = re.sub(r"[^a-z0-9]+", "-", cpu_model().lower()).strip("-")
+    return settings.autotune_dir / f"{slug or 'cpu'}-{available_cpus()}cpu.json"
+
+
+def thread_candidates(cpus: int) -> list[int]:
+    """1, powers of two below `cpus`, half of `cpus` and `cpus` itself."""
+    candidates = {cpus, max(1, cpus // 2)}
+    threads = 1
+    while threads < cpus:
+        candidates.add(threads)
+        threads *= 2
+    return sorted(candidates)
+
+
+@torch.inference_mode()
+def _forward_ms(model: nn.Module, batch: torch.Tensor, repeats: int) -> float:
+    model(batch)
+    samples = []
+    for _ in range(repeats):
+        start = perf_counter()
+        model(batch)
+        samples.append((perf_counter() - start) * 1000)
+    return median(samples)
+
+
+def _layouts(models: dict[ModelId, nn.Module]) -> dict[bool, dict[ModelId, nn.Module]]:
+    """Each model in both layouts; quantized or unconvertible models keep their own."""
+    layouts: dict[bool, dict[ModelId, nn.Module]] = {}
+    for channels_last in (False, True):
+        variants = {}
+        for model_id, model in models.items():
+            if model_id in QUANTIZED_BASE_MODELS:
+                variants[model_id] = model
+                continue
+            try:
+                variants[model_id] = with_memory_format(model, channels_last)
+            except OptimizationError:
+                variants[model_id] = model
+        layouts[channels_last] = variants
+    return layouts
+
+
+def tune(
+    registry: ModelRegistry,
+    settings: Settings,
+    repeats: int = AUTOTUNE_REPEATS,
+) -> TuningProfile:
+    """Benchmark the resident models on this host and return the best configuration.
+
+    Leaves torch's intra-op thread count at the chosen value; the layout and
+    batch cap only take effect through `apply_profile`.
+    """
+    start = perf_counter()
+    model_ids = registry.loaded_model_ids
+    if not model_ids:
+        raise AutotuneError("No resident models to tune.")
+    models = {model_id: registry.get_model(model_id) for model_id in model_ids}
+    layouts = _layouts(models)
+    cpus = available_cpus()
+    reference = example_batch(AUTOTUNE_REFERENCE_BATCH)
+
+    candidates: list[TuningMeasurement] = []
+    for threads in thread_candidates(cpus):
+        torch.set_num_threads(threads)
+        for channels_last, variants in layouts.items():
+            forward_ms = sum(_forward_ms(model, reference, repeats) for model in variants.values())
+            candidates.append(
+                TuningMeasurement(
+                    intra_op_threads=threads,
+                    channels_last=channels_last,
+                    forward_ms=round(forward_ms, 3),
+                )
+            )
+    best = min(candidates, key=lambda candidate: candidate.forward_ms)
+    torch.set_num_threads(best.intra_op_threads)
+
+    batch_forward_ms: dict[int, float] = {}
+    batch_max_size = AUTOTUNE_BATCH_SIZES[0]
+    for batch_size in AUTOTUNE_BATCH_SIZES:
+        batch = example_batch(batch_size)
+        slowest = max(
+            _forward_ms(model, batch, repeats) for model in layouts[best.channels_last].values()
+        )
+        batch_forward_ms[batch_size] = round(slowest, 3)
+        if slowest > settings.autotune_latency_budget_ms:
+            break
+        batch_max_size = batch_size
+
+    return TuningProfile(
+        cpu_model=cpu_model(),
+        cpus=cpus,
+        torch_version=torch.__version__,
+        model_optimization=settings.model_optimization,
+        models=sorted(model_ids, key=lambda model_id: model_id.value),
+        latency_budget_ms=settings.autotune_latency_budget_ms,
+        intra_op_threads=best.intra_op_threads,
+        interop_threads=1,
+        channels_last=best.channels_last,
+        batch_max_size=batch_max_size,
+        tuned_at=datetime.now(UTC),
+        tuning_ms=round((perf_counter() - start) * 1000, 1),
+        candidates=candidates,
+        batch_forward_ms=batch_forward_ms,
+    )
+
+
+def save_profile(path: Path, profile: TuningProfile) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = path.with_name(f"{path.name}.partial")
+    partial_path.write_text(profile.model_dump_json(indent=2) + "\n", encoding="utf-8")
+    os.replace(partial_path, path)
+
+
+def load_profile(path: Path, registry: ModelRegistry, settings: Settings) -> TuningProfile | None:
+    """The saved profile, or None when missing, unreadable or tuned under other conditions."""
+    try:
+        profile = TuningProfile.model_validate_json(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    current = (
+        cpu_model(),
+        available_cpus(),
+        torch.__version__,
+        settings.model_optimization,
+        settings.autotune_latency_budget_ms,
+        set(registry.loaded_model_ids),
+    )
+    saved = (
+        profile.cpu_model,
+        profile.cpus,
+        profile.torch_version,
+        profile.model_optimization,
+        profile.latency_budget_ms,
+        set(profile.models),
+    )
+    return profile if saved == current else None
+
+
+def apply_profile(profile: TuningProfile, registry: ModelRegistry, apply_threads: bool) -> bool:
+    """Set the profile's layout and, unless a launcher fixed them, its thread counts.
+
+    Returns whether the thread counts were applied. The batch cap is read by
+    whoever builds the `BatchScheduler`.
+    """
+    registry.set_channels_last(profile.channels_last)
+    if not apply_threads:
+        return False
+    torch.set_num_threads(profile.intra_op_threads)
+    try:
+        torch.set_num_interop_threads(profile.interop_threads)
+    except RuntimeError as exc:
+        # Only settable once, before any inter-op work; the intra-op count still applies.
+        logger.warning(json.dumps({"event": "interop_threads_unchanged", "error": str(exc)}))
+    return True
+
+
+def autotune(
+    settings: Settings,
+    registry: ModelRegistry,
+    launcher_threads: int | None = None,
+) -> AutotuneStats:
+    """Apply this host's saved profile, tuning and saving one first when needed.
+
+    `launcher_threads` is set when a launcher such as `webapp.serve` already
+    split the cores between worker processes. Its threads are kept, and a
+    missing profile raises `AutotuneError` rather than having every worker
+    tune at once while competing for the same cores.
+    """
+    mode = AutotuneMode(settings.autotune)
+    path = profile_path(settings)
+    profile = None if mode == AutotuneMode.retune else load_profile(path, registry, settings)
+    source = "profile"
+    if profile is None:
+        if launcher_threads is not None:
+            raise AutotuneError(
+                f"No current tuning profile at {path}; "
+                "create one with `python -m tools.autotune` before starting workers."
+            )
+        profile = tune(registry, settings)
+        save_profile(path, profile)
+        source = "tuned"
+    threads_applied = apply_profile(profile, registry, apply_threads=launcher_threads is None)
+    logger.info(
+        json.dumps(
+            {
+                "event": "autotune_applied",
+                "source": source,
+                "profile_path": str(path),
+                "intra_op_threads": profile.intra_op_threads,
+                "interop_threads": profile.interop_threads,
+                "threads_applied": threads_applied,
+                "channels_last": profile.channels_last,
+                "batch_max_size": profile.batch_max_size,
+                "tuning_ms": profile.tuning_ms if source == "tuned" else None,
+            }
+        )
+    )
+    return AutotuneStats(
+        source=source,
+        profile_path=str(path),
+        threads_applied=threads_applied,
+        profile=profile,
+    )
@@ -0,0 +1,286 @@
+"""Input iteration and chunked decoding for batch prediction requests."""
+
+from __future__ import annotations
+
+import lzma
+import tarfile
+import zipfile
+import zlib
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import PurePosixPath
+from typing import BinaryIO
+
+import numpy as np
+import torch
+from PIL import Image
+
+from webapp.core.constants import ARCHIVE_MIME_TYPES, INPUT_IMAGE_SIZE
+from webapp.services.prediction_cache import content_digest
+from webapp.services.preprocess import (
+    InvalidArrayError,
+    InvalidImageError,
+    UnsupportedMediaTypeError,
+    UploadTooLargeError,
+    decode_image_fast,
+    frames_to_tensor,
+    is_array_upload,
+    parse_frames,
+    read_upload_buffer,
+    upload_too_large_message,
+    validate_upload,
+)
+
+_IMAGE_SUFFIX_MIME_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+}
+_ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+# Raised part-way through an archive that passed `validate_batch_uploads`, e.g. a
+# truncated .tar.gz or a zip member with a bad CRC. bz2 and gzip raise OSError.
+_ARCHIVE_READ_ERRORS = (tarfile.TarError, zipfile.BadZipFile, zlib.error, lzma.LZMAError, EOFError)
+
+
+@dataclass(frozen=True)
+class BatchUpload:
+    """One multipart part of a batch request."""
+
+    filename: str | None
+    content_type: str | None
+    file: BinaryIO
+
+
+@dataclass(frozen=True)
+class BatchImage:
+    """An image source that is only read when its chunk is decoded.
+
+    Items from a raw or `.npy` upload carry their already-parsed `frame` (or the
+    upload's parse `error`) instead of being decoded from `file`.
+    """
+
+    index: int
+    filename: str | None
+    content_type: str | None
+    file: BinaryIO
+    size: int | None = None
+    frame: np.ndarray | None = None
+    error: str | None = None
+
+
+@dataclass
+class DecodedChunk:
+    """A `[n, 3, H, W]` tensor plus per-row metadata and per-item failures.
+
+    `digests` holds each row's `content_digest` when they were requested.
+    """
+
+    images: torch.Tensor
+    entries: list[tuple[int, str | None]] = field(default_factory=list)
+    errors: list[tuple[int, str | None, str]] = field(default_factory=list)
+    digests: list[str] = field(default_factory=list)
+
+
+def is_archive(filename: str | None, content_type: str | None) -> bool:
+    if content_type in ARCHIVE_MIME_TYPES:
+        return True
+    return (filename or "").lower().endswith(_ARCHIVE_SUFFIXES)
+
+
+def _mime_from_name(filename: str) -> str | None:
+    return _IMAGE_SUFFIX_MIME_TYPES.get(PurePosixPath(filename).suffix.lower())
+
+
+def _iter_archive(upload: BatchUpload, start_index: int) -> Iterator[BatchImage]:
+    """Archive members in order; a corrupt archive ends with one error item instead of raising."""
+    index = start_index
+    try:
+        for image in _iter_archive_members(upload, start_index):
+            index = image.index + 1
+            yield image
+    except (*_ARCHIVE_READ_ERRORS, OSError) as exc:
+        yield BatchImage(
+            index=index,
+            filename=upload.filename,
+            content_type=upload.content_type,
+            file=upload.file,
+            error=f"Uploaded archive is corrupt; its remaining members were skipped ({exc}).",
+        )
+
+
+def _iter_archive_members(upload: BatchUpload, start_index: int) -> Iterator[BatchImage]:
+    index = start_index
+    upload.file.seek(0)
+    if zipfile.is_zipfile(upload.file):
+        upload.file.seek(0)
+        with zipfile.ZipFile(upload.file) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                with archive.open(info) as member:
+                    yield BatchImage(
+                        index=index,
+                        filename=info.filename,
+                        content_type=_mime_from_name(info.filename),
+                        file=member,
+                        size=info.file_size,
+                    )
+                index += 1
+        return
+
+    upload.file.seek(0)
+    try:
+        archive = tarfile.open(fileobj=upload.file, mode="r|*")
+    except tarfile.TarError as exc:
+        raise InvalidImageError("Uploaded archive is not a valid zip or tar file.") from exc
+    with archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            extracted = archive.extractfile(member)
+            if extracted is None:
+                continue
+            yield BatchImage(
+                index=index,
+                filename=member.name,
+                content_type=_mime_from_name(member.name),
+                file=extracted,
+                size=member.size,
+            )
+            index += 1
+
+
+def validate_batch_uploads(uploads: list[BatchUpload]) -> None:
+    """Reject unreadable archives before any result has been streamed."""
+    for upload in uploads:
+        if not is_archive(upload.filename, upload.content_type):
+            continue
+        upload.file.seek(0)
+        readable = zipfile.is_zipfile(upload.file)
+        if not readable:
+            upload.file.seek(0)
+            try:
+                with tarfile.open(fileobj=upload.file, mode="r|*") as archive:
+                    archive.next()
+                readable = True
+            except tarfile.TarError:
+                readable = False
+        upload.file.seek(0)
+        if not readable:
+            raise InvalidImageError(
+                f"Uploaded archive {upload.filename!r} is not a valid zip or tar file."
+            )
+
+
+def _iter_frames(
+    upload: BatchUpload, start_index: int, max_upload_bytes: int
+) -> Iterator[BatchImage]:
+    """One item per `[32, 32, 3]` frame of a raw or `.npy` upload, viewing a single buffer."""
+    try:
+        size = upload.file.seek(0, 2)
+        if size > max_upload_bytes:
+            raise UploadTooLargeError(upload_too_large_message(max_upload_bytes))
+        frames = parse_frames(read_upload_buffer(upload.file))
+    except (InvalidArrayError, UploadTooLargeError) as exc:
+        yield BatchImage(
+            index=start_index,
+            filename=upload.filename,
+            content_type=upload.content_type,
+            file=upload.file,
+            error=str(exc),
+        )
+        return
+    for offset, frame in enumerate(frames):
+        yield BatchImage(
+            index=start_index + offset,
+            filename=f"{upload.filename or 'frames'}[{offset}]",
+            content_type=upload.content_type,
+            file=upload.file,
+            frame=frame,
+        )
+
+
+def iter_batch_images(uploads: list[BatchUpload], max_upload_bytes: int) -> Iterator[BatchImage]:
+    """Yield images from image, raw/`.npy` array and zip/tar archive parts, in order."""
+    index = 0
+    for upload in uploads:
+        if is_archive(upload.filename, upload.content_type):
+            for image in _iter_archive(upload, index):
+                index = image.index + 1
+                yield image
+            continue
+        if is_array_upload(upload.filename, upload.content_type):
+            for image in _iter_frames(upload, index, max_upload_bytes):
+                index = image.index + 1
+                yield image
+            continue
+        yield BatchImage(
+            index=index,
+            filename=upload.filename,
+            content_type=upload.content_type,
+            file=upload.file,
+        )
+        index += 1
+
+
+def decode_next_chunk(
+    images: Iterator[BatchImage],
+    chunk_size: int,
+    max_upload_bytes: int,
+    mean: tuple[float, float, float],
+    std: tuple[float, float, float],
+    with_digests: bool = False,
+) -> DecodedChunk | None:
+    """Decode up to `chunk_size` images into one tensor; returns None once exhausted.
+
+    Raw bytes are read and released one image at a time, so peak memory is one
+    encoded image plus the `[chunk_size, 3, H, W]` output regardless of archive size.
+    """
+    chunk = DecodedChunk(images=torch.empty(chunk_size, 3, *INPUT_IMAGE_SIZE))
+    seen = 0
+    for image in images:
+        seen += 1
+        try:
+            if image.error is not None:
+                raise InvalidArrayError(image.error)
+            row = len(chunk.entries)
+            if image.frame is not None:
+                frames_to_tensor(
+                    image.frame[np.newaxis], mean, std, out=chunk.images[row : row + 1]
+                )
+                digest = content_digest(image.frame.tobytes()) if with_digests else ""
+            else:
+                if image.size is not None and image.size > max_upload_bytes:
+                    raise UploadTooLargeError(upload_too_large_message(max_upload_bytes))
+                raw_bytes = image.file.read(max_upload_bytes + 1)
+                validate_upload(
+                    content_type=image.content_type,
+                    raw_bytes=raw_bytes,
+                    max_upload_bytes=max_upload_bytes,
+                )
+                decode_image_fast(
+                    raw_bytes,
+                    mean=mean,
+                    std=std,
+                    out=chunk.images[row : row + 1],
+                )
+                digest = content_digest(raw_bytes) if with_digests else ""
+        except (UnsupportedMediaTypeError, UploadTooLargeError, InvalidImageError) as exc:
+            chunk.errors.append((image.index, image.filename, str(exc)))
+        except _ARCHIVE_READ_ERRORS as exc:
+            chunk.errors.append(
+                (image.index, image.filename, f"Archive member could not be read ({exc}).")
+            )
+        except (OSError, Image.DecompressionBombError):
+            chunk.errors.append((image.index, image.filename, "Uploaded file is not a valid image."))
+        else:
+            chunk.entries.append((image.index, image.filename))
+            if with_digests:
+                chunk.digests.append(digest)
+        if seen >= chunk_size:
+            break
+
+    if seen == 0:
+        return None
+    chunk.images = chunk.images[: len(chunk.entries)]
+    return chunk
@@ -0,0 +1,246 @@
+"""Dynamic micro-batching of single-image predictions."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections import Counter
+from dataclasses import dataclass, field
+from time import perf_counter
+
+import torch
+
+from webapp.schemas.prediction import BatchingStats, ModelId
+from webapp.services.executor import InferenceExecutor
+from webapp.services.model_registry import ModelRegistry
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """Probabilities for one caller plus timing of the batch it rode in."""
+
+    probabilities: torch.Tensor
+    inference_ms: float
+    batch_size: int
+
+
+@dataclass
+class _PendingItem:
+    image_tensor: torch.Tensor
+    future: asyncio.Future[BatchResult]
+    enqueued_at: float = field(default_factory=perf_counter)
+
+
+@dataclass
+class _BatchCounters:
+    batches: int = 0
+    items: int = 0
+    largest_batch: int = 0
+    total_queue_wait_ms: float = 0.0
+    total_forward_ms: float = 0.0
+    max_forward_ms: float = 0.0
+    size_histogram: Counter[int] = field(default_factory=Counter)
+
+    def record(self, batch_size: int, queue_wait_ms: float, forward_ms: float) -> None:
+        self.batches += 1
+        self.items += batch_size
+        self.largest_batch = max(self.largest_batch, batch_size)
+        self.total_queue_wait_ms += queue_wait_ms
+        self.total_forward_ms += forward_ms
+        self.max_forward_ms = max(self.max_forward_ms, forward_ms)
+        self.size_histogram[batch_size] += 1
+
+
+@torch.inference_mode()
+def forward_probabilities(
+    model: torch.nn.Module,
+    batch: torch.Tensor,
+    device: torch.device,
+) -> torch.Tensor:
+    """Run a `[B, 3, H, W]` batch through `model` and return `[B, classes]` softmax."""
+    logits = model(batch.to(device))
+    return torch.softmax(logits, dim=1).cpu()
+
+
+def timed_forward(
+    model: torch.nn.Module,
+    batch: torch.Tensor,
+    device: torch.device,
+) -> tuple[torch.Tensor, float]:
+    """`forward_probabilities` plus its wall time in milliseconds."""
+    start = perf_counter()
+    probabilities = forward_probabilities(model, batch, device)
+    return probabilities, (perf_counter() - start) * 1000
+
+
+class MicroBatcher:
+    """Coalesces concurrent requests for one model into a single forward pass.
+
+    The first queued request opens a batch window of `max_wait_ms`; the batch is
+    flushed when the window closes or `max_batch_size` requests have arrived,
+    whichever comes first. Forwards run on `executor` when one is given, so the
+    event loop keeps accepting requests (which form the next batch) meanwhile.
+    """
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        model_id: ModelId,
+        max_batch_size: int,
+        max_wait_ms: float,
+        executor: InferenceExecutor | None = None,
+    ) -> None:
+        self.registry = registry
+        self.model_id = model_id
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self._queue: asyncio.Queue[_PendingItem] = asyncio.Queue()
+        self._counters = _BatchCounters()
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(
+                self._run(), name=f"micro-batcher-{self.model_id.value}"
+            )
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if not item.future.done():
+                item.future.set_exception(RuntimeError("Batcher stopped."))
+
+    async def submit(self, image_tensor: torch.Tensor) -> BatchResult:
+        """Queue a `[1, 3, H, W]` tensor and wait for its share of a batch."""
+        self.start()
+        future: asyncio.Future[BatchResult] = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_PendingItem(image_tensor=image_tensor, future=future))
+        return await future
+
+    def stats(self) -> BatchingStats:
+        counters = self._counters
+        batches = max(1, counters.batches)
+        return BatchingStats(
+            max_batch_size=self.max_batch_size,
+            max_wait_ms=self.max_wait_ms,
+            queue_depth=self._queue.qsize(),
+            batches=counters.batches,
+            items=counters.items,
+            mean_batch_size=round(counters.items / batches, 3),
+            largest_batch=counters.largest_batch,
+            mean_queue_wait_ms=round(counters.total_queue_wait_ms / max(1, counters.items), 3),
+            mean_forward_ms=round(counters.total_forward_ms / batches, 3),
+            max_forward_ms=round(counters.max_forward_ms, 3),
+            batch_size_histogram=dict(sorted(counters.size_histogram.items())),
+        )
+
+    async def _collect_batch(self) -> list[_PendingItem]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect_batch()
+            # Callers that gave up (client disconnects) are dropped before the forward.
+            batch = [item for item in batch if not item.future.done()]
+            if not batch:
+                continue
+            await self._process(batch)
+
+    def _forward(self, batch_tensor: torch.Tensor) -> tuple[torch.Tensor, float]:
+        model = self.registry.get_model(self.model_id)
+        return timed_forward(model, batch_tensor, self.registry.device)
+
+    async def _process(self, batch: list[_PendingItem]) -> None:
+        dispatched_at = perf_counter()
+        try:
+            batch_tensor = torch.cat([item.image_tensor for item in batch], dim=0)
+            if self.executor is None:
+                probabilities, forward_ms = self._forward(batch_tensor)
+            else:
+                probabilities, forward_ms = await self.executor.run(
+                    self._forward, batch_tensor, bounded=False
+                )
+        except Exception as exc:  # noqa: BLE001 - propagated to every waiting caller
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+            return
+
+        queue_wait_ms = sum((dispatched_at - item.enqueued_at) * 1000 for item in batch)
+        self._counters.record(len(batch), queue_wait_ms, forward_ms)
+        for item, row in zip(batch, probabilities, strict=True):
+            if not item.future.done():
+                item.future.set_result(
+                    BatchResult(
+                        probabilities=row,
+                        inference_ms=forward_ms,
+                        batch_size=len(batch),
+                    )
+                )
+
+
+class BatchScheduler:
+    """Owns one `MicroBatcher` per model id, created on first use."""
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        max_batch_size: int,
+        max_wait_ms: float,
+        executor: InferenceExecutor | None = None,
+    ) -> None:
+        self.registry = registry
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.executor = executor
+        self._batchers: dict[ModelId, MicroBatcher] = {}
+
+    def _batcher_for(self, model_id: ModelId) -> MicroBatcher:
+        batcher = self._batchers.get(model_id)
+        if batcher is None:
+            batcher = MicroBatcher(
+                self.registry,
+                model_id,
+                max_batch_size=self.max_batch_size,
+                max_wait_ms=self.max_wait_ms,
+                executor=self.executor,
+            )
+            self._batchers[model_id] = batcher
+        return batcher
+
+    async def predict(self, model_id: ModelId, image_tensor: torch.Tensor) -> BatchResult:
+        # Fail fast on unknown models instead of parking the request in a queue, and
+        # load lazily-served models off the event loop.
+        if self.executor is None or self.registry.is_resident(model_id):
+            self.registry.get_model(model_id)
+        else:
+            await self.executor.run(self.registry.get_model, model_id, bounded=False)
+        return await self._batcher_for(model_id).submit(image_tensor)
+
+    def stats(self) -> dict[ModelId, BatchingStats]:
+        return {model_id: batcher.stats() for model_id, batcher in self._batchers.items()}
+
+    async def close(self) -> None:
+        for batcher in self._batchers.values():
+            await batcher.stop()
@@ -0,0 +1,51 @@
+"""Confidence-gated two-model cascade behind `model_id=auto`."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import torch
+
+from webapp.core.config import Settings
+from webapp.schemas.prediction import ModelId
+
+
+def confidence_and_margin(probabilities: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor]:
+    """Top-1 probability and top-1 minus top-2 probability for each row of `[N, C]`."""
+    top2 = torch.topk(probabilities, 2, dim=-1).values
+    return top2[..., 0], top2[..., 0] - top2[..., 1]
+
+
+def escalation_mask(
+    probabilities: torch.Tensor,
+    min_confidence: float,
+    min_margin: float,
+) -> torch.Tensor:
+    """Rows whose first-stage prediction is too uncertain to answer with."""
+    confidence, margin = confidence_and_margin(probabilities)
+    return (confidence < min_confidence) | (margin < min_margin)
+
+
+@dataclass(frozen=True)
+class CascadePolicy:
+    """Answer with `first` unless its top-1 probability or margin is below threshold."""
+
+    first: ModelId
+    second: ModelId
+    min_confidence: float
+    min_margin: float
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> CascadePolicy:
+        first, second = (ModelId(model_id) for model_id in settings.cascade_models)
+        return cls(
+            first=first,
+            second=second,
+            min_confidence=settings.cascade_min_confidence,
+            min_margin=settings.cascade_min_margin,
+        )
+
+    def should_escalate(self, probabilities: torch.Tensor) -> bool:
+        """`probabilities` is a single `[C]` vector, as cached per request."""
+        mask = escalation_mask(probabilities.unsqueeze(0), self.min_confidence, self.min_margin)
+        return bool(mask[0])
@@ -0,0 +1,166 @@
+"""Bounded worker pool that keeps decode and model forwards off the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import perf_counter
+from typing import ParamSpec, TypeVar
+
+from webapp.schemas.prediction import InferenceQueueStats
+
+_P = ParamSpec("_P")
+_T = TypeVar("_T")
+
+
+class InferenceQueueFullError(RuntimeError):
+    """Raised when the inference queue is at capacity and the job is rejected."""
+
+
+class InferenceExecutor:
+    """Thread pool with a hard cap on queued jobs.
+
+    Jobs beyond `max_workers + max_queue` outstanding are rejected immediately
+    with `InferenceQueueFullError` rather than waiting without limit.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int) -> None:
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="inference",
+        )
+        self._lock = threading.Lock()
+        self._outstanding = 0
+        # Submitted jobs not yet picked up by a worker, and `reserve()` slots held.
+        # Idle reservations count against capacity but are not queued work.
+        self._queued = 0
+        self._reserved = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait_ms = 0.0
+        self._max_wait_ms = 0.0
+
+    async def run(
+        self,
+        fn: Callable[_P, _T],
+        /,
+        *args: _P.args,
+        bounded: bool = True,
+        **kwargs: _P.kwargs,
+    ) -> _T:
+        """Run `fn` on a worker thread.
+
+        `bounded=False` bypasses the capacity check; it is meant for the
+        micro-batchers, which never have more than one batch in flight per model.
+        """
+        self._admit(bounded)
+        return await self._submit(fn, args, kwargs, counted=True)
+
+    def reserve(self) -> InferenceReservation:
+        """Take one capacity slot for a caller that runs many jobs one after another.
+
+        Raises `InferenceQueueFullError` like a bounded `run`. The slot stays
+        counted as outstanding until `InferenceReservation.release`.
+        """
+        self._admit(bounded=True)
+        with self._lock:
+            self._reserved += 1
+        return InferenceReservation(self)
+
+    def _admit(self, bounded: bool) -> None:
+        with self._lock:
+            if bounded and self._outstanding >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise InferenceQueueFullError("Inference queue is full. Retry shortly.")
+            self._outstanding += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._outstanding -= 1
+            self._reserved -= 1
+
+    async def _submit(
+        self,
+        fn: Callable[_P, _T],
+        args: tuple[object, ...],
+        kwargs: dict[str, object],
+        counted: bool,
+    ) -> _T:
+        submitted_at = perf_counter()
+
+        def job() -> _T:
+            wait_ms = (perf_counter() - submitted_at) * 1000
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._total_wait_ms += wait_ms
+                self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        with self._lock:
+            self._queued += 1
+        future: Future[_T] = self._pool.submit(job)
+        future.add_done_callback(self._on_counted_done if counted else self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _on_counted_done(self, future: Future[object]) -> None:
+        self._on_done(future)
+        with self._lock:
+            self._outstanding -= 1
+
+    def _on_done(self, future: Future[object]) -> None:
+        with self._lock:
+            if future.cancelled():
+                # Cancelled before a worker started it, so `job` never dequeued it.
+                self._queued -= 1
+            self._completed += 1
+
+    def stats(self) -> InferenceQueueStats:
+        with self._lock:
+            started = self._completed + self._running
+            return InferenceQueueStats(
+                workers=self.max_workers,
+                max_queue=self.max_queue,
+                queue_depth=self._queued,
+                reserved=self._reserved,
+                in_flight=self._running,
+                completed=self._completed,
+                rejected=self._rejected,
+                mean_wait_ms=round(self._total_wait_ms / max(1, started), 3),
+                max_wait_ms=round(self._max_wait_ms, 3),
+            )
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class InferenceReservation:
+    """One slot of an `InferenceExecutor`, held across a sequence of jobs.
+
+    A batch response decodes and classifies its chunks one at a time, so its
+    jobs run inside the slot instead of each taking, or bypassing, capacity.
+    """
+
+    def __init__(self, executor: InferenceExecutor) -> None:
+        self._executor = executor
+        self._released = False
+
+    async def run(self, fn: Callable[_P, _T], /, *args: _P.args, **kwargs: _P.kwargs) -> _T:
+        if self._released:
+            raise RuntimeError("Inference reservation was already released.")
+        return await self._executor._submit(fn, args, kwargs, counted=False)
+
+    def release(self) -> None:
+        """Return the slot; safe to call more than once."""
+        if not self._released:
+            self._released = True
+            self._executor._release()
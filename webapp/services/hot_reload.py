@@ -0,0 +1,114 @@
+"""Background watcher that hot-reloads checkpoints and report artifacts."""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+
+from webapp.core.config import Settings
+from webapp.schemas.prediction import HotReloadStats, ReportSummaryResponse
+from webapp.services.model_registry import FileSignature, ModelRegistry, file_signature
+from webapp.services.reports import (
+    check_metrics_file,
+    load_report_summary,
+    report_artifact_paths,
+)
+
+logger = logging.getLogger("webapp")
+
+
+class ArtifactWatcher:
+    """Poll `checkpoints_dir` and `reports_dir` on a daemon thread and swap in changes.
+
+    Checkpoints go through `ModelRegistry.refresh`. The report summary is rebuilt
+    once `results.json` or a confusion-matrix figure has changed and then stayed
+    the same for one poll. It is handed to `on_reports`, which replaces the
+    cached summary in a single assignment. A metrics file that does not parse
+    keeps the previous summary until the file changes again.
+    """
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        settings: Settings,
+        on_reports: Callable[[ReportSummaryResponse], None],
+        interval_seconds: float,
+    ) -> None:
+        self.registry = registry
+        self.settings = settings
+        self.on_reports = on_reports
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        # The summary loaded at startup reflects the files as they are now.
+        self._report_signature = self._reports_signature()
+        self._pending_report_signature: tuple[FileSignature | None, ...] | None = None
+        self._reports_loaded_at = time.time()
+        self._polls = 0
+        self._models_reloaded = 0
+        self._reports_reloaded = 0
+        self._failures = 0
+
+    def start(self) -> None:
+        if self.interval_seconds <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="artifact-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self.poll()
+
+    def poll(self) -> None:
+        """Check both directories once; also usable directly when the thread is disabled."""
+        self._polls += 1
+        try:
+            self._models_reloaded += len(self.registry.refresh())
+            self._poll_reports()
+        except Exception as exc:  # noqa: BLE001 - the watcher must outlive one bad poll
+            self._failures += 1
+            logger.exception(json.dumps({"event": "hot_reload_failed", "error": str(exc)}))
+
+    def _reports_signature(self) -> tuple[FileSignature | None, ...]:
+        return tuple(file_signature(path) for path in report_artifact_paths(self.settings))
+
+    def _poll_reports(self) -> None:
+        signature = self._reports_signature()
+        if signature == self._report_signature:
+            self._pending_report_signature = None
+            return
+        if signature != self._pending_report_signature:
+            self._pending_report_signature = signature
+            return
+        self._pending_report_signature = None
+        self._report_signature = signature
+        try:
+            check_metrics_file(self.settings)
+        except ValueError as exc:
+            self._failures += 1
+            logger.warning(json.dumps({"event": "reports_reload_failed", "error": str(exc)}))
+            return
+        self.on_reports(load_report_summary(self.settings))
+        self._reports_reloaded += 1
+        self._reports_loaded_at = time.time()
+        logger.info(json.dumps({"event": "reports_reloaded"}))
+
+    def stats(self) -> HotReloadStats:
+        return HotReloadStats(
+            interval_seconds=self.interval_seconds,
+            polls=self._polls,
+            models_reloaded=self._models_reloaded,
+            reports_reloaded=self._reports_reloaded,
+            failures=self._failures + self.registry.reload_failures,
+            reports_loaded_at=datetime.fromtimestamp(self._reports_loaded_at, UTC),
+        )
@@ -0,0 +1,222 @@
+"""Content-hash ETags, fingerprinted asset URLs and precompressed variants for HTTP responses.
+
+Static mounts use `CachingStaticFiles`; the reports JSON goes through
+`encoded_response`. Variants (`app.js.br`, `app.js.gz`) are written by
+`python -m tools.precompress`; here they are only ever read.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from webapp.core.constants import (
+    ASSET_FINGERPRINT_LENGTH,
+    IMMUTABLE_CACHE_CONTROL,
+    PRECOMPRESSED_ENCODINGS,
+    REVALIDATE_CACHE_CONTROL,
+)
+
+try:
+    import brotli
+except ImportError:  # optional; without it only gzip variants are built
+    brotli = None
+
+
+def content_etag(digest: str, encoding: str | None = None) -> str:
+    """Strong ETag for a SHA-256 hex digest; each content-coding gets its own tag."""
+    suffix = f"-{encoding}" if encoding else ""
+    return f'"{digest[:32]}{suffix}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """`If-None-Match` uses the weak comparison, so `W/"x"` matches `"x"`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+def negotiate_encoding(accept_encoding: str | None, available: set[str]) -> str | None:
+    """Preferred content-coding in `available` acceptable to the client, or None for identity.
+
+    Codings are tried in `PRECOMPRESSED_ENCODINGS` order (brotli first) among
+    those with the highest q-value; `q=0` rules a coding out.
+    """
+    if not accept_encoding or not available:
+        return None
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[coding.strip().lower()] = quality
+    candidates = [
+        (weights.get(encoding, weights.get("*", 0.0)), -rank, encoding)
+        for rank, (encoding, _) in enumerate(PRECOMPRESSED_ENCODINGS)
+        if encoding in available
+    ]
+    best = max(candidates, default=None)
+    return best[2] if best and best[0] > 0 else None
+
+
+@dataclass(frozen=True)
+class EncodedBody:
+    """A serialized response body with its ETag and compressed variants, built once."""
+
+    content: bytes
+    digest: str
+    variants: dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, content: bytes) -> EncodedBody:
+        variants = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants["br"] = brotli.compress(content, quality=11)
+        return cls(
+            content=content,
+            digest=hashlib.sha256(content).hexdigest(),
+            # A variant that does not save bytes is not worth a Content-Encoding.
+            variants={name: data for name, data in variants.items() if len(data) < len(content)},
+        )
+
+
+def encoded_response(headers: Headers, body: EncodedBody, media_type: str) -> Response:
+    """200 in the best accepted encoding, or 304 when the client already holds it."""
+    encoding = negotiate_encoding(headers.get("accept-encoding"), set(body.variants))
+    response_headers = {
+        "etag": content_etag(body.digest, encoding),
+        "cache-control": REVALIDATE_CACHE_CONTROL,
+        "vary": "Accept-Encoding",
+    }
+    if etag_matches(headers.get("if-none-match"), response_headers["etag"]):
+        return Response(status_code=304, headers=response_headers)
+    if encoding is not None:
+        response_headers["content-encoding"] = encoding
+        return Response(body.variants[encoding], media_type=media_type, headers=response_headers)
+    return Response(body.content, media_type=media_type, headers=response_headers)
+
+
+_FileKey = tuple[str, int, int, int]
+
+
+def _file_key(path: str, stat_result: os.stat_result) -> _FileKey:
+    return path, stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns
+
+
+class FileDigests:
+    """SHA-256 of files, recomputed only when inode, size or mtime change."""
+
+    def __init__(self) -> None:
+        self._digests: dict[str, tuple[_FileKey, str]] = {}
+        self._lock = threading.Lock()
+
+    def digest(self, path: str | Path, stat_result: os.stat_result | None = None) -> str:
+        path = os.fspath(path)
+        key = _file_key(path, stat_result or os.stat(path))
+        with self._lock:
+            cached = self._digests.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        with open(path, "rb") as handle:
+            digest = hashlib.file_digest(handle, "sha256").hexdigest()
+        with self._lock:
+            self._digests[path] = (key, digest)
+        return digest
+
+
+file_digests = FileDigests()
+
+
+def asset_fingerprint(path: Path) -> str:
+    """Short content hash used as the `?v=` query of an asset URL."""
+    return file_digests.digest(path)[:ASSET_FINGERPRINT_LENGTH]
+
+
+class CachingStaticFiles(StaticFiles):
+    """`StaticFiles` with content-hash ETags, immutable fingerprinted URLs and precompression.
+
+    A request whose `v` query parameter equals the file's current fingerprint
+    (see `asset_url`) is cacheable for a year; anything else must revalidate,
+    which costs a 304 when the ETag still matches. When the client accepts it,
+    a sibling `<file>.br` or `<file>.gz` is sent instead, but only if its mtime
+    equals the source's, which `tools.precompress` sets. An edited source thus
+    falls back to identity until the variants are rebuilt.
+    """
+
+    def __init__(self, *, directory: str | Path, url_prefix: str) -> None:
+        super().__init__(directory=directory)
+        self.url_prefix = url_prefix.rstrip("/")
+
+    def asset_url(self, path: str) -> str:
+        """Fingerprinted URL of `path` under this mount, for templates."""
+        fingerprint = asset_fingerprint(Path(self.directory or "") / path)
+        return f"{self.url_prefix}/{path}?v={fingerprint}"
+
+    def _variants(
+        self, full_path: str, stat_result: os.stat_result
+    ) -> dict[str, tuple[str, os.stat_result]]:
+        variants: dict[str, tuple[str, os.stat_result]] = {}
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            try:
+                variant_stat = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            if variant_stat.st_mtime_ns == stat_result.st_mtime_ns:
+                variants[encoding] = (full_path + suffix, variant_stat)
+        return variants
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike[str],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        full_path = os.fspath(full_path)
+        request_headers = Headers(scope=scope)
+        digest = file_digests.digest(full_path, stat_result)
+        variants = self._variants(full_path, stat_result)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding"), set(variants))
+
+        query = scope.get("query_string", b"").decode("latin-1")
+        fingerprinted = f"v={digest[:ASSET_FINGERPRINT_LENGTH]}" in query.split("&")
+        headers = {
+            "etag": content_etag(digest, encoding),
+            "cache-control": IMMUTABLE_CACHE_CONTROL if fingerprinted else REVALIDATE_CACHE_CONTROL,
+        }
+        if variants:
+            headers["vary"] = "Accept-Encoding"
+        if encoding is not None:
+            headers["content-encoding"] = encoding
+            path, stat_result = variants[encoding]
+        else:
+            path = full_path
+
+        response = FileResponse(
+            path,
+            status_code=status_code,
+            headers=headers,
+            # The source's type, not `application/gzip` from the variant's suffix.
+            media_type=mimetypes.guess_type(full_path)[0] or "application/octet-stream",
+            stat_result=stat_result,
+        )
+        if etag_matches(request_headers.get("if-none-match"), headers["etag"]):
+            return NotModifiedResponse(response.headers)
+        return response
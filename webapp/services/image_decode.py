@@ -0,0 +1,202 @@
+"""Torch-free upload validation and image decoding shared by every inference backend."""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from io import BytesIO
+from time import perf_counter
+from typing import BinaryIO
+
+import numpy as np
+from PIL import Image
+
+from webapp.core.constants import ALLOWED_IMAGE_MIME_TYPES, ARRAY_MIME_TYPES, INPUT_IMAGE_SIZE
+
+# Draft-decode JPEGs to at least 4x the model input so the final bilinear
+# resize still antialiases; photos above ~1024px still decode at the 1/8 scale.
+_JPEG_DRAFT_OVERSAMPLE = 4
+
+FRAME_SHAPE = (*INPUT_IMAGE_SIZE, 3)
+FRAME_BYTES = FRAME_SHAPE[0] * FRAME_SHAPE[1] * FRAME_SHAPE[2]
+_NPY_MAGIC = b"\x93NUMPY"
+# Version 1 headers are at most 64 KiB; larger (version 2+) headers are not CIFAR-shaped.
+_NPY_MAX_HEADER_BYTES = 65536 + 10
+
+
+class UnsupportedMediaTypeError(ValueError):
+    """Raised when an uploaded file has an unsupported MIME type."""
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an uploaded payload exceeds max size."""
+
+
+class InvalidImageError(ValueError):
+    """Raised when uploaded bytes are not a valid image."""
+
+
+class InvalidArrayError(InvalidImageError):
+    """Raised when a raw or `.npy` upload is not uint8 frames of the model's input shape."""
+
+
+def upload_too_large_message(max_upload_bytes: int) -> str:
+    return f"Upload too large. Maximum size is {max_upload_bytes // (1024 * 1024)} MB."
+
+
+def validate_content_type(content_type: str | None, allow_arrays: bool = False) -> None:
+    if content_type in ALLOWED_IMAGE_MIME_TYPES:
+        return
+    if allow_arrays and content_type in ARRAY_MIME_TYPES:
+        return
+    if allow_arrays:
+        raise UnsupportedMediaTypeError(
+            "Unsupported file type. Upload a PNG or JPEG image, raw uint8 frames or a .npy array."
+        )
+    raise UnsupportedMediaTypeError(
+        "Unsupported file type. Upload a PNG or JPEG image."
+    )
+
+
+def is_array_upload(filename: str | None, content_type: str | None) -> bool:
+    return content_type in ARRAY_MIME_TYPES or (filename or "").lower().endswith(".npy")
+
+
+def read_upload_buffer(source: bytes | BinaryIO) -> bytearray | bytes:
+    """The whole upload in one buffer: bytes as-is, files read into a single `bytearray`."""
+    if isinstance(source, bytes):
+        return source
+    size = source.seek(0, 2)
+    source.seek(0)
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    filled = 0
+    while filled < size:
+        read = source.readinto(view[filled:])
+        if not read:
+            break
+        filled += read
+    return buffer if filled == size else buffer[:filled]
+
+
+def parse_frames(buffer: bytearray | bytes) -> np.ndarray:
+    """View `buffer` as `[N, 32, 32, 3]` uint8 frames without copying it.
+
+    `buffer` is either a `.npy` array of shape `[N, 32, 32, 3]` (or a single
+    `[32, 32, 3]` frame) or the concatenation of raw 3,072-byte HWC frames.
+    A `bytearray` gives a writable view that torch can wrap directly.
+    """
+    if bytes(buffer[: len(_NPY_MAGIC)]) == _NPY_MAGIC:
+        header = BytesIO(bytes(buffer[:_NPY_MAX_HEADER_BYTES]))
+        try:
+            version = np.lib.format.read_magic(header)
+            read_header = (
+                np.lib.format.read_array_header_1_0
+                if version == (1, 0)
+                else np.lib.format.read_array_header_2_0
+            )
+            shape, fortran_order, dtype = read_header(header)
+        except ValueError as exc:
+            raise InvalidArrayError(f"Invalid .npy header: {exc}") from exc
+        if dtype != np.uint8 or fortran_order:
+            raise InvalidArrayError(
+                f".npy arrays must be C-ordered uint8, got {dtype} "
+                f"(fortran_order={fortran_order})."
+            )
+        if shape == FRAME_SHAPE:
+            shape = (1, *FRAME_SHAPE)
+        if len(shape) != 4 or shape[1:] != FRAME_SHAPE or shape[0] < 1:
+            raise InvalidArrayError(
+                f".npy arrays must have shape [N, {', '.join(map(str, FRAME_SHAPE))}], "
+                f"got {list(shape)}."
+            )
+        offset = header.tell()
+        count = shape[0] * FRAME_BYTES
+        if len(buffer) - offset != count:
+            raise InvalidArrayError(
+                f".npy payload has {len(buffer) - offset} bytes, "
+                f"expected {count} for {list(shape)}."
+            )
+        return np.frombuffer(buffer, dtype=np.uint8, count=count, offset=offset).reshape(shape)
+
+    if not buffer or len(buffer) % FRAME_BYTES:
+        raise InvalidArrayError(
+            f"Raw uploads must be a whole number of {FRAME_BYTES}-byte frames "
+            f"({'x'.join(map(str, FRAME_SHAPE))} uint8, HWC), got {len(buffer)} bytes."
+        )
+    return np.frombuffer(buffer, dtype=np.uint8).reshape(-1, *FRAME_SHAPE)
+
+
+def validate_upload_size(size: int, max_upload_bytes: int) -> None:
+    if size > max_upload_bytes:
+        raise UploadTooLargeError(upload_too_large_message(max_upload_bytes))
+
+
+def validate_upload(content_type: str | None, raw_bytes: bytes, max_upload_bytes: int) -> None:
+    validate_content_type(content_type)
+    validate_upload_size(len(raw_bytes), max_upload_bytes)
+
+
+def open_rgb_image(source: bytes | BinaryIO) -> Image.Image:
+    """Decode to RGB; JPEGs are draft-decoded at a reduced DCT scale close to the input size.
+
+    `source` may be the raw bytes or a seekable file, e.g. a spooled upload,
+    which is decoded from the start without copying it into memory first.
+    """
+    height, width = INPUT_IMAGE_SIZE
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+    else:
+        source.seek(0)
+    try:
+        image = Image.open(source)
+        if image.format == "JPEG":
+            image.draft(
+                "RGB",
+                (_JPEG_DRAFT_OVERSAMPLE * width, _JPEG_DRAFT_OVERSAMPLE * height),
+            )
+        if image.mode == "RGB":
+            # e.g. the demo page's 32x32 PNGs: decoded as-is, without a converted copy.
+            image.load()
+            return image
+        return image.convert("RGB")
+    # Unidentified and truncated images raise OSError; oversized ones a DecompressionBombError.
+    except (OSError, Image.DecompressionBombError) as exc:
+        raise InvalidImageError("Uploaded file is not a valid image.") from exc
+
+
+def resize_to_input(image: Image.Image) -> Image.Image:
+    """Bilinear resize to the model input; images already at that size are returned untouched."""
+    height, width = INPUT_IMAGE_SIZE
+    if image.size == (width, height):
+        return image
+    return image.resize((width, height), Image.Resampling.BILINEAR)
+
+
+@lru_cache(maxsize=8)
+def normalization_affine_array(
+    mean: tuple[float, float, float],
+    std: tuple[float, float, float],
+) -> tuple[np.ndarray, np.ndarray]:
+    """`(scale, shift)` of shape `[3, 1, 1]` folding ToTensor's 1/255 and Normalize."""
+    mean_a = np.asarray(mean, dtype=np.float32).reshape(3, 1, 1)
+    std_a = np.asarray(std, dtype=np.float32).reshape(3, 1, 1)
+    return 1.0 / (255.0 * std_a), -mean_a / std_a
+
+
+def decode_image_array(
+    source: bytes | BinaryIO,
+    mean: tuple[float, float, float],
+    std: tuple[float, float, float],
+    timings: dict[str, float] | None = None,
+) -> np.ndarray:
+    """NumPy twin of `decode_image_fast`: a normalized float32 `[1, 3, H, W]` array."""
+    start = perf_counter()
+    image = open_rgb_image(source)
+    decoded_at = perf_counter()
+    pixels = np.asarray(resize_to_input(image), dtype=np.float32).transpose(2, 0, 1)
+    scale, shift = normalization_affine_array(mean, std)
+    array = (pixels * scale + shift)[np.newaxis]
+    if timings is not None:
+        timings["decode"] = decoded_at - start
+        timings["preprocess"] = perf_counter() - decoded_at
+    return np.ascontiguousarray(array)
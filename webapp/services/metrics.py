@@ -0,0 +1,218 @@
+"""Request stage timing and Prometheus text-format metrics."""
+
+from __future__ import annotations
+
+import math
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from time import perf_counter
+
+from fastapi import Request
+
+from webapp.schemas.prediction import ModelId
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans sub-millisecond decode of 32x32 PNGs up to multi-second large uploads.
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * len(self.buckets), [0.0]))
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[position] += 1
+                    break
+            total[0] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = sorted(
+                (key, list(counts), total[0]) for key, (counts, total) in self._series.items()
+            )
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts, strict=True):
+                cumulative += count
+                labels = _format_labels((*self.labelnames, "le"), (*key, _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class RequestMetrics:
+    """Per-stage latency histograms plus in-flight and loaded-model gauges."""
+
+    def __init__(self) -> None:
+        self.stage_seconds = Histogram(
+            "cifar_request_stage_seconds",
+            "Time spent in each request stage.",
+            ("stage", "model_id", "status"),
+        )
+        self.request_seconds = Histogram(
+            "cifar_http_request_duration_seconds",
+            "End-to-end HTTP request latency.",
+            ("method", "route", "status"),
+        )
+        self.in_flight = Gauge(
+            "cifar_http_requests_in_flight",
+            "HTTP requests currently being handled.",
+        )
+        self.model_loaded = Gauge(
+            "cifar_model_loaded",
+            "1 when the model's weights are resident, 0 when it is available but not loaded.",
+            ("model_id",),
+        )
+
+    def observe_request(self, request: Request, status_code: int, elapsed_seconds: float) -> None:
+        status = str(status_code)
+        route = request.scope.get("route")
+        self.request_seconds.observe(
+            elapsed_seconds,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status,
+        )
+        model_id = getattr(request.state, "model_id", None)
+        for stage, seconds in stage_timings(request).items():
+            self.stage_seconds.observe(
+                seconds,
+                stage=stage,
+                model_id=model_id.value if isinstance(model_id, ModelId) else "none",
+                status=status,
+            )
+
+    def render(self, loaded: Iterable[ModelId], available: Iterable[ModelId]) -> str:
+        loaded_ids = set(loaded)
+        for model_id in available:
+            self.model_loaded.set(1.0 if model_id in loaded_ids else 0.0, model_id=model_id.value)
+        lines = [
+            *self.request_seconds.render(),
+            *self.stage_seconds.render(),
+            *self.in_flight.render(),
+            *self.model_loaded.render(),
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def start_request_timing(request: Request) -> None:
+    request.state.started_at = perf_counter()
+    request.state.stage_timings = {}
+
+
+def stage_timings(request: Request) -> dict[str, float]:
+    return getattr(request.state, "stage_timings", {})
+
+
+def record_stage(request: Request, stage: str, seconds: float) -> None:
+    timings = stage_timings(request)
+    timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def record_parse_stage(request: Request) -> None:
+    """Time from middleware entry to handler entry: FastAPI's multipart/form parsing."""
+    started_at = getattr(request.state, "started_at", None)
+    if started_at is not None:
+        record_stage(request, "parse", perf_counter() - started_at)
+
+
+@contextmanager
+def timed_stage(request: Request, stage: str) -> Iterator[None]:
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(request, stage, perf_counter() - start)
+
+
+def server_timing_header(request: Request, total_seconds: float) -> str:
+    entries = [
+        f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in stage_timings(request).items()
+    ]
+    entries.append(f"total;dur={total_seconds * 1000:.3f}")
+    return ", ".join(entries)
@@ -0,0 +1,32 @@
+"""What the shared routes need from a model registry, kept torch-free for `webapp.lite`."""
+
+from __future__ import annotations
+
+from typing import Protocol
+
+from webapp.schemas.prediction import ModelId
+
+
+class ModelNotLoadedError(KeyError):
+    """Raised when a known model id has no loaded weights (e.g. an optional INT8 variant)."""
+
+    def __str__(self) -> str:
+        return str(self.args[0]) if self.args else "Model is not loaded."
+
+
+class ModelProvider(Protocol):
+    """Implemented by `ModelRegistry` (torch) and `NumpyModelRegistry` (NumPy).
+
+    `webapp.api.common` serves the index, `/health`, `/metrics` and reports
+    of either app through this interface alone.
+    """
+
+    @property
+    def loaded_model_ids(self) -> list[ModelId]: ...
+
+    @property
+    def available_model_ids(self) -> list[ModelId]: ...
+
+    def is_available(self, model_id: ModelId) -> bool: ...
+
+    def load_all(self) -> None: ...
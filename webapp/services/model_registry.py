@@ -2,61 +2,586 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from enum import Enum
 from pathlib import Path
+from time import perf_counter
 
 import torch
 import torch.nn as nn
 
-from webapp.core.constants import MODEL_CHECKPOINT_FILENAMES
+from webapp.core.constants import (
+    CIFAR10_CLASSES,
+    MODEL_CHECKPOINT_FILENAMES,
+    PRUNED_CHECKPOINT_FILENAMES,
+    QUANTIZED_CHECKPOINT_FILENAMES,
+)
 from webapp.core.config import Settings
 from webapp.models.cnn import create_model
-from webapp.schemas.prediction import ModelId
+from webapp.schemas.prediction import ModelId, ModelMemoryStats, ModelResidencyStats
+from webapp.services.model_provider import ModelNotLoadedError
+from webapp.services.optimize import (
+    OptimizationError,
+    OptimizationMode,
+    example_batch,
+    optimize_model,
+    with_memory_format,
+)
+from webapp.services.quantization import QUANTIZED_BASE_MODELS, build_quantized_model
+
+logger = logging.getLogger("webapp")
+
+_BYTES_PER_MB = 1024 * 1024
+
+# (inode, size, mtime_ns): changes whenever a checkpoint is rewritten or replaced.
+FileSignature = tuple[int, int, int]
+
+
+class LoadingMode(str, Enum):
+    eager = "eager"
+    lazy = "lazy"
+
+
+class CheckpointChangedError(RuntimeError):
+    """The checkpoint file was replaced while it was being loaded."""
+
+
+@dataclass
+class _ModelEntry:
+    checkpoint_path: Path | None = None
+    pinned: bool = False
+    size_bytes: int | None = None
+    load_ms: float | None = None
+    loads: int = 0
+    evictions: int = 0
+    checkpoint_sha256: str | None = None
+    loaded_at: float | None = None
+    # Signature of the file this entry reflects, the last one seen by `refresh`
+    # (acted on once it repeats), and the last one that failed to load.
+    signature: FileSignature | None = None
+    pending_signature: FileSignature | None = None
+    rejected_signature: FileSignature | None = None
+    reload_error: str | None = None
+
+
+@dataclass(frozen=True)
+class _LoadedModel:
+    model: nn.Module
+    load_ms: float | None = None
+    checkpoint_sha256: str | None = None
+    signature: FileSignature | None = None
+
+
+def file_signature(path: Path) -> FileSignature | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def file_sha256(path: Path) -> str:
+    with path.open("rb") as handle:
+        return hashlib.file_digest(handle, "sha256").hexdigest()
+
+
+def model_nbytes(model: nn.Module) -> int:
+    """Bytes held by a model's parameters and buffers, including packed INT8 weights."""
+
+    def tensor_bytes(value: object) -> int:
+        if isinstance(value, torch.Tensor):
+            return value.numel() * value.element_size()
+        if isinstance(value, tuple | list):
+            return sum(tensor_bytes(item) for item in value)
+        return 0
+
+    return sum(tensor_bytes(value) for value in model.state_dict().values())
 
 
 class ModelRegistry:
+    """Serves models by id, loading checkpoints on demand and evicting under a memory budget.
+
+    `get_model` is thread-safe: concurrent first requests for a model wait on a
+    per-model lock so its checkpoint is read once. Resident models are kept in
+    least-recently-used order; when their combined size exceeds the budget, the
+    oldest unpinned ones are dropped and reloaded on their next use. Requests
+    already holding an evicted model finish with it.
+
+    `refresh` swaps in checkpoints that changed on disk, with the same guarantee
+    for requests holding the replaced model.
+    """
+
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
-        self._models: dict[ModelId, nn.Module] = {}
         self.device = torch.device("cpu")
+        self.loading = LoadingMode(settings.model_loading)
+        self.memory_budget_bytes = int(settings.model_memory_budget_mb * _BYTES_PER_MB)
+        # `MODEL_CHANNELS_LAST` until an autotune profile switches it (`set_channels_last`).
+        self.channels_last = settings.model_channels_last
+        self._entries: dict[ModelId, _ModelEntry] = {}
+        self._resident: OrderedDict[ModelId, nn.Module] = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: dict[ModelId, threading.Lock] = {}
+        self.reload_failures = 0
 
     @property
     def loaded_model_ids(self) -> list[ModelId]:
-        return list(self._models.keys())
+        with self._lock:
+            return list(self._resident.keys())
+
+    @property
+    def available_model_ids(self) -> list[ModelId]:
+        with self._lock:
+            return [model_id for model_id in self._entries if self._is_available(model_id)]
+
+    def _is_available(self, model_id: ModelId) -> bool:
+        entry = self._entries.get(model_id)
+        return entry is not None and (
+            entry.checkpoint_path is not None or model_id in self._resident
+        )
+
+    def is_available(self, model_id: ModelId) -> bool:
+        """True when `model_id` is resident or has a checkpoint to load it from."""
+        with self._lock:
+            return self._is_available(model_id)
+
+    def is_resident(self, model_id: ModelId) -> bool:
+        with self._lock:
+            return model_id in self._resident
 
     def load_all(self) -> None:
+        """Discover checkpoints, then load all of them (eager) or only pinned models (lazy).
+
+        Missing float checkpoints fail startup in eager mode; in lazy mode they are
+        logged and requests for those models answer 503.
+        """
+        pinned = {ModelId(raw_model_id) for raw_model_id in self.settings.pinned_models}
         missing_paths: list[Path] = []
-        for raw_model_id, checkpoint_name in MODEL_CHECKPOINT_FILENAMES.items():
-            model_id = ModelId(raw_model_id)
-            checkpoint_path = self.settings.checkpoints_dir / checkpoint_name
-            if not checkpoint_path.exists():
+        for model_id, checkpoint_path, required in self._checkpoint_files():
+            signature = file_signature(checkpoint_path)
+            with self._lock:
+                entry = self._entries.setdefault(model_id, _ModelEntry())
+                entry.pinned = entry.pinned or model_id in pinned
+                if signature is not None:
+                    entry.checkpoint_path = checkpoint_path
+                    entry.signature = signature
+            if signature is None and required:
                 missing_paths.append(checkpoint_path)
-                continue
-
-            model = create_model(model_id).to(self.device)
-            checkpoint_obj = torch.load(checkpoint_path, map_location=self.device)
-            state_dict = self._extract_state_dict(checkpoint_obj)
-            if not isinstance(state_dict, dict):
-                raise RuntimeError(f"Invalid checkpoint format for {checkpoint_path}.")
 
-            normalized_state = {
-                str(key).removeprefix("module."): value
-                for key, value in state_dict.items()
-            }
-            model.load_state_dict(normalized_state)
-            model.eval()
+        missing_pinned = sorted(
+            model_id.value for model_id in pinned if not self.is_available(model_id)
+        )
+        if missing_pinned:
+            raise RuntimeError(f"Pinned models have no checkpoint: {', '.join(missing_pinned)}")
 
-            self._models[model_id] = model
+        preload = self.available_model_ids if self.loading == LoadingMode.eager else pinned
+        for model_id in preload:
+            self.get_model(model_id)
 
         if missing_paths:
             expected = ", ".join(str(path) for path in missing_paths)
-            raise RuntimeError(f"Missing checkpoint files at startup: {expected}")
+            if self.loading == LoadingMode.eager:
+                raise RuntimeError(f"Missing checkpoint files at startup: {expected}")
+            logger.warning(json.dumps({"event": "checkpoints_missing", "paths": expected}))
+
+    def _checkpoint_files(self) -> list[tuple[ModelId, Path, bool]]:
+        """`(model_id, path, required)` for every checkpoint the registry serves."""
+        # Quantized and pruned variants are optional: they only exist once
+        # `tools.quantize` / `tools.prune` have run.
+        return [
+            (ModelId(raw_model_id), self.settings.checkpoints_dir / checkpoint_name, required)
+            for filenames, required in (
+                (MODEL_CHECKPOINT_FILENAMES, True),
+                (QUANTIZED_CHECKPOINT_FILENAMES, False),
+                (PRUNED_CHECKPOINT_FILENAMES, False),
+            )
+            for raw_model_id, checkpoint_name in filenames.items()
+        ]
+
+    def load_checkpoint(self, model_id: ModelId, checkpoint_path: Path) -> nn.Module:
+        """Build `model_id` and load weights from `checkpoint_path` in eval mode.
+
+        Weights stay memory-mapped from the file. Publishing by rename gives the
+        path a new inode, so a model still serving keeps a valid mapping of the
+        old one and the reload maps the new file afresh. Overwriting a served
+        checkpoint in place (`cp`, `torch.save` to the same path) changes, or
+        SIGBUSes, mapped weights; `refresh` logs it when it happens.
+        """
+        try:
+            checkpoint_obj = torch.load(
+                checkpoint_path, map_location=self.device, mmap=True, weights_only=True
+            )
+        except RuntimeError:
+            # Legacy (pre-zipfile) checkpoints cannot be memory-mapped.
+            checkpoint_obj = torch.load(checkpoint_path, map_location=self.device, weights_only=True)
+        state_dict = self._extract_state_dict(checkpoint_obj)
+        if not isinstance(state_dict, dict):
+            raise RuntimeError(f"Invalid checkpoint format for {checkpoint_path}.")
+
+        normalized_state = {
+            str(key).removeprefix("module."): value
+            for key, value in state_dict.items()
+        }
+        metadata = getattr(state_dict, "_metadata", None)
+        if metadata is not None:
+            # Module versions live here; quantized layers need them to parse packed params.
+            normalized_state = OrderedDict(normalized_state)
+            normalized_state._metadata = OrderedDict(  # type: ignore[attr-defined]
+                (str(key).removeprefix("module."), value) for key, value in metadata.items()
+            )
+        if model_id in QUANTIZED_BASE_MODELS:
+            return build_quantized_model(model_id, normalized_state)
+
+        # Pruned variants carry the widths they were cut to.
+        architecture = (
+            checkpoint_obj.get("architecture") if isinstance(checkpoint_obj, dict) else None
+        )
+        model = create_model(model_id, architecture).to(self.device)
+        # assign=True adopts the loaded (possibly mmap'd) tensors instead of copying them.
+        model.load_state_dict(normalized_state, assign=True)
+        model.eval()
+        return model
+
+    def _load_validated(self, model_id: ModelId, checkpoint_path: Path) -> _LoadedModel:
+        """Load, optimize and smoke-test a checkpoint, recording what was read."""
+        signature = file_signature(checkpoint_path)
+        start = perf_counter()
+        checkpoint_sha256 = file_sha256(checkpoint_path)
+        model = self.load_checkpoint(model_id, checkpoint_path)
+        if model_id not in QUANTIZED_BASE_MODELS:
+            model = self._optimize(model_id, model)
+        with torch.inference_mode():
+            logits = model(example_batch(batch_size=1).to(self.device))
+        if logits.shape != (1, len(CIFAR10_CLASSES)) or not bool(torch.isfinite(logits).all()):
+            raise RuntimeError(
+                f"{checkpoint_path} produced logits of shape {tuple(logits.shape)} "
+                "or non-finite values on a test input."
+            )
+        if file_signature(checkpoint_path) != signature:
+            raise CheckpointChangedError(f"{checkpoint_path} changed while it was loading.")
+        return _LoadedModel(
+            model=model,
+            load_ms=(perf_counter() - start) * 1000,
+            checkpoint_sha256=checkpoint_sha256,
+            signature=signature,
+        )
+
+    def _optimize(self, model_id: ModelId, model: nn.Module) -> nn.Module:
+        """Apply the configured load-time optimization, keeping the eager model on mismatch."""
+        mode = OptimizationMode(self.settings.model_optimization)
+        channels_last = self.channels_last
+        if mode == OptimizationMode.none and not channels_last:
+            return model
+
+        start = perf_counter()
+        try:
+            optimized = optimize_model(model, mode, channels_last=channels_last, device=self.device)
+        except (OptimizationError, RuntimeError) as exc:
+            logger.warning(
+                json.dumps(
+                    {
+                        "event": "model_optimization_failed",
+                        "model_id": model_id.value,
+                        "mode": mode.value,
+                        "error": str(exc),
+                    }
+                )
+            )
+            return model
+
+        logger.info(
+            json.dumps(
+                {
+                    "event": "model_optimized",
+                    "model_id": model_id.value,
+                    "mode": mode.value,
+                    "channels_last": channels_last,
+                    "elapsed_ms": round((perf_counter() - start) * 1000, 3),
+                }
+            )
+        )
+        return optimized
+
+    def set_channels_last(self, enabled: bool) -> list[ModelId]:
+        """Serve float models in channels_last (or contiguous) layout; returns those converted.
+
+        Resident models are converted in memory and swapped in like a reload;
+        later loads are optimized with the new layout. Models whose graph cannot
+        be converted (traced or compiled) keep serving as they are.
+        """
+        with self._lock:
+            self.channels_last = enabled
+            resident = [
+                (model_id, model)
+                for model_id, model in self._resident.items()
+                if model_id not in QUANTIZED_BASE_MODELS
+            ]
+        converted: list[ModelId] = []
+        for model_id, model in resident:
+            try:
+                replacement = with_memory_format(model, enabled)
+            except OptimizationError as exc:
+                logger.warning(
+                    json.dumps(
+                        {
+                            "event": "model_layout_unchanged",
+                            "model_id": model_id.value,
+                            "channels_last": enabled,
+                            "error": str(exc),
+                        }
+                    )
+                )
+                continue
+            if replacement is model:
+                continue
+            with self._lock:
+                # A hot reload that landed meanwhile already used the new layout.
+                if self._resident.get(model_id) is model:
+                    self._resident[model_id] = replacement
+                    self._entries[model_id].size_bytes = model_nbytes(replacement)
+                    converted.append(model_id)
+        return converted
+
+    def register(self, model_id: ModelId, model: nn.Module) -> None:
+        """Serve an already-built model, e.g. randomly initialized weights in benchmarks.
+
+        Registered models have no checkpoint to reload from, so they are pinned.
+        """
+        with self._lock:
+            entry = self._entries.setdefault(model_id, _ModelEntry())
+            entry.pinned = True
+        self._admit(model_id, _LoadedModel(model=model.to(self.device).eval()))
 
     def get_model(self, model_id: ModelId) -> nn.Module:
-        model = self._models.get(model_id)
-        if model is None:
-            raise KeyError(f"Model {model_id} is not loaded.")
+        """Return a resident model, loading its checkpoint first if needed (blocking)."""
+        with self._lock:
+            model = self._touch(model_id)
+            if model is not None:
+                return model
+            entry = self._entries.get(model_id)
+            if entry is None or entry.checkpoint_path is None:
+                raise ModelNotLoadedError(f"Model {model_id.value} is not loaded.")
+            load_lock = self._load_locks.setdefault(model_id, threading.Lock())
+
+        with load_lock:
+            # Another caller may have finished loading while this one waited.
+            with self._lock:
+                model = self._touch(model_id)
+            if model is not None:
+                return model
+
+            loaded = self._load_validated(model_id, entry.checkpoint_path)
+            self._admit(model_id, loaded)
+        return loaded.model
+
+    def checkpoint_sha256(self, model_id: ModelId) -> str | None:
+        """Hash of the checkpoint `model_id` was last loaded from; `None` before its first load."""
+        with self._lock:
+            entry = self._entries.get(model_id)
+            return None if entry is None else entry.checkpoint_sha256
+
+    def serving_checkpoint_sha256(self, model_id: ModelId) -> str | None:
+        """Hash of the checkpoint now serving `model_id`, loading it first if needed (blocking).
+
+        `None` only for models registered without a checkpoint.
+        """
+        with self._lock:
+            model = self._touch(model_id)
+            if model is not None:
+                return self._entries[model_id].checkpoint_sha256
+        self.get_model(model_id)
+        return self.checkpoint_sha256(model_id)
+
+    def refresh(self) -> list[ModelId]:
+        """Pick up checkpoint files that changed on disk; returns the models swapped in.
+
+        Runs off the request path (see `webapp.services.hot_reload`). A change is
+        acted on once the same file signature is seen on two consecutive calls, so
+        a checkpoint still being written is not read. A resident model's
+        replacement is loaded and validated by `_load_validated`, then swapped in
+        under the registry lock. A checkpoint that fails is logged and skipped
+        until the file changes again, and the old model keeps serving. Models that
+        are not resident load the new file on their next use.
+        """
+        reloaded: list[ModelId] = []
+        for model_id, checkpoint_path, _ in self._checkpoint_files():
+            signature = file_signature(checkpoint_path)
+            with self._lock:
+                entry = self._entries.setdefault(model_id, _ModelEntry())
+                if signature is None or signature in (entry.signature, entry.rejected_signature):
+                    entry.pending_signature = None
+                    continue
+                if signature != entry.pending_signature:
+                    entry.pending_signature = signature
+                    continue
+                entry.pending_signature = None
+                rewritten_in_place = (
+                    model_id in self._resident
+                    and entry.signature is not None
+                    and entry.signature[0] == signature[0]
+                )
+                newly_available = entry.checkpoint_path is None
+                if model_id not in self._resident and not (
+                    newly_available and self.loading == LoadingMode.eager
+                ):
+                    entry.checkpoint_path = checkpoint_path
+                    entry.signature = signature
+                    entry.checkpoint_sha256 = None
+                    continue
+                previous_sha256 = entry.checkpoint_sha256
+                load_lock = self._load_locks.setdefault(model_id, threading.Lock())
+
+            if rewritten_in_place:
+                # Same inode: the serving model's mapped weights were overwritten under it.
+                logger.warning(
+                    json.dumps(
+                        {
+                            "event": "checkpoint_rewritten_in_place",
+                            "model_id": model_id.value,
+                            "checkpoint": str(checkpoint_path),
+                        }
+                    )
+                )
+            with load_lock:
+                try:
+                    loaded = self._load_validated(model_id, checkpoint_path)
+                except CheckpointChangedError:
+                    continue
+                except Exception as exc:  # noqa: BLE001 - a bad checkpoint must not be served
+                    with self._lock:
+                        entry.rejected_signature = signature
+                        entry.reload_error = str(exc)
+                        self.reload_failures += 1
+                    logger.warning(
+                        json.dumps(
+                            {
+                                "event": "model_reload_failed",
+                                "model_id": model_id.value,
+                                "checkpoint": str(checkpoint_path),
+                                "error": str(exc),
+                            }
+                        )
+                    )
+                    continue
+                with self._lock:
+                    entry.checkpoint_path = checkpoint_path
+                self._admit(model_id, loaded, previous_sha256=previous_sha256)
+            reloaded.append(model_id)
+        return reloaded
+
+    def _touch(self, model_id: ModelId) -> nn.Module | None:
+        model = self._resident.get(model_id)
+        if model is not None:
+            self._resident.move_to_end(model_id)
         return model
 
+    def _admit(
+        self,
+        model_id: ModelId,
+        loaded: _LoadedModel,
+        previous_sha256: str | None = None,
+    ) -> None:
+        size_bytes = model_nbytes(loaded.model)
+        with self._lock:
+            entry = self._entries.setdefault(model_id, _ModelEntry())
+            reloaded = model_id in self._resident
+            entry.size_bytes = size_bytes
+            entry.load_ms = loaded.load_ms
+            entry.loads += 1
+            entry.checkpoint_sha256 = loaded.checkpoint_sha256
+            entry.loaded_at = time.time()
+            entry.signature = loaded.signature
+            entry.rejected_signature = None
+            entry.reload_error = None
+            # A single assignment: requests already holding the previous model finish with it.
+            self._resident[model_id] = loaded.model
+            self._resident.move_to_end(model_id)
+            evicted = self._evict_over_budget(keep=model_id)
+            resident_bytes = self._resident_bytes()
+
+        load_ms = loaded.load_ms
+        logger.info(
+            json.dumps(
+                {
+                    "event": "model_reloaded" if reloaded else "model_loaded",
+                    "model_id": model_id.value,
+                    "size_mb": round(size_bytes / _BYTES_PER_MB, 3),
+                    "load_ms": None if load_ms is None else round(load_ms, 3),
+                    "checkpoint_sha256": loaded.checkpoint_sha256,
+                    **({"previous_sha256": previous_sha256} if reloaded else {}),
+                    "evicted": [evicted_id.value for evicted_id in evicted],
+                }
+            )
+        )
+        if self.memory_budget_bytes and resident_bytes > self.memory_budget_bytes:
+            logger.warning(
+                json.dumps(
+                    {
+                        "event": "model_memory_budget_exceeded",
+                        "resident_mb": round(resident_bytes / _BYTES_PER_MB, 3),
+                        "budget_mb": self.settings.model_memory_budget_mb,
+                    }
+                )
+            )
+
+    def _resident_bytes(self) -> int:
+        return sum(self._entries[model_id].size_bytes or 0 for model_id in self._resident)
+
+    def _evict_over_budget(self, keep: ModelId) -> list[ModelId]:
+        """Drop least-recently-used unpinned models until the budget holds. Caller holds the lock."""
+        if not self.memory_budget_bytes:
+            return []
+        evicted: list[ModelId] = []
+        for model_id in list(self._resident):
+            if self._resident_bytes() <= self.memory_budget_bytes:
+                break
+            entry = self._entries[model_id]
+            if model_id == keep or entry.pinned or entry.checkpoint_path is None:
+                continue
+            del self._resident[model_id]
+            entry.evictions += 1
+            evicted.append(model_id)
+        return evicted
+
+    def stats(self) -> ModelMemoryStats:
+        with self._lock:
+            return ModelMemoryStats(
+                loading=self.loading.value,
+                budget_mb=self.settings.model_memory_budget_mb or None,
+                resident_mb=round(self._resident_bytes() / _BYTES_PER_MB, 3),
+                models={
+                    model_id: ModelResidencyStats(
+                        available=self._is_available(model_id),
+                        resident=model_id in self._resident,
+                        pinned=entry.pinned,
+                        size_mb=(
+                            None
+                            if entry.size_bytes is None
+                            else round(entry.size_bytes / _BYTES_PER_MB, 3)
+                        ),
+                        load_ms=None if entry.load_ms is None else round(entry.load_ms, 3),
+                        loads=entry.loads,
+                        evictions=entry.evictions,
+                        checkpoint_sha256=entry.checkpoint_sha256,
+                        loaded_at=(
+                            None
+                            if entry.loaded_at is None
+                            else datetime.fromtimestamp(entry.loaded_at, UTC)
+                        ),
+                        reload_error=entry.reload_error,
+                    )
+                    for model_id, entry in self._entries.items()
+                },
+            )
+
     @staticmethod
     def _extract_state_dict(checkpoint_obj: object) -> dict[str, torch.Tensor] | None:
         if isinstance(checkpoint_obj, dict):
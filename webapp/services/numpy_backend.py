@@ -0,0 +1,154 @@
+"""Pure-NumPy inference for `BaselineCNN`, loadable without importing torch."""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Mapping
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from webapp.core.config import Settings
+from webapp.core.constants import NUMPY_CHECKPOINT_FILENAMES
+from webapp.schemas.prediction import ModelId
+from webapp.services.model_provider import ModelNotLoadedError
+
+logger = logging.getLogger("webapp")
+
+# Max absolute logit difference from the torch `BaselineCNN` on random inputs.
+NUMPY_EQUIVALENCE_ATOL = 1e-4
+
+_BASELINE_SHAPES = {
+    "conv1.weight": (12, 3, 5, 5),
+    "conv1.bias": (12,),
+    "conv2.weight": (24, 12, 5, 5),
+    "conv2.bias": (24,),
+    "fc1.weight": (120, 600),
+    "fc1.bias": (120,),
+    "fc2.weight": (84, 120),
+    "fc2.bias": (84,),
+    "fc3.weight": (10, 84),
+    "fc3.bias": (10,),
+}
+
+
+def _conv2d(images: np.ndarray, weight: np.ndarray, bias: np.ndarray) -> np.ndarray:
+    """Valid (unpadded, stride 1) convolution as im2col followed by one batched matmul."""
+    batch, channels, height, width = images.shape
+    out_channels, _, kernel, _ = weight.shape
+    out_height, out_width = height - kernel + 1, width - kernel + 1
+    # [N, C, OH, OW, k, k] view -> [N, OH*OW, C*k*k] columns (the only copy).
+    windows = sliding_window_view(images, (kernel, kernel), axis=(2, 3))
+    columns = windows.transpose(0, 2, 3, 1, 4, 5).reshape(
+        batch, out_height * out_width, channels * kernel * kernel
+    )
+    output = columns @ weight.reshape(out_channels, -1).T
+    output += bias
+    return output.transpose(0, 2, 1).reshape(batch, out_channels, out_height, out_width)
+
+
+def _relu(values: np.ndarray) -> np.ndarray:
+    return np.maximum(values, 0.0, out=values)
+
+
+def _max_pool_2x2(values: np.ndarray) -> np.ndarray:
+    batch, channels, height, width = values.shape
+    trimmed = values[:, :, : height // 2 * 2, : width // 2 * 2]
+    return trimmed.reshape(batch, channels, height // 2, 2, width // 2, 2).max(axis=(3, 5))
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
+
+
+class NumpyBaselineCNN:
+    """`BaselineCNN.forward` in NumPy: float32 `[N, 3, 32, 32]` in, `[N, 10]` logits out."""
+
+    def __init__(self, weights: Mapping[str, np.ndarray]) -> None:
+        self.weights: dict[str, np.ndarray] = {}
+        for name, shape in _BASELINE_SHAPES.items():
+            if name not in weights:
+                raise ValueError(f"Missing baseline weight {name!r}.")
+            value = np.ascontiguousarray(weights[name], dtype=np.float32)
+            if value.shape != shape:
+                raise ValueError(f"Weight {name!r} has shape {value.shape}, expected {shape}.")
+            self.weights[name] = value
+
+    @classmethod
+    def from_npz(cls, path: Path) -> NumpyBaselineCNN:
+        with np.load(path, allow_pickle=False) as archive:
+            return cls({name: archive[name] for name in archive.files})
+
+    @property
+    def nbytes(self) -> int:
+        return sum(value.nbytes for value in self.weights.values())
+
+    def __call__(self, images: np.ndarray) -> np.ndarray:
+        w = self.weights
+        x = np.asarray(images, dtype=np.float32)
+        x = _max_pool_2x2(_relu(_conv2d(x, w["conv1.weight"], w["conv1.bias"])))
+        x = _max_pool_2x2(_relu(_conv2d(x, w["conv2.weight"], w["conv2.bias"])))
+        x = x.reshape(x.shape[0], -1)
+        x = _relu(x @ w["fc1.weight"].T + w["fc1.bias"])
+        x = _relu(x @ w["fc2.weight"].T + w["fc2.bias"])
+        return x @ w["fc3.weight"].T + w["fc3.bias"]
+
+
+class NumpyModelRegistry:
+    """Serves the `.npz` exports in `NUMPY_CHECKPOINT_FILENAMES` to `webapp.lite`, without torch."""
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self._models: dict[ModelId, NumpyBaselineCNN] = {}
+
+    @property
+    def loaded_model_ids(self) -> list[ModelId]:
+        return list(self._models.keys())
+
+    @property
+    def available_model_ids(self) -> list[ModelId]:
+        return self.loaded_model_ids
+
+    def is_available(self, model_id: ModelId) -> bool:
+        return model_id in self._models
+
+    def load_all(self) -> None:
+        missing_paths: list[Path] = []
+        for raw_model_id, checkpoint_name in NUMPY_CHECKPOINT_FILENAMES.items():
+            model_id = ModelId(raw_model_id)
+            checkpoint_path = self.settings.checkpoints_dir / checkpoint_name
+            if not checkpoint_path.exists():
+                missing_paths.append(checkpoint_path)
+                continue
+
+            start = perf_counter()
+            model = NumpyBaselineCNN.from_npz(checkpoint_path)
+            self._models[model_id] = model
+            logger.info(
+                json.dumps(
+                    {
+                        "event": "model_loaded",
+                        "model_id": model_id.value,
+                        "backend": "numpy",
+                        "size_mb": round(model.nbytes / (1024 * 1024), 3),
+                        "load_ms": round((perf_counter() - start) * 1000, 3),
+                    }
+                )
+            )
+
+        if missing_paths:
+            expected = ", ".join(str(path) for path in missing_paths)
+            raise RuntimeError(
+                f"Missing checkpoint files at startup: {expected} "
+                "(create them with `python -m tools.export_numpy`)"
+            )
+
+    def get_model(self, model_id: ModelId) -> NumpyBaselineCNN:
+        model = self._models.get(model_id)
+        if model is None:
+            raise ModelNotLoadedError(f"Model {model_id.value} is not served by the NumPy backend.")
+        return model
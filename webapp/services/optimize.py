@@ -0,0 +1,158 @@
+"""Inference-only graph optimizations applied to models at load time."""
+
+from __future__ import annotations
+
+import copy
+from enum import Enum
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+
+from webapp.core.constants import INPUT_IMAGE_SIZE
+
+EQUIVALENCE_ATOL = 1e-4
+
+
+class OptimizationMode(str, Enum):
+    none = "none"
+    fuse = "fuse"
+    torchscript = "torchscript"
+    compile = "compile"
+
+
+class OptimizationError(RuntimeError):
+    """Raised when an optimized model does not match its eager reference."""
+
+
+class ConvReLU2d(nn.Module):
+    """Conv2d (with any BatchNorm already folded in) followed by an in-place ReLU."""
+
+    def __init__(self, conv: nn.Conv2d) -> None:
+        super().__init__()
+        self.conv = conv
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return F.relu(self.conv(x), inplace=True)
+
+
+class ChannelsLastInput(nn.Module):
+    """Feeds a channels_last model without callers having to convert inputs."""
+
+    def __init__(self, model: nn.Module) -> None:
+        super().__init__()
+        self.model = model
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self.model(x.contiguous(memory_format=torch.channels_last))
+
+
+def _fuse_sequential(sequential: nn.Sequential) -> nn.Sequential:
+    modules = list(sequential.children())
+    fused: list[nn.Module] = []
+    index = 0
+    while index < len(modules):
+        module = modules[index]
+        index += 1
+        if isinstance(module, nn.Dropout | nn.Dropout2d):
+            continue
+        if isinstance(module, nn.Sequential):
+            fused.append(_fuse_sequential(module))
+            continue
+        if isinstance(module, nn.Conv2d):
+            if index < len(modules) and isinstance(modules[index], nn.BatchNorm2d):
+                module = fuse_conv_bn_eval(module, modules[index])
+                index += 1
+            if index < len(modules) and isinstance(modules[index], nn.ReLU):
+                module = ConvReLU2d(module)
+                index += 1
+        fused.append(module)
+    return nn.Sequential(*fused)
+
+
+def fuse_for_inference(model: nn.Module) -> nn.Module:
+    """Return an eval-mode copy with BatchNorm folded into convs, Conv+ReLU fused and Dropout removed.
+
+    Only `nn.Sequential` containers are rewritten; models built from functional
+    calls (like `BaselineCNN`) come back unchanged apart from being copied.
+    """
+    optimized = copy.deepcopy(model).eval()
+    for name, child in list(optimized.named_children()):
+        if isinstance(child, nn.Sequential):
+            setattr(optimized, name, _fuse_sequential(child))
+    return optimized
+
+
+def example_batch(batch_size: int = 8, seed: int = 0) -> torch.Tensor:
+    generator = torch.Generator().manual_seed(seed)
+    return torch.randn(batch_size, 3, *INPUT_IMAGE_SIZE, generator=generator)
+
+
+@torch.inference_mode()
+def max_abs_difference(reference: nn.Module, candidate: nn.Module, batch: torch.Tensor) -> float:
+    return float((reference(batch) - candidate(batch)).abs().max())
+
+
+def optimize_model(
+    model: nn.Module,
+    mode: OptimizationMode,
+    channels_last: bool = False,
+    device: torch.device | None = None,
+) -> nn.Module:
+    """Apply `mode` (and optionally channels_last) and verify against the eager model.
+
+    Raises `OptimizationError` when logits drift beyond `EQUIVALENCE_ATOL` on a
+    fixed random batch, so callers can fall back to the eager graph.
+    """
+    if mode == OptimizationMode.none and not channels_last:
+        return model
+
+    device = device or torch.device("cpu")
+    reference = model.eval()
+    optimized = reference if mode == OptimizationMode.none else fuse_for_inference(reference)
+    if channels_last:
+        if optimized is reference:
+            optimized = copy.deepcopy(reference)
+        optimized = ChannelsLastInput(optimized.to(memory_format=torch.channels_last))
+
+    batch = example_batch().to(device)
+    if mode == OptimizationMode.torchscript:
+        with torch.inference_mode(False), torch.no_grad():
+            traced = torch.jit.trace(optimized, batch, check_trace=False)
+            optimized = torch.jit.optimize_for_inference(torch.jit.freeze(traced.eval()))
+    elif mode == OptimizationMode.compile:
+        optimized = torch.compile(optimized, dynamic=True)
+
+    difference = max_abs_difference(reference, optimized, batch)
+    if difference > EQUIVALENCE_ATOL:
+        raise OptimizationError(
+            f"Optimized model ({mode.value}, channels_last={channels_last}) differs from eager "
+            f"by {difference:.2e} > {EQUIVALENCE_ATOL:.0e}."
+        )
+    return optimized
+
+
+def with_memory_format(model: nn.Module, channels_last: bool) -> nn.Module:
+    """`model` converted to or from channels_last, or `model` itself when already in that layout.
+
+    Only eager and fused graphs can be converted; traced and compiled ones keep
+    their weights' layout baked in and raise `OptimizationError`.
+    """
+    is_channels_last = isinstance(model, ChannelsLastInput)
+    if is_channels_last == channels_last:
+        return model
+    if isinstance(model, torch.jit.ScriptModule) or hasattr(model, "_orig_mod"):
+        raise OptimizationError("Traced or compiled models cannot change memory format.")
+    if channels_last:
+        converted = ChannelsLastInput(copy.deepcopy(model).to(memory_format=torch.channels_last))
+    else:
+        converted = copy.deepcopy(model.model).to(memory_format=torch.contiguous_format)
+    batch = example_batch()
+    difference = max_abs_difference(model, converted, batch)
+    if difference > EQUIVALENCE_ATOL:
+        raise OptimizationError(
+            f"Model in channels_last={channels_last} differs by {difference:.2e} "
+            f"> {EQUIVALENCE_ATOL:.0e}."
+        )
+    return converted
@@ -0,0 +1,140 @@
+"""Content-addressed LRU cache of prediction probabilities with single-flight."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from time import monotonic
+from typing import BinaryIO
+
+import torch
+
+from webapp.schemas.prediction import ModelId, PredictionCacheStats
+
+
+@dataclass(frozen=True)
+class CachedPrediction:
+    """Full probability vector, so any `top_k` can be answered from one entry."""
+
+    probabilities: torch.Tensor
+    inference_ms: float
+
+
+def content_digest(source: bytes | BinaryIO) -> str:
+    """BLAKE2b of an upload, either as bytes or streamed from a seekable file."""
+    if isinstance(source, bytes):
+        return hashlib.blake2b(source, digest_size=20).hexdigest()
+    source.seek(0)
+    return hashlib.file_digest(source, lambda: hashlib.blake2b(digest_size=20)).hexdigest()
+
+
+def cache_key(
+    digest: str,
+    model_id: ModelId,
+    checkpoint_sha256: str | None = None,
+    input_kind: str = "image",
+) -> str:
+    """Keyed by checkpoint too, so a hot-reloaded model never answers from its predecessor.
+
+    `input_kind` names the decoder (`image` or `array`): the same bytes decode to
+    different tensors as a raw frame and as an encoded image.
+    """
+    return f"{model_id.value}@{(checkpoint_sha256 or '')[:16]}:{input_kind}:{digest}"
+
+
+class PredictionCache:
+    """Bounded LRU with TTL eviction.
+
+    Concurrent misses for the same key are collapsed: the first caller computes
+    while the rest await its result (or its exception). If that caller is
+    cancelled, e.g. because its client disconnected, a waiting caller takes over
+    the computation instead of failing with it.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max(0, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, CachedPrediction]] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Future[CachedPrediction]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def _lookup(self, key: str) -> CachedPrediction | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= monotonic():
+            del self._entries[key]
+            self._expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key: str, value: CachedPrediction) -> None:
+        if self.max_entries == 0:
+            return
+        self._entries[key] = (monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[CachedPrediction]],
+    ) -> tuple[CachedPrediction, bool]:
+        """Return `(prediction, served_from_cache)`."""
+        cached = self._lookup(key)
+        if cached is not None:
+            self._hits += 1
+            return cached, True
+
+        while (pending := self._in_flight.get(key)) is not None:
+            self._coalesced += 1
+            try:
+                return await asyncio.shield(pending), True
+            except asyncio.CancelledError:
+                # A cancelled future means the computing caller was cancelled, not
+                # this one. The first follower to wake up recomputes; the rest wait on it.
+                if not pending.cancelled():
+                    raise
+
+        self._misses += 1
+        future: asyncio.Future[CachedPrediction] = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved so a failure without followers is not logged as unhandled.
+            future.exception()
+            raise
+        else:
+            self._store(key, value)
+            future.set_result(value)
+            return value, False
+        finally:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> PredictionCacheStats:
+        return PredictionCacheStats(
+            entries=len(self._entries),
+            max_entries=self.max_entries,
+            ttl_seconds=self.ttl_seconds,
+            hits=self._hits,
+            misses=self._misses,
+            coalesced=self._coalesced,
+            evictions=self._evictions,
+            expirations=self._expirations,
+        )
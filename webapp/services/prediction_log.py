@@ -0,0 +1,339 @@
+"""Append-only binary log of every served prediction, for drift and accuracy analysis.
+
+The request path only copies one fixed-size record (`RECORD_DTYPE`) into a
+preallocated buffer under a lock; it never touches the disk. A daemon thread
+swaps in the spare buffer every `flush_seconds`, or sooner once half of it is
+used, and appends the filled one to the current segment with a single write.
+When the buffer is full, further records are counted as dropped instead of
+blocking requests.
+
+Segments are `predictions-<YYYYMMDD>-<pid>-<n>.bin` in `PREDICTION_LOG_DIR`. Each
+is a JSON header describing the record layout, then packed records. They rotate at the
+UTC day boundary or once they reach the size limit, so every file can be memory-mapped
+as one structured NumPy array (`read_segment`). `load_day` gathers a day's segments
+into columns. A torn final record from a crash is ignored.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from datetime import UTC, date, datetime
+from enum import Enum
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+import torch
+
+from webapp.core.constants import CIFAR10_CLASSES
+from webapp.schemas.prediction import ModelId, PredictionLogStats
+
+logger = logging.getLogger("webapp")
+
+SEGMENT_MAGIC = b"CIFARLOG"
+SEGMENT_VERSION = 1
+# The header is padded to this multiple so the records start aligned.
+_HEADER_ALIGNMENT = 64
+_SECONDS_PER_DAY = 86_400
+
+
+class PredictionSource(str, Enum):
+    predict = "predict"
+    batch = "batch"
+    stream = "stream"
+
+
+# BLAKE2b-160 of the input, as `content_digest` computes it.
+DIGEST_BYTES = 20
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("timestamp", "<f8"),  # Unix seconds when the prediction was logged
+        ("request_id", "S36"),
+        ("item", "<u4"),  # index in a batch request or frame number in a stream, else 0
+        ("model", "u1"),  # position in the segment header's `model_ids`
+        ("source", "u1"),  # position in the segment header's `sources`
+        ("cached", "?"),
+        ("input_digest", "u1", (DIGEST_BYTES,)),
+        ("probabilities", "<f4", (len(CIFAR10_CLASSES),)),
+        ("decode_ms", "<f4"),
+        ("queue_ms", "<f4"),
+        ("forward_ms", "<f4"),
+        ("latency_ms", "<f4"),
+    ]
+)
+
+_MODEL_CODES = {model_id: code for code, model_id in enumerate(ModelId)}
+_SOURCE_CODES = {source: code for code, source in enumerate(PredictionSource)}
+
+
+def _header_fields() -> dict[str, object]:
+    return {
+        "version": SEGMENT_VERSION,
+        "dtype": [list(field) for field in RECORD_DTYPE.descr],
+        "model_ids": [model_id.value for model_id in ModelId],
+        "sources": [source.value for source in PredictionSource],
+        "classes": list(CIFAR10_CLASSES),
+    }
+
+
+def segment_header() -> bytes:
+    """Magic, a little-endian u32 length and the JSON layout, padded to `_HEADER_ALIGNMENT`."""
+    body = json.dumps(_header_fields(), separators=(",", ":")).encode()
+    prefix_bytes = len(SEGMENT_MAGIC) + 4
+    padded = -(-(prefix_bytes + len(body)) // _HEADER_ALIGNMENT) * _HEADER_ALIGNMENT
+    body = body.ljust(padded - prefix_bytes)
+    return SEGMENT_MAGIC + struct.pack("<I", len(body)) + body
+
+
+def read_segment_header(path: Path) -> tuple[dict[str, object], np.dtype, int]:
+    """The segment's JSON header, its record dtype and the byte offset of the first record."""
+    with path.open("rb") as handle:
+        prefix = handle.read(len(SEGMENT_MAGIC) + 4)
+        if len(prefix) < len(SEGMENT_MAGIC) + 4 or not prefix.startswith(SEGMENT_MAGIC):
+            raise ValueError(f"{path} is not a prediction log segment.")
+        (length,) = struct.unpack("<I", prefix[len(SEGMENT_MAGIC) :])
+        header = json.loads(handle.read(length))
+    if header.get("version") != SEGMENT_VERSION:
+        raise ValueError(f"{path} has unsupported version {header.get('version')!r}.")
+    # JSON turns the descr's tuples into lists; subarray shapes must be tuples again.
+    dtype = np.dtype(
+        [(name, fmt, *(tuple(shape) for shape in rest)) for name, fmt, *rest in header["dtype"]]
+    )
+    return header, dtype, len(prefix) + length
+
+
+def read_segment(path: Path) -> tuple[dict[str, object], np.ndarray]:
+    """Memory-map a segment's complete records as a structured array (read-only)."""
+    header, dtype, offset = read_segment_header(path)
+    count = (path.stat().st_size - offset) // dtype.itemsize
+    if count == 0:
+        return header, np.empty(0, dtype=dtype)
+    return header, np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+
+def segment_paths(directory: Path, day: date) -> list[Path]:
+    return sorted(directory.glob(f"predictions-{day:%Y%m%d}-*.bin"))
+
+
+def _columns(header: dict[str, object], records: np.ndarray) -> dict[str, np.ndarray]:
+    columns: dict[str, np.ndarray] = {}
+    for name in records.dtype.names:
+        values = records[name]
+        if name == "model":
+            columns["model_id"] = np.asarray(header["model_ids"])[values]
+        elif name == "source":
+            columns["source"] = np.asarray(header["sources"])[values]
+        elif name == "request_id":
+            columns[name] = values.astype(str)
+        else:
+            columns[name] = np.array(values)
+    return columns
+
+
+def load_day(directory: Path, day: date) -> dict[str, np.ndarray]:
+    """Every record logged on `day` (UTC) by any worker, as columns in timestamp order.
+
+    Codes are resolved through each segment's header: `model_id`, `source` and
+    `request_id` come back as strings, `input_digest` as `[N, 20]` uint8 rows and
+    `probabilities` as `[N, 10]` float32.
+    """
+    parts = [_columns(*read_segment(path)) for path in segment_paths(directory, day)]
+    if not parts:
+        parts = [_columns(_header_fields(), np.empty(0, dtype=RECORD_DTYPE))]
+    merged = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+    order = np.argsort(merged["timestamp"], kind="stable")
+    return {name: values[order] for name, values in merged.items()}
+
+
+class PredictionLog:
+    """Buffers records on the request path and appends them from a daemon thread."""
+
+    def __init__(
+        self,
+        directory: Path,
+        buffer_records: int,
+        flush_seconds: float,
+        segment_bytes: int,
+    ) -> None:
+        self.directory = directory
+        self.buffer_records = max(2, buffer_records)
+        self.flush_seconds = max(0.01, flush_seconds)
+        self.segment_bytes = max(1, segment_bytes)
+        self._active = np.zeros(self.buffer_records, dtype=RECORD_DTYPE)
+        self._spare = np.zeros(self.buffer_records, dtype=RECORD_DTYPE)
+        self._count = 0
+        self._lock = threading.Lock()
+        # Held while a buffer is written, so `flush` from `stop` never overlaps the thread's.
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._segment: BinaryIO | None = None
+        self._segment_day: int | None = None
+        self._segment_size = 0
+        self._segments = 0
+        self._records_written = 0
+        self._records_dropped = 0
+        self._bytes_written = 0
+        self._flushes = 0
+        self._write_errors = 0
+
+    def submit(
+        self,
+        *,
+        request_id: str | None,
+        model_id: ModelId,
+        source: PredictionSource,
+        probabilities: torch.Tensor,
+        input_digest: str,
+        item: int = 0,
+        cached: bool = False,
+        decode_ms: float = 0.0,
+        queue_ms: float = 0.0,
+        forward_ms: float = 0.0,
+        latency_ms: float = 0.0,
+    ) -> bool:
+        """Copy one record into the buffer. Returns False, dropping it, when the buffer is full.
+
+        `input_digest` is the hex `content_digest` of the input.
+        """
+        record = (
+            time.time(),
+            (request_id or "").encode()[:36],
+            item,
+            _MODEL_CODES[model_id],
+            _SOURCE_CODES[source],
+            cached,
+            np.frombuffer(bytes.fromhex(input_digest), dtype=np.uint8),
+            probabilities.numpy(),
+            decode_ms,
+            queue_ms,
+            forward_ms,
+            latency_ms,
+        )
+        with self._lock:
+            if self._count == self.buffer_records:
+                self._records_dropped += 1
+                return False
+            self._active[self._count] = record
+            self._count += 1
+            if self._count * 2 >= self.buffer_records:
+                self._wakeup.set()
+        return True
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="prediction-log", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread, write what is still buffered and close the segment."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+        self.flush()
+        with self._write_lock:
+            self._close_segment()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Append everything buffered so far; returns the number of records written."""
+        with self._write_lock:
+            with self._lock:
+                if self._count == 0:
+                    return 0
+                records = self._active[: self._count]
+                self._active, self._spare, self._count = self._spare, self._active, 0
+            try:
+                self._append(records)
+            except OSError as exc:
+                self._write_errors += 1
+                logger.warning(
+                    json.dumps(
+                        {
+                            "event": "prediction_log_write_failed",
+                            "records": len(records),
+                            "error": str(exc),
+                        }
+                    )
+                )
+                self._close_segment()
+                return 0
+            self._flushes += 1
+            self._records_written += len(records)
+            return len(records)
+
+    def _append(self, records: np.ndarray) -> None:
+        days = (records["timestamp"] // _SECONDS_PER_DAY).astype(np.int64)
+        unique_days = np.unique(days)
+        # Records around a UTC midnight go to their own day's segment.
+        for day in unique_days:
+            day_records = records if len(unique_days) == 1 else records[days == day]
+            data = day_records.view(np.uint8)
+            segment = self._segment
+            if (
+                segment is None
+                or self._segment_day != day
+                or self._segment_size + len(data) > self.segment_bytes
+            ):
+                segment = self._open_segment(int(day))
+            segment.write(data)
+            segment.flush()
+            self._segment_size += len(data)
+            self._bytes_written += len(data)
+
+    def _open_segment(self, day: int) -> BinaryIO:
+        self._close_segment()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.fromtimestamp(day * _SECONDS_PER_DAY, UTC).strftime("%Y%m%d")
+        index = 0
+        while True:
+            path = self.directory / f"predictions-{stamp}-{os.getpid()}-{index:04d}.bin"
+            try:
+                # Exclusive: never appends to a segment another process (or PID) wrote.
+                segment = path.open("xb")
+                break
+            except FileExistsError:
+                index += 1
+        header = segment_header()
+        segment.write(header)
+        self._segment = segment
+        self._segment_day = day
+        self._segment_size = len(header)
+        self._segments += 1
+        return segment
+
+    def _close_segment(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    def stats(self) -> PredictionLogStats:
+        with self._lock:
+            pending = self._count
+        return PredictionLogStats(
+            directory=str(self.directory),
+            buffer_records=self.buffer_records,
+            pending=pending,
+            records_written=self._records_written,
+            records_dropped=self._records_dropped,
+            bytes_written=self._bytes_written,
+            flushes=self._flushes,
+            segments=self._segments,
+            write_errors=self._write_errors,
+        )
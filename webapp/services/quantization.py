@@ -0,0 +1,95 @@
+"""Post-training static INT8 quantization of the CNN models (CPU only)."""
+
+from __future__ import annotations
+
+import copy
+import os
+import warnings
+from collections.abc import Iterable
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+from torch.ao.quantization import get_default_qconfig_mapping
+from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+from webapp.core.constants import INPUT_IMAGE_SIZE
+from webapp.models.cnn import create_model
+from webapp.schemas.prediction import ModelId
+
+QUANTIZED_BASE_MODELS = {
+    ModelId.baseline_int8: ModelId.baseline,
+    ModelId.cnnv2_int8: ModelId.cnnv2,
+}
+
+
+def quantized_engine() -> str:
+    """x86/fbgemm kernels on Intel/AMD, qnnpack on ARM hosts."""
+    supported = torch.backends.quantized.supported_engines
+    for engine in ("x86", "fbgemm", "qnnpack"):
+        if engine in supported:
+            return engine
+    raise RuntimeError("This torch build has no quantized CPU engine.")
+
+
+def _prepare(float_model: nn.Module, engine: str) -> nn.Module:
+    torch.backends.quantized.engine = engine
+    example = (torch.zeros(1, 3, *INPUT_IMAGE_SIZE),)
+    # prepare_fx also fuses Conv+BN+ReLU patterns because the model is in eval mode.
+    return prepare_fx(
+        copy.deepcopy(float_model).eval(),
+        get_default_qconfig_mapping(engine),
+        example,
+    )
+
+
+@torch.inference_mode()
+def quantize_model(
+    float_model: nn.Module,
+    calibration_batches: Iterable[torch.Tensor],
+    engine: str | None = None,
+) -> nn.Module:
+    """Insert observers, run calibration batches through them and convert to INT8."""
+    engine = engine or quantized_engine()
+    prepared = _prepare(float_model, engine)
+    for batch in calibration_batches:
+        prepared(batch)
+    return convert_fx(prepared)
+
+
+def save_quantized_checkpoint(
+    quantized_model: nn.Module,
+    model_id: ModelId,
+    path: Path,
+    metadata: dict[str, object] | None = None,
+) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = path.with_name(f"{path.name}.partial")
+    torch.save(
+        {
+            "model_name": model_id.value,
+            "base_model": QUANTIZED_BASE_MODELS[model_id].value,
+            "quantized_engine": torch.backends.quantized.engine,
+            "model_state_dict": quantized_model.state_dict(),
+            **(metadata or {}),
+        },
+        partial_path,
+    )
+    # Renamed into place: the server may be watching for this file.
+    os.replace(partial_path, path)
+
+
+def build_quantized_model(
+    model_id: ModelId,
+    state_dict: dict[str, torch.Tensor],
+    engine: str | None = None,
+) -> nn.Module:
+    """Rebuild the converted graph from the float architecture and load INT8 weights into it."""
+    base_model_id = QUANTIZED_BASE_MODELS[model_id]
+    with warnings.catch_warnings():
+        # Observers in the skeleton are never run; their placeholder qparams are
+        # overwritten by the checkpoint's scales and zero points below.
+        warnings.simplefilter("ignore", UserWarning)
+        skeleton = convert_fx(_prepare(create_model(base_model_id), engine or quantized_engine()))
+    skeleton.load_state_dict(state_dict)
+    return skeleton.eval()
@@ -13,6 +13,7 @@ from webapp.schemas.prediction import (
     ReportMetrics,
     ReportSummaryResponse,
 )
+from webapp.services.http_cache import EncodedBody, asset_fingerprint
 
 _METRICS_FILENAME = "results.json"
 _CONFUSION_MATRICES = {
@@ -60,6 +61,7 @@ def _load_metrics(metrics_path: Path) -> ReportMetrics:
                 test_precision_macro=_to_optional_float(item.get("test_precision_macro")),
                 test_recall_macro=_to_optional_float(item.get("test_recall_macro")),
                 test_f1_macro=_to_optional_float(item.get("test_f1_macro")),
+                latency_ms=_to_optional_float(item.get("latency_ms")),
             )
         )
 
@@ -75,12 +77,55 @@ def _load_confusion_matrices(reports_dir: Path) -> list[ReportFigure]:
         figures.append(
             ReportFigure(
                 name=f"Confusion Matrix {model_id.value.upper()}",
-                url=f"/reports-assets/{relative_path}",
+                # Fingerprinted, so browsers keep the PNG until a reload changes its content.
+                url=f"/reports-assets/{relative_path}?v={asset_fingerprint(figure_path)}",
             )
         )
     return figures
 
 
+_encoded_summary: tuple[ReportSummaryResponse, EncodedBody] | None = None
+
+
+def encoded_report_summary(summary: ReportSummaryResponse) -> EncodedBody:
+    """JSON body of `summary` with its ETag and compressed variants, built once per summary.
+
+    A hot reload replaces the summary object, which invalidates the memo.
+    """
+    global _encoded_summary
+    cached = _encoded_summary
+    if cached is None or cached[0] is not summary:
+        cached = (summary, EncodedBody.build(summary.model_dump_json().encode("utf-8")))
+        _encoded_summary = cached
+    return cached[1]
+
+
+def report_artifact_paths(settings: Settings) -> list[Path]:
+    """Files the summary is built from: the metrics file and the confusion-matrix figures."""
+    reports_dir = settings.reports_dir
+    return [
+        reports_dir / _METRICS_FILENAME,
+        *(reports_dir / relative_path for relative_path in _CONFUSION_MATRICES.values()),
+    ]
+
+
+def check_metrics_file(settings: Settings) -> None:
+    """Raise `ValueError` when the metrics file exists but is not a JSON list.
+
+    `load_report_summary` treats such a file as empty; a hot reload keeps the
+    previous summary instead.
+    """
+    metrics_path = settings.reports_dir / _METRICS_FILENAME
+    if not metrics_path.exists():
+        return
+    try:
+        data = json.loads(metrics_path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"{metrics_path} is not valid JSON: {exc}") from exc
+    if not isinstance(data, list):
+        raise ValueError(f"{metrics_path} does not hold a list of model rows.")
+
+
 def load_report_summary(settings: Settings) -> ReportSummaryResponse:
     reports_dir = settings.reports_dir
     metrics = _load_metrics(reports_dir / _METRICS_FILENAME)
@@ -0,0 +1,204 @@
+"""Cosine nearest-neighbour search over `CNNV2.embed` vectors of the CIFAR-10 training split.
+
+The index is three files in `settings.embeddings_dir`, written by
+`python -m tools.embeddings`: an `[N, D]` float16 or float32 `.npy` of
+L2-normalized rows, the `[N]` uint8 labels, and `index.json` with the
+checkpoint hash and input normalization they were computed with. The matrix
+is memory-mapped, never copied into the heap; queries are scored against
+blocks of `SIMILARITY_BLOCK_ROWS` rows with one matrix product per block.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import warnings
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from webapp.core.config import Settings
+from webapp.core.constants import (
+    CIFAR10_CLASSES,
+    EMBEDDING_MODEL_ID,
+    MODEL_CHECKPOINT_FILENAMES,
+    SIMILARITY_BLOCK_ROWS,
+)
+from webapp.schemas.prediction import ModelId, SimilarityIndexStats
+from webapp.services.model_registry import ModelRegistry, file_sha256, file_signature
+
+EMBEDDINGS_FILENAME = "train_embeddings.npy"
+LABELS_FILENAME = "train_labels.npy"
+# Written last, so an interrupted build is never loaded.
+INDEX_META_FILENAME = "index.json"
+INDEX_DTYPES = ("float16", "float32")
+
+
+class SimilarityIndexError(RuntimeError):
+    """Raised when the index is missing, malformed or built from another checkpoint."""
+
+
+@torch.inference_mode()
+def embed_batch(model: nn.Module, images: torch.Tensor) -> torch.Tensor:
+    """L2-normalized `[N, D]` embeddings of a normalized `[N, 3, H, W]` batch."""
+    return F.normalize(model.embed(images), dim=1)
+
+
+def write_index(
+    index_dir: Path,
+    embeddings: np.ndarray,
+    labels: np.ndarray,
+    *,
+    checkpoint_sha256: str,
+    mean: tuple[float, float, float],
+    std: tuple[float, float, float],
+    dtype: str = "float16",
+) -> None:
+    """Store L2-normalized `embeddings` as `dtype` with their labels and provenance."""
+    if dtype not in INDEX_DTYPES:
+        raise ValueError(f"dtype must be one of {INDEX_DTYPES}, got {dtype!r}.")
+    index_dir.mkdir(parents=True, exist_ok=True)
+    (index_dir / INDEX_META_FILENAME).unlink(missing_ok=True)
+    rows = F.normalize(torch.from_numpy(np.asarray(embeddings, dtype=np.float32)), dim=1)
+    for filename, array in (
+        (EMBEDDINGS_FILENAME, rows.numpy().astype(dtype)),
+        (LABELS_FILENAME, np.asarray(labels, dtype=np.uint8)),
+    ):
+        # Replaced, not rewritten in place: a running server may still map the old file.
+        partial_path = index_dir / f"{filename}.partial"
+        with partial_path.open("wb") as handle:
+            np.save(handle, array)
+        os.replace(partial_path, index_dir / filename)
+    meta = {
+        "model_id": EMBEDDING_MODEL_ID,
+        "checkpoint_sha256": checkpoint_sha256,
+        "vectors": int(rows.shape[0]),
+        "dimensions": int(rows.shape[1]),
+        "dtype": dtype,
+        "mean": list(mean),
+        "std": list(std),
+    }
+    meta_path = index_dir / INDEX_META_FILENAME
+    meta_path.write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+
+
+@torch.inference_mode()
+def top_k_cosine(
+    queries: torch.Tensor,
+    embeddings: np.ndarray,
+    k: int,
+    block_rows: int = SIMILARITY_BLOCK_ROWS,
+) -> tuple[torch.Tensor, torch.Tensor]:
+    """`(scores, indices)`, each `[Q, k]`, of the rows of `embeddings` closest to `queries`.
+
+    Both sides must already be L2-normalized, so a dot product is the cosine.
+    Each block of rows is one `[Q, D] @ [D, block]` product followed by a
+    top-k merged into the running best, so memory stays at one block of scores.
+    Blocks are views of the memory map, multiplied in their stored dtype:
+    widening a float16 block first costs more than the product itself.
+    """
+    k = min(k, len(embeddings))
+    queries = queries.to(getattr(torch, str(embeddings.dtype)))
+    best_scores = torch.full((len(queries), 0), float("-inf"))
+    best_indices = torch.empty((len(queries), 0), dtype=torch.int64)
+    for start in range(0, len(embeddings), block_rows):
+        with warnings.catch_warnings():
+            # Read-only memory map; torch only reads it, so wrap without a copy.
+            warnings.simplefilter("ignore", UserWarning)
+            block = torch.from_numpy(embeddings[start : start + block_rows])
+        scores = (queries @ block.T).float()
+        block_scores, block_indices = torch.topk(scores, min(k, scores.shape[1]), dim=1)
+        merged_scores = torch.cat([best_scores, block_scores], dim=1)
+        merged_indices = torch.cat([best_indices, block_indices + start], dim=1)
+        best_scores, order = torch.topk(merged_scores, min(k, merged_scores.shape[1]), dim=1)
+        best_indices = torch.gather(merged_indices, 1, order)
+    return best_scores, best_indices
+
+
+@dataclass(frozen=True)
+class SimilarityIndex:
+    """The memory-mapped index plus the embedding model that produced it."""
+
+    embeddings: np.ndarray
+    labels: np.ndarray
+    model: nn.Module
+    checkpoint_sha256: str
+    mean: tuple[float, float, float]
+    std: tuple[float, float, float]
+
+    @classmethod
+    def load(cls, settings: Settings, registry: ModelRegistry) -> SimilarityIndex:
+        """Map the index and load the checkpoint it was built from as an eager model.
+
+        The model is kept apart from the served `cnnv2`, so hot-reloading a new
+        checkpoint never mixes its embeddings with the index's.
+        """
+        index_dir = settings.embeddings_dir
+        meta_path = index_dir / INDEX_META_FILENAME
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            embeddings = np.load(index_dir / EMBEDDINGS_FILENAME, mmap_mode="r")
+            labels = np.load(index_dir / LABELS_FILENAME, mmap_mode="r")
+        except (OSError, ValueError) as exc:
+            raise SimilarityIndexError(
+                f"No usable similarity index in {index_dir} ({exc}); "
+                "build one with `python -m tools.embeddings`."
+            ) from exc
+        if (
+            not isinstance(meta, dict)
+            or embeddings.ndim != 2
+            or str(embeddings.dtype) not in INDEX_DTYPES
+            or labels.shape != embeddings.shape[:1]
+            or embeddings.shape != (meta.get("vectors"), meta.get("dimensions"))
+        ):
+            raise SimilarityIndexError(
+                f"Similarity index in {index_dir} does not match {INDEX_META_FILENAME}."
+            )
+
+        checkpoint_path = settings.checkpoints_dir / MODEL_CHECKPOINT_FILENAMES[EMBEDDING_MODEL_ID]
+        signature = file_signature(checkpoint_path)
+        if signature is None:
+            raise SimilarityIndexError(f"Missing checkpoint {checkpoint_path}.")
+        checkpoint_sha256 = file_sha256(checkpoint_path)
+        if checkpoint_sha256 != meta.get("checkpoint_sha256"):
+            raise SimilarityIndexError(
+                f"Similarity index was built from another {checkpoint_path.name}; "
+                "rebuild it with `python -m tools.embeddings`."
+            )
+        model = registry.load_checkpoint(ModelId(EMBEDDING_MODEL_ID), checkpoint_path)
+        if file_signature(checkpoint_path) != signature:
+            raise SimilarityIndexError(f"{checkpoint_path} changed while it was loading.")
+        return cls(
+            embeddings=embeddings,
+            labels=labels,
+            model=model,
+            checkpoint_sha256=checkpoint_sha256,
+            mean=tuple(float(value) for value in meta["mean"]),  # type: ignore[arg-type]
+            std=tuple(float(value) for value in meta["std"]),  # type: ignore[arg-type]
+        )
+
+    def search(self, images: torch.Tensor, k: int) -> list[list[tuple[int, str, float]]]:
+        """`(training index, class name, cosine similarity)` of the `k` nearest rows per image."""
+        scores, indices = top_k_cosine(embed_batch(self.model, images), self.embeddings, k)
+        return [
+            [
+                # float16 rows are unit length only to ~1e-3.
+                (index, CIFAR10_CLASSES[int(self.labels[index])], max(-1.0, min(1.0, score)))
+                for score, index in zip(row_scores, row_indices, strict=True)
+            ]
+            for row_scores, row_indices in zip(scores.tolist(), indices.tolist(), strict=True)
+        ]
+
+    def stats(self) -> SimilarityIndexStats:
+        return SimilarityIndexStats(
+            model_id=ModelId(EMBEDDING_MODEL_ID),
+            vectors=self.embeddings.shape[0],
+            dimensions=self.embeddings.shape[1],
+            dtype=str(self.embeddings.dtype),
+            size_mb=round((self.embeddings.nbytes + self.labels.nbytes) / (1024 * 1024), 3),
+            checkpoint_sha256=self.checkpoint_sha256,
+        )
@@ -0,0 +1,395 @@
+"""WebSocket sessions that classify a stream of frames (`/api/v1/stream`).
+
+A client opens a session with its `model_id`, `top_k` and frame format, then
+sends frames back to back as binary messages. Frames are numbered 0, 1, ...
+in arrival order, and each gets exactly one reply, sent in that order: a
+`StreamPrediction`, or a `StreamFrameError` of type `error` (the frame could not be
+decoded) or `dropped` (it was never run).
+
+- Flow control: at most `max_pending` frames wait per session. A frame arriving
+  while the session is full evicts the oldest waiting one, so a client that
+  sends faster than the model keeps getting answers for its newest frames
+  instead of an ever-older backlog.
+- Batching: the frames waiting when the previous batch finishes, up to the
+  micro-batch cap, are decoded and classified in one forward pass, submitted to
+  the inference pool as a single job.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from time import perf_counter
+
+import torch
+from fastapi import WebSocket
+from PIL import Image
+
+from webapp.core.constants import CIFAR10_CLASSES, INPUT_IMAGE_SIZE
+from webapp.schemas.prediction import (
+    ModelId,
+    StreamFrameError,
+    StreamingStats,
+    StreamPrediction,
+    StreamReady,
+    TopKPrediction,
+)
+from webapp.services.batching import timed_forward
+from webapp.services.executor import InferenceExecutor, InferenceQueueFullError
+from webapp.services.model_registry import ModelNotLoadedError, ModelRegistry
+from webapp.services.prediction_cache import content_digest
+from webapp.services.prediction_log import PredictionLog, PredictionSource
+from webapp.services.preprocess import (
+    InvalidArrayError,
+    InvalidImageError,
+    decode_image_fast,
+    frames_to_tensor,
+    parse_frames,
+    upload_too_large_message,
+)
+
+DROPPED_STALE_DETAIL = "Dropped: newer frames arrived before this one was run."
+
+
+class FrameFormat(str, Enum):
+    # Any encoded image `decode_image_fast` reads (PNG, JPEG, ...).
+    image = "image"
+    # One 32x32 RGB uint8 frame: 3,072 raw HWC bytes or a `.npy` array.
+    raw = "raw"
+
+
+@dataclass
+class _Frame:
+    seq: int
+    payload: bytes
+    received_at: float = field(default_factory=perf_counter)
+    # Set when the frame is answered without running it.
+    rejection: StreamFrameError | None = None
+
+
+@dataclass(frozen=True)
+class FrameBatchResult:
+    """Probabilities for the frames that decoded, by position in the submitted batch.
+
+    `digests` holds each decoded frame's `content_digest` when they were requested.
+    """
+
+    probabilities: torch.Tensor
+    positions: list[int]
+    errors: dict[int, str]
+    forward_ms: float
+    digests: list[str] = field(default_factory=list)
+
+
+def decode_frame_batch(
+    payloads: list[bytes],
+    frame_format: FrameFormat,
+    mean: tuple[float, float, float],
+    std: tuple[float, float, float],
+) -> tuple[torch.Tensor, list[int], dict[int, str]]:
+    """Decode `payloads` into the rows of one `[N, 3, H, W]` batch.
+
+    Returns the batch of frames that decoded, their positions in `payloads`
+    and an error message for each position that did not.
+    """
+    height, width = INPUT_IMAGE_SIZE
+    batch = torch.empty(len(payloads), 3, height, width)
+    positions: list[int] = []
+    errors: dict[int, str] = {}
+    for position, payload in enumerate(payloads):
+        row = batch[len(positions) : len(positions) + 1]
+        try:
+            if frame_format == FrameFormat.raw:
+                frames = parse_frames(payload)
+                if len(frames) != 1:
+                    raise InvalidArrayError(f"Send one frame per message, got {len(frames)}.")
+                frames_to_tensor(frames, mean, std, out=row)
+            else:
+                decode_image_fast(payload, mean, std, out=row)
+        except InvalidImageError as exc:
+            errors[position] = str(exc)
+            continue
+        except (OSError, Image.DecompressionBombError):
+            # Truncated or oversized images fail inside PIL's decoder.
+            errors[position] = "Frame is not a valid image."
+            continue
+        positions.append(position)
+    return batch[: len(positions)], positions, errors
+
+
+def predict_frame_batch(
+    registry: ModelRegistry,
+    model_id: ModelId,
+    payloads: list[bytes],
+    frame_format: FrameFormat,
+    mean: tuple[float, float, float],
+    std: tuple[float, float, float],
+    with_digests: bool = False,
+) -> FrameBatchResult:
+    """Decode and classify one session batch; runs on an inference worker."""
+    # Looked up per batch so a hot-reloaded checkpoint takes over mid-session.
+    model = registry.get_model(model_id)
+    batch, positions, errors = decode_frame_batch(payloads, frame_format, mean, std)
+    if not positions:
+        return FrameBatchResult(torch.empty(0, len(CIFAR10_CLASSES)), positions, errors, 0.0)
+    probabilities, forward_ms = timed_forward(model, batch, registry.device)
+    digests = [content_digest(payloads[position]) for position in positions if with_digests]
+    return FrameBatchResult(probabilities, positions, errors, forward_ms, digests)
+
+
+class StreamCounters:
+    """Totals over every session, reported by `/health`. Only touched on the event loop."""
+
+    def __init__(self, max_pending_frames: int) -> None:
+        self.max_pending_frames = max_pending_frames
+        self.active_sessions = 0
+        self.sessions = 0
+        self.frames_received = 0
+        self.frames_predicted = 0
+        self.frames_dropped = 0
+        self.frames_failed = 0
+        self.batches = 0
+        self.batched_frames = 0
+        self.total_latency_ms = 0.0
+
+    def stats(self) -> StreamingStats:
+        return StreamingStats(
+            active_sessions=self.active_sessions,
+            sessions=self.sessions,
+            max_pending_frames=self.max_pending_frames,
+            frames_received=self.frames_received,
+            frames_predicted=self.frames_predicted,
+            frames_dropped=self.frames_dropped,
+            frames_failed=self.frames_failed,
+            batches=self.batches,
+            mean_batch_size=round(self.batched_frames / max(1, self.batches), 3),
+            mean_latency_ms=round(self.total_latency_ms / max(1, self.frames_predicted), 3),
+        )
+
+
+class FrameStream:
+    """One accepted WebSocket session.
+
+    A receiver task reads frames into the pending queue while `run` sends the
+    replies; all sends happen on `run`'s task.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        *,
+        registry: ModelRegistry,
+        executor: InferenceExecutor,
+        counters: StreamCounters,
+        model_id: ModelId,
+        top_k: int,
+        frame_format: FrameFormat,
+        max_pending: int,
+        max_batch_size: int,
+        max_frame_bytes: int,
+        mean: tuple[float, float, float],
+        std: tuple[float, float, float],
+        request_id: str | None = None,
+        prediction_log: PredictionLog | None = None,
+    ) -> None:
+        self.websocket = websocket
+        self.registry = registry
+        self.executor = executor
+        self.counters = counters
+        self.model_id = model_id
+        self.top_k = max(1, min(top_k, len(CIFAR10_CLASSES)))
+        self.frame_format = frame_format
+        self.max_pending = max(1, max_pending)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_frame_bytes = max_frame_bytes
+        self.mean = mean
+        self.std = std
+        self.request_id = request_id
+        self.prediction_log = prediction_log
+        self._pending: deque[_Frame] = deque()
+        self._dropped: list[_Frame] = []
+        self._next_seq = 0
+        self._wakeup = asyncio.Event()
+        self._closed = False
+
+    async def run(self) -> None:
+        """Answer frames until the client disconnects."""
+        self.counters.sessions += 1
+        self.counters.active_sessions += 1
+        receiver = asyncio.create_task(self._receive(), name="frame-stream-receiver")
+        try:
+            await self._send(
+                StreamReady(
+                    model_id=self.model_id,
+                    top_k=self.top_k,
+                    frame_format=self.frame_format.value,
+                    max_pending=self.max_pending,
+                    max_batch_size=self.max_batch_size,
+                    request_id=self.request_id,
+                ).model_dump_json()
+            )
+            await self._serve()
+        finally:
+            self.counters.active_sessions -= 1
+            receiver.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await receiver
+
+    async def _receive(self) -> None:
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                self._enqueue(message.get("bytes"))
+        finally:
+            self._closed = True
+            self._wakeup.set()
+
+    def _enqueue(self, payload: bytes | None) -> None:
+        frame = _Frame(seq=self._next_seq, payload=payload or b"")
+        self._next_seq += 1
+        self.counters.frames_received += 1
+        if payload is None:
+            frame.rejection = StreamFrameError(
+                type="error", seq=frame.seq, detail="Send frames as binary messages."
+            )
+        elif len(payload) > self.max_frame_bytes:
+            frame.rejection = StreamFrameError(
+                type="error",
+                seq=frame.seq,
+                detail=upload_too_large_message(self.max_frame_bytes),
+            )
+        if len(self._pending) >= self.max_pending:
+            stale = self._pending.popleft()
+            stale.rejection = StreamFrameError(
+                type="dropped", seq=stale.seq, detail=DROPPED_STALE_DETAIL
+            )
+            self._dropped.append(stale)
+        self._pending.append(frame)
+        self._wakeup.set()
+
+    async def _serve(self) -> None:
+        while not self._closed:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Evicted frames always precede what is still pending, so replies stay in order.
+            while not self._closed and (self._dropped or self._pending):
+                if self._dropped:
+                    dropped, self._dropped = self._dropped, []
+                    await self._reply(dropped)
+                    continue
+                take = min(len(self._pending), self.max_batch_size)
+                await self._process([self._pending.popleft() for _ in range(take)])
+
+    async def _process(self, batch: list[_Frame]) -> None:
+        runnable = [frame for frame in batch if frame.rejection is None]
+        if not runnable:
+            await self._reply(batch)
+            return
+        dispatched_at = perf_counter()
+        try:
+            result = await self.executor.run(
+                predict_frame_batch,
+                self.registry,
+                self.model_id,
+                [frame.payload for frame in runnable],
+                self.frame_format,
+                self.mean,
+                self.std,
+                with_digests=self.prediction_log is not None,
+            )
+        except (InferenceQueueFullError, ModelNotLoadedError) as exc:
+            kind = "dropped" if isinstance(exc, InferenceQueueFullError) else "error"
+            for frame in runnable:
+                frame.rejection = StreamFrameError(type=kind, seq=frame.seq, detail=str(exc))
+            await self._reply(batch)
+            return
+
+        for position, detail in result.errors.items():
+            frame = runnable[position]
+            frame.rejection = StreamFrameError(type="error", seq=frame.seq, detail=detail)
+        top_k_rows: dict[int, list[TopKPrediction]] = {}
+        if result.positions:
+            self.counters.batches += 1
+            self.counters.batched_frames += len(result.positions)
+            values, indices = torch.topk(result.probabilities, self.top_k, dim=1)
+            for position, row_values, row_indices in zip(
+                result.positions, values.tolist(), indices.tolist(), strict=True
+            ):
+                top_k_rows[runnable[position].seq] = [
+                    TopKPrediction(
+                        class_name=CIFAR10_CLASSES[index], probability=round(probability, 6)
+                    )
+                    for probability, index in zip(row_values, row_indices, strict=True)
+                ]
+            if self.prediction_log is not None:
+                self._log(self.prediction_log, runnable, result, dispatched_at)
+        await self._reply(batch, top_k_rows, result.forward_ms)
+
+    def _log(
+        self,
+        prediction_log: PredictionLog,
+        runnable: list[_Frame],
+        result: FrameBatchResult,
+        dispatched_at: float,
+    ) -> None:
+        now = perf_counter()
+        for position, digest, row in zip(
+            result.positions, result.digests, result.probabilities, strict=True
+        ):
+            frame = runnable[position]
+            prediction_log.submit(
+                request_id=self.request_id,
+                model_id=self.model_id,
+                source=PredictionSource.stream,
+                probabilities=row,
+                input_digest=digest,
+                item=frame.seq,
+                queue_ms=(dispatched_at - frame.received_at) * 1000,
+                forward_ms=result.forward_ms,
+                latency_ms=(now - frame.received_at) * 1000,
+            )
+
+    async def _reply(
+        self,
+        frames: list[_Frame],
+        top_k_rows: dict[int, list[TopKPrediction]] | None = None,
+        forward_ms: float = 0.0,
+    ) -> None:
+        top_k_rows = top_k_rows or {}
+        for frame in frames:
+            if self._closed:
+                return
+            top_k = top_k_rows.get(frame.seq)
+            if top_k is None:
+                rejection = frame.rejection
+                if rejection is None:
+                    raise RuntimeError(f"Frame {frame.seq} has neither a result nor a rejection.")
+                if rejection.type == "dropped":
+                    self.counters.frames_dropped += 1
+                else:
+                    self.counters.frames_failed += 1
+                await self._send(rejection.model_dump_json())
+                continue
+            latency_ms = (perf_counter() - frame.received_at) * 1000
+            self.counters.frames_predicted += 1
+            self.counters.total_latency_ms += latency_ms
+            await self._send(
+                StreamPrediction(
+                    seq=frame.seq,
+                    model_id=self.model_id,
+                    predicted_class=top_k[0].class_name,
+                    confidence=top_k[0].probability,
+                    top_k=top_k,
+                    inference_ms=round(forward_ms, 3),
+                    batch_size=len(top_k_rows),
+                    latency_ms=round(latency_ms, 3),
+                ).model_dump_json()
+            )
+
+    async def _send(self, text: str) -> None:
+        await self.websocket.send_text(text)
@@ -0,0 +1,103 @@
+"""ASGI middleware that enforces upload limits while the request body streams in."""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Mapping
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from webapp.core.constants import MULTIPART_OVERHEAD_BYTES
+from webapp.services.image_decode import upload_too_large_message
+
+
+class RequestBodyTooLargeError(Exception):
+    """Raised from `receive` once a request body passes its limit."""
+
+
+class UploadLimitMiddleware:
+    """Reject oversized or non-multipart uploads before the form parser buffers them.
+
+    `limits` maps a path to the largest accepted file part; the body may exceed
+    it by `MULTIPART_OVERHEAD_BYTES` for boundaries and the other form fields.
+
+    - A declared `Content-Length` above the limit, or a request that is not
+      `multipart/form-data`, is answered before any body is read.
+    - A chunked body stops being read as soon as it crosses the limit. The
+      form parser turns the abort into an error response, which this
+      middleware replaces with `413`.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Mapping[str, int]) -> None:
+        self.app = app
+        self.limits = dict(limits)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        max_upload_bytes = self.limits.get(scope["path"])
+        if max_upload_bytes is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {name.lower(): value for name, value in scope["headers"]}
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+        if not content_type.lower().startswith("multipart/form-data"):
+            await _send_error(send, 415, "Expected a multipart/form-data upload.")
+            return
+
+        max_body_bytes = max_upload_bytes + MULTIPART_OVERHEAD_BYTES
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit():
+            if int(content_length) > max_body_bytes:
+                await _send_error(send, 413, upload_too_large_message(max_upload_bytes))
+                return
+
+        received_bytes = 0
+        exceeded = False
+        response_replaced = False
+
+        async def limited_receive() -> Message:
+            nonlocal received_bytes, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received_bytes += len(message.get("body", b""))
+                if received_bytes > max_body_bytes:
+                    exceeded = True
+                    raise RequestBodyTooLargeError(upload_too_large_message(max_upload_bytes))
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_replaced
+            if not exceeded:
+                await send(message)
+            elif message["type"] == "http.response.start":
+                response_replaced = True
+                await _send_error(send, 413, upload_too_large_message(max_upload_bytes))
+            elif not response_replaced:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except RequestBodyTooLargeError as exc:
+            if response_replaced:
+                return
+            response_replaced = True
+            await _send_error(send, 413, str(exc))
+
+
+async def _send_error(send: Send, status_code: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
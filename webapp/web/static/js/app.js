@@ -28,6 +28,15 @@ let reportFigures = [];
 
 const SUPPORTED_IMAGE_TYPES = new Set(["image/png", "image/jpeg", "image/jpg"]);
 const SUPPORTED_EXTENSIONS = [".png", ".jpg", ".jpeg"];
+// The models' input size; uploads are downscaled to it in the browser.
+const INPUT_SIZE = 32;
+const MODEL_NAMES = {
+  cnnv2: "CNN V2",
+  baseline: "Baseline CNN",
+  cnnv2_int8: "CNN V2 (INT8)",
+  baseline_int8: "Baseline CNN (INT8)",
+  cnnv2_pruned: "CNN V2 (pruned)",
+};
 
 const readAsDataURL = (file) =>
   new Promise((resolve, reject) => {
@@ -40,7 +49,7 @@ const readAsDataURL = (file) =>
 const preloadImage = (source) =>
   new Promise((resolve, reject) => {
     const img = new Image();
-    img.onload = () => resolve();
+    img.onload = () => resolve(img);
     img.onerror = () =>
       reject(new Error("Selected file could not be previewed as an image."));
     img.src = source;
@@ -73,6 +82,46 @@ function cloneForUpload(file) {
   });
 }
 
+const canvasToBlob = (canvas, type) =>
+  new Promise((resolve, reject) => {
+    canvas.toBlob(
+      (blob) => (blob ? resolve(blob) : reject(new Error("Canvas could not be encoded."))),
+      type,
+    );
+  });
+
+function drawScaled(source, width, height) {
+  const canvas = document.createElement("canvas");
+  canvas.width = width;
+  canvas.height = height;
+  const context = canvas.getContext("2d");
+  context.imageSmoothingEnabled = true;
+  context.imageSmoothingQuality = "high";
+  context.drawImage(source, 0, 0, width, height);
+  return canvas;
+}
+
+async function downscaleForUpload(file, image) {
+  // The server would resize to INPUT_SIZE anyway; sending a 32x32 PNG saves the upload.
+  if (image.naturalWidth === INPUT_SIZE && image.naturalHeight === INPUT_SIZE) return file;
+
+  // Halve in steps so every source pixel contributes, as in the server's antialiased resize.
+  let source = image;
+  let width = image.naturalWidth;
+  let height = image.naturalHeight;
+  while (width > 2 * INPUT_SIZE || height > 2 * INPUT_SIZE) {
+    width = Math.max(INPUT_SIZE, Math.ceil(width / 2));
+    height = Math.max(INPUT_SIZE, Math.ceil(height / 2));
+    source = drawScaled(source, width, height);
+  }
+  const blob = await canvasToBlob(drawScaled(source, INPUT_SIZE, INPUT_SIZE), "image/png");
+  const baseName = file.name.replace(/\.[^.]+$/, "") || "image";
+  return new File([blob], `${baseName}-${INPUT_SIZE}x${INPUT_SIZE}.png`, {
+    type: "image/png",
+    lastModified: file.lastModified,
+  });
+}
+
 async function setSelectedFile(file) {
   if (!file) return;
   if (!(file instanceof File) || file.size <= 0) {
@@ -86,12 +135,21 @@ async function setSelectedFile(file) {
   const currentSelection = ++selectionVersion;
   const stableFile = cloneForUpload(file);
   const previewSource = await readAsDataURL(stableFile);
-  await preloadImage(previewSource);
+  const image = await preloadImage(previewSource);
+  let uploadFile = stableFile;
+  try {
+    uploadFile = await downscaleForUpload(stableFile, image);
+  } catch {
+    // Canvas unavailable: upload the original and let the server resize it.
+  }
 
   if (currentSelection !== selectionVersion) return;
 
-  selectedFile = stableFile;
-  fileName.textContent = `${stableFile.name} (${(stableFile.size / 1024).toFixed(1)} KB)`;
+  // The preview keeps the original; only the upload is downscaled.
+  selectedFile = uploadFile;
+  const sizeKB = (size) => `${(size / 1024).toFixed(1)} KB`;
+  const sent = uploadFile === stableFile ? "" : `, sends ${sizeKB(uploadFile.size)}`;
+  fileName.textContent = `${stableFile.name} (${sizeKB(stableFile.size)}${sent})`;
   preview.src = previewSource;
   preview.hidden = false;
   previewWrap.hidden = false;
@@ -131,7 +189,7 @@ function updateReportFigure(modelId) {
   } else {
     reportFigure.removeAttribute("src");
     reportFigure.hidden = true;
-    figureCaption.textContent = `No confusion matrix for ${modelId === "cnnv2" ? "CNN V2" : modelId}.`;
+    figureCaption.textContent = `No confusion matrix for ${MODEL_NAMES[modelId] ?? modelId}.`;
   }
 }
 
@@ -181,14 +239,10 @@ function renderMetrics(metrics) {
     { key: "test_precision_macro", label: "Precision" },
     { key: "test_recall_macro", label: "Recall" },
     { key: "test_f1_macro", label: "F1" },
+    { key: "latency_ms", label: "CPU Latency", unit: "ms", lowerIsBetter: true },
   ];
 
-  const modelName = (m) =>
-    m.model === "cnnv2"
-      ? "CNN V2"
-      : m.model === "baseline"
-        ? "Baseline CNN"
-        : m.model;
+  const modelName = (m) => MODEL_NAMES[m.model] ?? m.model;
 
   const bestOverall = models.reduce(
     (bi, m, i, arr) =>
@@ -208,23 +262,27 @@ function renderMetrics(metrics) {
     )
     .join("");
 
-  const cell = (value, isBest) => {
+  const cell = (value, isBest, unit) => {
     if (value == null || typeof value !== "number") return `<td><span class="metric-val">—</span></td>`;
     const cls = isBest ? "metric-val metric-val--best" : "metric-val";
-    return `<td><span class="${cls}">${(value * 100).toFixed(2)}</span><span class="metric-unit">%</span></td>`;
+    const shown = unit === "ms" ? value.toFixed(2) : (value * 100).toFixed(2);
+    return `<td><span class="${cls}">${shown}</span><span class="metric-unit">${unit ?? "%"}</span></td>`;
   };
 
   const bodyRows = metricDefs
-    .map(({ key, label }) => {
-      let bestVal = -1;
+    .filter(({ key }) => models.some((m) => typeof m[key] === "number"))
+    .map(({ key, label, unit, lowerIsBetter }) => {
+      let bestVal = null;
       let bestModelIdx = 0;
       models.forEach((m, i) => {
-        if (typeof m[key] === "number" && m[key] > bestVal) {
+        if (typeof m[key] !== "number") return;
+        const better = lowerIsBetter ? m[key] < bestVal : m[key] > bestVal;
+        if (bestVal === null || better) {
           bestVal = m[key];
           bestModelIdx = i;
         }
       });
-      const cells = models.map((m, i) => cell(m[key], i === bestModelIdx)).join("");
+      const cells = models.map((m, i) => cell(m[key], i === bestModelIdx, unit)).join("");
       return `<tr><td>${label}</td>${cells}</tr>`;
     })
     .join("");
@@ -294,7 +352,10 @@ async function runPrediction() {
 
     const payload = await response.json();
     predictedClass.textContent = payload.predicted_class;
-    confidenceLine.textContent = `${(payload.confidence * 100).toFixed(2)}% confidence · ${payload.model_id}`;
+    const answeredBy = payload.cascade
+      ? `auto → ${payload.model_id}${payload.cascade.escalated ? " (escalated)" : ""}`
+      : payload.model_id;
+    confidenceLine.textContent = `${(payload.confidence * 100).toFixed(2)}% confidence · ${answeredBy}`;
     latencyBadge.textContent = formatLatency(payload.inference_ms);
     renderTopK(payload.top_k);
 